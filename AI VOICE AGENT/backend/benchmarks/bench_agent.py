@@ -0,0 +1,240 @@
+"""Offline benchmark for the agent's tools and per-turn overhead.
+
+Drives the agent defined in `scenarios.py` through its scripted conversation
+with the fake plugins from `fake_plugins.py`, so no API keys or network access
+are needed. Run it from the backend directory:
+
+    uv run python benchmarks/bench_agent.py --sessions 2000
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Any, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import scenarios
+from fake_plugins import FakeLLM, FakeSTT, FakeTTS
+from livekit.agents import AgentSession, FunctionToolsExecutedEvent
+
+logger = logging.getLogger("bench")
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {
+        "count": len(ordered),
+        "p50_ms": round(pick(0.50) * 1000, 3),
+        "p95_ms": round(pick(0.95) * 1000, 3),
+        "p99_ms": round(pick(0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def rss_bytes() -> int:
+    """Current resident set size; falls back to the peak where /proc is missing."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes on Linux
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class SessionStats:
+    """Tool and turn timings gathered across sessions."""
+
+    def __init__(self) -> None:
+        self.tool_durations: dict[str, list[float]] = defaultdict(list)
+        self.turn_durations: list[float] = []
+        self.turn_overheads: list[float] = []
+        self.setup_durations: list[float] = []
+        self.teardown_durations: list[float] = []
+        self.errors = 0
+        self._turn_tool_time = 0.0
+
+    def record_tools(self, ev: FunctionToolsExecutedEvent) -> None:
+        for call, output in zip(ev.function_calls, ev.function_call_outputs):
+            if output is None:
+                continue
+            duration = output.created_at - call.created_at
+            self.tool_durations[call.name].append(duration)
+            self._turn_tool_time += duration
+            if output.is_error:
+                self.errors += 1
+
+    def start_turn(self) -> None:
+        self._turn_tool_time = 0.0
+
+    def end_turn(self, duration: float) -> None:
+        self.turn_durations.append(duration)
+        self.turn_overheads.append(max(0.0, duration - self._turn_tool_time))
+
+
+# The fake STT and TTS keep no per-session state, so every session shares one of each
+_STT = FakeSTT()
+_TTS = FakeTTS()
+
+
+def _session_kwargs(fake_llm: FakeLLM) -> dict[str, Any]:
+    kwargs: dict[str, Any] = {
+        "llm": fake_llm,
+        "stt": _STT,
+        "tts": _TTS,
+        # Closing waits this long for a final transcript the fake STT never sends
+        "session_close_transcript_timeout": 0.0,
+    }
+    if hasattr(scenarios, "make_userdata"):
+        kwargs["userdata"] = scenarios.make_userdata()
+    return kwargs
+
+
+async def run_session(
+    stats: SessionStats, *, llm_ttft: float = 0.0, think_time: float = 0.0
+) -> None:
+    """Run the scripted conversation once in a fresh session."""
+    start = time.perf_counter()
+    fake_llm = FakeLLM(dict(scenarios.SCRIPT), ttft=llm_ttft)
+    session = AgentSession(**_session_kwargs(fake_llm))
+    try:
+        session.on("function_tools_executed", stats.record_tools)
+        await session.start(scenarios.make_agent())
+        stats.setup_durations.append(time.perf_counter() - start)
+        for user_input, _ in scenarios.SCRIPT:
+            if think_time:
+                # Simulated time the user spends listening and speaking
+                await asyncio.sleep(think_time)
+            stats.start_turn()
+            start = time.perf_counter()
+            await session.run(user_input=user_input)
+            stats.end_turn(time.perf_counter() - start)
+    finally:
+        start = time.perf_counter()
+        await session.aclose()
+        stats.teardown_durations.append(time.perf_counter() - start)
+
+
+def prepare_workdir(workdir: Optional[str]) -> str:
+    """Move into a scratch directory so the tools' files do not touch the repo."""
+    path = workdir or tempfile.mkdtemp(prefix=f"bench_{scenarios.AGENT_NAME}_")
+    os.makedirs(path, exist_ok=True)
+    if hasattr(scenarios, "prepare_workdir"):
+        scenarios.prepare_workdir(path)
+    os.chdir(path)
+    return path
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict[str, Any]:
+    stats = SessionStats()
+    memory: list[dict[str, float]] = []
+    if args.tracemalloc:
+        tracemalloc.start()
+    baseline_snapshot = None
+
+    # One untimed session so imports and lazy initialisation do not skew results
+    await run_session(SessionStats())
+    gc.collect()
+    rss_start = rss_bytes()
+    if args.tracemalloc:
+        baseline_snapshot = tracemalloc.take_snapshot()
+
+    started = time.perf_counter()
+    for i in range(1, args.sessions + 1):
+        await run_session(stats, llm_ttft=args.llm_ttft)
+        if i % args.sample_every == 0 or i == args.sessions:
+            gc.collect()
+            memory.append({"sessions": i, "rss_mb": round(rss_bytes() / 2**20, 2)})
+            logger.info(f"{i}/{args.sessions} sessions, rss={memory[-1]['rss_mb']}MB")
+    elapsed = time.perf_counter() - started
+
+    rss_end = rss_bytes()
+    turn_time = sum(stats.turn_durations)
+    result: dict[str, Any] = {
+        "agent": scenarios.AGENT_NAME,
+        "sessions": args.sessions,
+        "turns_per_session": len(scenarios.SCRIPT),
+        "elapsed_s": round(elapsed, 3),
+        "sessions_per_s": round(args.sessions / elapsed, 2) if elapsed else 0.0,
+        # Turns per second of time spent in turns, without session setup/teardown
+        "turns_per_s": round(len(stats.turn_durations) / turn_time, 1) if turn_time else 0.0,
+        "session_setup": percentiles(stats.setup_durations),
+        "session_teardown": percentiles(stats.teardown_durations),
+        "turn_latency": percentiles(stats.turn_durations),
+        "turn_overhead": percentiles(stats.turn_overheads),
+        "tools": {name: percentiles(v) for name, v in sorted(stats.tool_durations.items())},
+        "tool_errors": stats.errors,
+        "rss_growth_mb": round((rss_end - rss_start) / 2**20, 2),
+        "rss_growth_kb_per_session": round((rss_end - rss_start) / 1024 / args.sessions, 3),
+        "memory": memory,
+    }
+    if baseline_snapshot is not None:
+        diff = tracemalloc.take_snapshot().compare_to(baseline_snapshot, "lineno")
+        result["top_allocations"] = [str(stat) for stat in diff[:10]]
+        tracemalloc.stop()
+    return result
+
+
+def print_report(result: dict[str, Any]) -> None:
+    print(f"\n{result['agent']}: {result['sessions']} sessions x {result['turns_per_session']} turns "
+          f"in {result['elapsed_s']}s ({result['sessions_per_s']} sessions/s, "
+          f"{result['turns_per_s']} turns/s excluding session setup)")
+    print(f"  setup        : {result['session_setup']}")
+    print(f"  teardown     : {result['session_teardown']}")
+    print(f"  turn latency : {result['turn_latency']}")
+    print(f"  turn overhead: {result['turn_overhead']}")
+    for name, timing in result["tools"].items():
+        print(f"  tool {name}: {timing}")
+    print(f"  tool errors  : {result['tool_errors']}")
+    print(f"  rss growth   : {result['rss_growth_mb']}MB "
+          f"({result['rss_growth_kb_per_session']}KB/session)")
+    for line in result.get("top_allocations", []):
+        print(f"    {line}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--sample-every", type=int, default=100,
+                        help="record RSS every N sessions")
+    parser.add_argument("--llm-ttft", type=float, default=0.0,
+                        help="simulated LLM time to first token in seconds")
+    parser.add_argument("--workdir", help="scratch directory for files the tools write")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="report the allocation sites that grew the most")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    logger.setLevel(logging.INFO)
+
+    json_path = os.path.abspath(args.json) if args.json else None
+    workdir = prepare_workdir(args.workdir)
+    logger.info(f"Working directory: {workdir}")
+
+    result = asyncio.run(run_benchmark(args))
+    print_report(result)
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Multi-session load generator for a single worker process.
+
+Runs many simulated sessions of the agent from `scenarios.py` concurrently in
+one process with the fake plugins, stepping through increasing concurrency
+levels. For each level it reports event-loop lag, CPU and RSS per session and
+tool-call latency, which is what decides how many rooms one job process can
+host and where to set `WorkerOptions(load_threshold=...)`.
+
+Sessions are driven through `AgentSession` the same way the entrypoint sets
+them up, minus the room transport. Run it from the backend directory:
+
+    uv run python benchmarks/load_gen.py --levels 1,10,25,50,100
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+from contextlib import suppress
+from typing import Any, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import scenarios
+from bench_agent import (
+    SessionStats,
+    percentiles,
+    prepare_workdir,
+    rss_bytes,
+    run_session,
+)
+
+logger = logging.getLogger("load_gen")
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up a task sleeping on a fixed interval."""
+
+    def __init__(self, interval: float = 0.01) -> None:
+        self.interval = interval
+        self.lags: list[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - start - self.interval))
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+
+
+async def _sample_peak_rss(peak: list[int], interval: float = 0.25) -> None:
+    while True:
+        peak[0] = max(peak[0], rss_bytes())
+        await asyncio.sleep(interval)
+
+
+async def run_level(concurrency: int, args: argparse.Namespace) -> dict[str, Any]:
+    """Keep `concurrency` sessions running until each slot finished its share."""
+    gc.collect()
+    rss_before = rss_bytes()
+    peak = [rss_before]
+    all_stats: list[SessionStats] = []
+    failures = 0
+
+    async def slot(index: int) -> None:
+        nonlocal failures
+        # Spread session starts so the slots do not run in lockstep
+        await asyncio.sleep(index * args.stagger)
+        for _ in range(args.sessions_per_slot):
+            stats = SessionStats()
+            all_stats.append(stats)
+            try:
+                await run_session(stats, llm_ttft=args.llm_ttft, think_time=args.think_time)
+            except Exception as e:
+                failures += 1
+                logger.warning(f"Session failed: {e}")
+
+    monitor = LoopLagMonitor()
+    monitor.start()
+    sampler = asyncio.create_task(_sample_peak_rss(peak))
+    cpu_before = time.process_time()
+    started = time.perf_counter()
+
+    await asyncio.gather(*(slot(i) for i in range(concurrency)))
+
+    elapsed = time.perf_counter() - started
+    cpu_used = time.process_time() - cpu_before
+    sampler.cancel()
+    await monitor.stop()
+
+    sessions = len(all_stats)
+    tools: dict[str, list[float]] = defaultdict(list)
+    for stats in all_stats:
+        for name, durations in stats.tool_durations.items():
+            tools[name].extend(durations)
+    all_tool_calls = [d for durations in tools.values() for d in durations]
+
+    return {
+        "concurrency": concurrency,
+        "sessions": sessions,
+        "failures": failures,
+        "elapsed_s": round(elapsed, 3),
+        "loop_lag": percentiles(monitor.lags),
+        "cpu_utilisation": round(cpu_used / elapsed, 3) if elapsed else 0.0,
+        "cpu_ms_per_session": round(cpu_used / sessions * 1000, 3) if sessions else 0.0,
+        "rss_peak_mb": round(peak[0] / 2**20, 2),
+        "rss_kb_per_session": round((peak[0] - rss_before) / 1024 / concurrency, 2),
+        "tool_latency": percentiles(all_tool_calls),
+        "tools": {name: percentiles(v) for name, v in sorted(tools.items())},
+    }
+
+
+def recommend(levels: list[dict[str, Any]], max_lag_ms: float) -> dict[str, Any]:
+    """Highest level whose p95 loop lag stayed under the budget, and its CPU load."""
+    healthy = [
+        level for level in levels
+        if level["failures"] == 0 and level["loop_lag"].get("p95_ms", 0.0) <= max_lag_ms
+    ]
+    if not healthy:
+        return {"max_sessions": 0, "load_threshold": None}
+    best = healthy[-1]
+    return {
+        "max_sessions": best["concurrency"],
+        # WorkerOptions.load_threshold is compared against CPU load (0-1)
+        "load_threshold": round(min(best["cpu_utilisation"], 1.0), 2),
+    }
+
+
+async def run_load_gen(args: argparse.Namespace) -> dict[str, Any]:
+    # Warm imports and lazy state before measuring
+    await run_session(SessionStats())
+    levels = []
+    for concurrency in args.levels:
+        level = await run_level(concurrency, args)
+        levels.append(level)
+        print(
+            f"{concurrency:>5} sessions | lag p95 {level['loop_lag'].get('p95_ms', 0)}ms "
+            f"p99 {level['loop_lag'].get('p99_ms', 0)}ms | cpu {level['cpu_utilisation']:.0%} "
+            f"({level['cpu_ms_per_session']}ms/session) | rss {level['rss_peak_mb']}MB "
+            f"({level['rss_kb_per_session']}KB/session) | tool p95 "
+            f"{level['tool_latency'].get('p95_ms', 0)}ms | failures {level['failures']}"
+        )
+    return {
+        "agent": scenarios.AGENT_NAME,
+        "levels": levels,
+        "recommendation": recommend(levels, args.max_lag_ms),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--levels", default="1,5,10,25,50",
+                        type=lambda v: [int(x) for x in v.split(",") if x],
+                        help="comma separated concurrency levels to step through")
+    parser.add_argument("--sessions-per-slot", type=int, default=3,
+                        help="sessions each concurrent slot runs back to back")
+    parser.add_argument("--think-time", type=float, default=1.0,
+                        help="seconds of simulated user speech between turns")
+    parser.add_argument("--llm-ttft", type=float, default=0.3,
+                        help="simulated LLM time to first token in seconds")
+    parser.add_argument("--stagger", type=float, default=0.02,
+                        help="delay between slot starts in seconds")
+    parser.add_argument("--max-lag-ms", type=float, default=50.0,
+                        help="p95 event-loop lag budget for the recommendation")
+    parser.add_argument("--workdir", help="scratch directory for files the tools write")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    json_path = os.path.abspath(args.json) if args.json else None
+    prepare_workdir(args.workdir)
+
+    result = asyncio.run(run_load_gen(args))
+    rec = result["recommendation"]
+    print(f"\nSustained {rec['max_sessions']} concurrent sessions within "
+          f"{args.max_lag_ms}ms p95 loop lag; suggested load_threshold={rec['load_threshold']}")
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""Scripted conversation used by the offline benchmarks."""
+
+from fake_plugins import FakeResponse, ToolCall
+
+from agent import CoffeeBaristaAgent
+
+AGENT_NAME = "coffee_barista"
+
+# (user message, scripted LLM response)
+SCRIPT = [
+    ("Hi, I'd like a coffee", FakeResponse(text="Welcome to Brew & Bean! What drink would you like?")),
+    ("A large latte with oat milk", FakeResponse(text="Great choice! Any extras?")),
+    ("Extra shot and vanilla syrup, name is Sam", FakeResponse(
+        text="Your order is in, Sam!",
+        tool_calls=[ToolCall("save_coffee_order", {
+            "drink_type": "latte",
+            "size": "large",
+            "milk": "oat",
+            "extras": "extra shot, vanilla syrup",
+            "name": "Sam",
+        })],
+    )),
+    ("Thanks!", FakeResponse(text="Enjoy your latte!")),
+]
+
+
+def make_agent() -> CoffeeBaristaAgent:
+    return CoffeeBaristaAgent()
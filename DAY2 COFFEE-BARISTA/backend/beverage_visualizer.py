@@ -1,48 +1,33 @@
-import json
+import html
 import os
-from typing import Dict, List
+import re
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import Callable, Optional
 
-def generate_beverage_html(order: Dict) -> str:
-    """Generate HTML visualization of a coffee order."""
-    
-    # Cup size mapping
-    cup_sizes = {
-        "small": {"height": "120px", "width": "80px"},
-        "medium": {"height": "150px", "width": "100px"},
-        "large": {"height": "180px", "width": "120px"}
-    }
-    
-    # Drink color mapping
-    drink_colors = {
-        "espresso": "#3C2415",
-        "americano": "#4A2C17",
-        "latte": "#D2B48C",
-        "cappuccino": "#DEB887",
-        "mocha": "#8B4513",
-        "frappuccino": "#F5DEB3"
-    }
-    
-    size = order.get("size", "medium").lower()
-    drink_type = order.get("drinkType", "latte").lower()
-    extras = order.get("extras", [])
-    name = order.get("name", "Customer")
-    milk = order.get("milk", "whole")
-    
-    cup_style = cup_sizes.get(size, cup_sizes["medium"])
-    drink_color = drink_colors.get(drink_type, "#D2B48C")
-    
-    # Check for whipped cream
-    has_whipped_cream = any("whipped" in extra.lower() for extra in extras)
-    
-    html = f"""
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Coffee Order - {name}</title>
-        <style>
-            body {{
+# Cup size mapping
+CUP_SIZES = {
+    "small": {"height": "120px", "width": "80px"},
+    "medium": {"height": "150px", "width": "100px"},
+    "large": {"height": "180px", "width": "120px"}
+}
+
+# Drink color mapping
+DRINK_COLORS = {
+    "espresso": "#3C2415",
+    "americano": "#4A2C17",
+    "latte": "#D2B48C",
+    "cappuccino": "#DEB887",
+    "mocha": "#8B4513",
+    "frappuccino": "#F5DEB3"
+}
+
+# Everything that is the same for every receipt. Per-order cup size and colour are
+# passed in as CSS custom properties on the cup element.
+RECEIPT_CSS = """
+            body {
                 font-family: 'Arial', sans-serif;
                 background: linear-gradient(135deg, #8B4513, #D2691E);
                 margin: 0;
@@ -51,26 +36,26 @@ def generate_beverage_html(order: Dict) -> str:
                 justify-content: center;
                 align-items: center;
                 min-height: 100vh;
-            }}
-            .order-container {{
+            }
+            .order-container {
                 background: white;
                 border-radius: 20px;
                 padding: 30px;
                 box-shadow: 0 10px 30px rgba(0,0,0,0.3);
                 text-align: center;
                 max-width: 400px;
-            }}
-            .coffee-cup {{
+            }
+            .coffee-cup {
                 position: relative;
                 margin: 20px auto;
-                width: {cup_style["width"]};
-                height: {cup_style["height"]};
-                background: linear-gradient(to bottom, {drink_color} 0%, {drink_color} 85%, #F5F5DC 85%);
+                width: var(--cup-width);
+                height: var(--cup-height);
+                background: linear-gradient(to bottom, var(--drink-color) 0%, var(--drink-color) 85%, #F5F5DC 85%);
                 border: 3px solid #8B4513;
                 border-radius: 0 0 20px 20px;
                 box-shadow: inset 0 0 20px rgba(0,0,0,0.2);
-            }}
-            .cup-handle {{
+            }
+            .cup-handle {
                 position: absolute;
                 right: -25px;
                 top: 30%;
@@ -79,8 +64,8 @@ def generate_beverage_html(order: Dict) -> str:
                 border: 3px solid #8B4513;
                 border-left: none;
                 border-radius: 0 10px 10px 0;
-            }}
-            .whipped-cream {{
+            }
+            .whipped-cream {
                 position: absolute;
                 top: -15px;
                 left: 50%;
@@ -90,8 +75,8 @@ def generate_beverage_html(order: Dict) -> str:
                 background: #FFFAF0;
                 border-radius: 50%;
                 box-shadow: 0 2px 5px rgba(0,0,0,0.2);
-            }}
-            .steam {{
+            }
+            .steam {
                 position: absolute;
                 top: -40px;
                 left: 50%;
@@ -99,73 +84,201 @@ def generate_beverage_html(order: Dict) -> str:
                 font-size: 20px;
                 color: #DDD;
                 animation: steam 2s infinite;
-            }}
-            @keyframes steam {{
-                0%, 100% {{ opacity: 0.7; transform: translateX(-50%) translateY(0); }}
-                50% {{ opacity: 0.3; transform: translateX(-50%) translateY(-10px); }}
-            }}
-            .order-details {{
+            }
+            @keyframes steam {
+                0%, 100% { opacity: 0.7; transform: translateX(-50%) translateY(0); }
+                50% { opacity: 0.3; transform: translateX(-50%) translateY(-10px); }
+            }
+            .order-details {
                 margin-top: 30px;
                 text-align: left;
                 background: #F8F8F8;
                 padding: 20px;
                 border-radius: 10px;
-            }}
-            .order-title {{
+            }
+            .order-title {
                 font-size: 24px;
                 color: #8B4513;
                 margin-bottom: 20px;
                 text-align: center;
-            }}
-            .detail-item {{
+            }
+            .detail-item {
                 margin: 10px 0;
                 font-size: 16px;
                 color: #333;
-            }}
-            .detail-label {{
+            }
+            .detail-label {
                 font-weight: bold;
                 color: #8B4513;
-            }}
-        </style>
+            }
+"""
+
+RECEIPT_TEMPLATE = """
+    <!DOCTYPE html>
+    <html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>Coffee Order - ${name}</title>
+        <style>${css}        </style>
     </head>
     <body>
         <div class="order-container">
             <h1 class="order-title">☕ Brew & Bean Coffee</h1>
-            
-            <div class="coffee-cup">
+
+            <div class="coffee-cup" style="--cup-width: ${cup_width}; --cup-height: ${cup_height}; --drink-color: ${drink_color};">
                 <div class="cup-handle"></div>
-                {"<div class='whipped-cream'></div>" if has_whipped_cream else ""}
+                ${whipped_cream}
                 <div class="steam">☁️ ☁️ ☁️</div>
             </div>
-            
+
             <div class="order-details">
-                <h2 style="text-align: center; color: #8B4513;">Order for {name}</h2>
-                
+                <h2 style="text-align: center; color: #8B4513;">Order for ${name}</h2>
+
                 <div class="detail-item">
-                    <span class="detail-label">Drink:</span> {drink_type.title()}
+                    <span class="detail-label">Drink:</span> ${drink}
                 </div>
-                
+
                 <div class="detail-item">
-                    <span class="detail-label">Size:</span> {size.title()}
+                    <span class="detail-label">Size:</span> ${size}
                 </div>
-                
+
                 <div class="detail-item">
-                    <span class="detail-label">Milk:</span> {milk.title()}
+                    <span class="detail-label">Milk:</span> ${milk}
                 </div>
-                
-                {"<div class='detail-item'><span class='detail-label'>Extras:</span> " + ", ".join(extras) + "</div>" if extras else ""}
-                
+
+                ${extras}
+
                 <div class="detail-item">
-                    <span class="detail-label">Order ID:</span> {order.get('order_id', 'N/A')}
+                    <span class="detail-label">Order ID:</span> ${order_id}
                 </div>
-                
+
                 <div class="detail-item">
-                    <span class="detail-label">Time:</span> {order.get('timestamp', 'N/A')[:19].replace('T', ' ')}
+                    <span class="detail-label">Time:</span> ${time}
                 </div>
             </div>
         </div>
     </body>
     </html>
     """
-    
-    return html
\ No newline at end of file
+
+
+class CompiledTemplate:
+    """A template split once into literal chunks and `${field}` slots.
+
+    Rendering is a single join over the precompiled parts, so the static
+    shell and CSS are never re-parsed or re-formatted per receipt.
+    """
+
+    FIELD = re.compile(r"\$\{(\w+)\}")
+
+    def __init__(self, source: str, **constants: str) -> None:
+        for name, value in constants.items():
+            source = source.replace("${" + name + "}", value)
+        # Even indexes are literal text, odd indexes are field names
+        pieces = self.FIELD.split(source)
+        self.parts: list[str] = pieces[:]
+        self.slots: list[tuple[int, str]] = [(i, pieces[i]) for i in range(1, len(pieces), 2)]
+
+    def render(self, values: dict[str, str]) -> str:
+        parts = self.parts[:]
+        for index, name in self.slots:
+            parts[index] = values[name]
+        return "".join(parts)
+
+
+_RECEIPT = CompiledTemplate(RECEIPT_TEMPLATE, css=RECEIPT_CSS)
+
+
+def _receipt_fields(order: dict) -> dict[str, str]:
+    size = order.get("size", "medium").lower()
+    drink_type = order.get("drinkType", "latte").lower()
+    extras = order.get("extras", [])
+    cup_style = CUP_SIZES.get(size, CUP_SIZES["medium"])
+    # Check for whipped cream
+    has_whipped_cream = any("whipped" in extra.lower() for extra in extras)
+    return {
+        "name": html.escape(order.get("name", "Customer")),
+        "cup_width": cup_style["width"],
+        "cup_height": cup_style["height"],
+        "drink_color": DRINK_COLORS.get(drink_type, "#D2B48C"),
+        "whipped_cream": "<div class='whipped-cream'></div>" if has_whipped_cream else "",
+        "drink": html.escape(drink_type.title()),
+        "size": html.escape(size.title()),
+        "milk": html.escape(order.get("milk", "whole").title()),
+        "extras": (
+            "<div class='detail-item'><span class='detail-label'>Extras:</span> "
+            + html.escape(", ".join(extras)) + "</div>"
+        ) if extras else "",
+        "order_id": html.escape(order.get("order_id", "N/A")),
+        "time": html.escape(order.get("timestamp", "N/A")[:19].replace("T", " ")),
+    }
+
+
+def generate_beverage_html(order: dict) -> str:
+    """Generate HTML visualization of a coffee order."""
+    return _RECEIPT.render(_receipt_fields(order))
+
+
+class ReceiptCache:
+    """Receipts rendered on first request and kept by order ID, least recently used evicted."""
+
+    def __init__(self, load_order: Callable[[str], Optional[dict]], maxsize: int = 256) -> None:
+        self.load_order = load_order
+        self.maxsize = maxsize
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, order_id: str) -> Optional[str]:
+        with self._lock:
+            receipt = self._cache.get(order_id)
+            if receipt is not None:
+                self._cache.move_to_end(order_id)
+                self.hits += 1
+                return receipt
+        order = self.load_order(order_id)
+        if order is None:
+            return None
+        receipt = generate_beverage_html(order)
+        with self._lock:
+            self.misses += 1
+            self._cache[order_id] = receipt
+            self._cache.move_to_end(order_id)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return receipt
+
+    def invalidate(self, order_id: Optional[str] = None) -> None:
+        """Drop one order's receipt so it is rendered again, or every receipt if no ID is given."""
+        with self._lock:
+            if order_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(order_id, None)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+def render_archive(orders: Iterable[dict], out_dir: str) -> int:
+    """Write a receipt for every order in one pass; returns how many were written."""
+    os.makedirs(out_dir, exist_ok=True)
+    count = 0
+    for order in orders:
+        path = os.path.join(out_dir, f"{order['order_id']}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(generate_beverage_html(order))
+        count += 1
+    return count
+
+
+if __name__ == "__main__":
+    # Regenerate receipts for the whole order archive: python beverage_visualizer.py [out_dir]
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+    from order_journal import get_journal
+
+    out_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join("orders", "receipts")
+    written = render_archive(get_journal().iter_orders(), out_dir)
+    print(f"Rendered {written} receipts into {out_dir}")
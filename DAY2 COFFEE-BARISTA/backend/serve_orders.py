@@ -1,52 +1,196 @@
 #!/usr/bin/env python3
 
+import html
 import http.server
-import socketserver
+import json
 import os
+import sys
 import webbrowser
-from pathlib import Path
+from urllib.parse import parse_qs, urlencode, urlparse
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from beverage_visualizer import ReceiptCache
+from order_feed import JournalTailer, OrderFeed
+from order_index import OrderIndex
+
+RECEIPT_PREFIX = "/receipts/"
+PAGE_SIZE = 25
+MAX_PAGE_SIZE = 200
+# Comment lines sent on idle streams so proxies keep the connection open
+KEEPALIVE_SECONDS = 15
+
+KITCHEN_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="UTF-8"><title>Brew & Bean Kitchen</title></head>
+<body style="font-family: Arial, sans-serif;">
+<h1>☕ Order Queue</h1>
+<ol id="queue" reversed></ol>
+<script>
+const queue = document.getElementById("queue");
+const source = new EventSource("/api/orders/stream");
+source.addEventListener("order", (event) => {
+    const order = JSON.parse(event.data);
+    const item = document.createElement("li");
+    const extras = order.extras && order.extras.length ? " + " + order.extras.join(", ") : "";
+    item.textContent = `${order.size} ${order.drinkType} (${order.milk} milk)${extras} for ${order.name}`;
+    queue.prepend(item);
+});
+source.addEventListener("resync", () => location.reload());
+</script>
+</body></html>"""
+
+
+class OrderBrowserHandler(http.server.BaseHTTPRequestHandler):
+    """Paginated order list, JSON API and receipts rendered on first view"""
+
+    index = None
+    receipts = None
+    feed = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path in ("/", "/index.html"):
+            self._send(self._render_list(self._page(query), query), "text/html; charset=utf-8")
+        elif url.path == "/kitchen":
+            self._send(KITCHEN_PAGE, "text/html; charset=utf-8")
+        elif url.path == "/api/orders/stream":
+            self._stream(self.headers.get("Last-Event-ID") or query.get("from"))
+        elif url.path == "/api/orders":
+            self._send(json.dumps(self._page(query)), "application/json")
+        elif url.path.startswith(RECEIPT_PREFIX) and url.path.endswith(".html"):
+            receipt = self.receipts.get(url.path[len(RECEIPT_PREFIX):-len(".html")])
+            if receipt is None:
+                self.send_error(404, "Order not found")
+            else:
+                self._send(receipt, "text/html; charset=utf-8")
+        else:
+            self.send_error(404)
+
+    def _stream(self, last_event_id):
+        """Server-sent events: every new order, after replaying those since `last_event_id`"""
+        from_offset = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+        subscription = self.feed.subscribe(from_offset)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            if subscription.missed:
+                # Older than the replay buffer; the client should reload the order list
+                self.wfile.write(b"event: resync\ndata: {}\n\n")
+            while True:
+                item = subscription.get(timeout=KEEPALIVE_SECONDS)
+                if item is not None:
+                    offset, order = item
+                    self.wfile.write(f"id: {offset}\nevent: order\ndata: {json.dumps(order)}\n\n".encode("utf-8"))
+                elif subscription.closed:
+                    break
+                else:
+                    self.wfile.write(b": keep-alive\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            subscription.close()
+
+    def _page(self, query):
+        try:
+            page = int(query.get("page", 1))
+            page_size = min(MAX_PAGE_SIZE, max(1, int(query.get("page_size", PAGE_SIZE))))
+        except ValueError:
+            page, page_size = 1, PAGE_SIZE
+        return self.index.page(
+            page_size,
+            after=query.get("after"),
+            before=query.get("before"),
+            page=page,
+            name=query.get("name"),
+            drink=query.get("drink"),
+            size=query.get("size"),
+        )
+
+    def _render_list(self, result, query):
+        rows = "".join(
+            f"<tr><td><a href=\"{RECEIPT_PREFIX}{html.escape(o['order_id'])}.html\">{html.escape(o['order_id'])}</a></td>"
+            f"<td>{html.escape(o['name'])}</td><td>{html.escape(o['drink'].title())}</td>"
+            f"<td>{html.escape(o['size'].title())}</td><td>{html.escape(o['timestamp'][:19].replace('T', ' '))}</td></tr>"
+            for o in result["orders"]
+        )
+
+        def page_link(page, direction, cursor, label):
+            kept = {k: v for k, v in query.items() if v and k not in ("after", "before", "page")}
+            params = urlencode({**kept, direction: cursor, "page": page})
+            return f'<a href="/?{html.escape(params)}">{label}</a>'
+
+        nav = []
+        if result["prev"]:
+            nav.append(page_link(result["page"] - 1, "before", result["prev"], "&larr; Newer"))
+        if result["next"]:
+            nav.append(page_link(result["page"] + 1, "after", result["next"], "Older &rarr;"))
+        filters = "".join(
+            f'{field.title()}: <input name="{field}" value="{html.escape(query.get(field, ""))}"> '
+            for field in ("name", "drink", "size")
+        )
+        return f"""<!DOCTYPE html>
+<html><head><meta charset="UTF-8"><title>Brew & Bean Orders</title></head>
+<body style="font-family: Arial, sans-serif;">
+<h1>☕ Brew & Bean Orders</h1>
+<form method="get">{filters}<button>Filter</button></form>
+<p>{result['total']} orders &middot; page {result['page']} of {result['pages']} {' | '.join(nav)}</p>
+<table border="1" cellpadding="6" style="border-collapse: collapse;">
+<tr><th>Order ID</th><th>Name</th><th>Drink</th><th>Size</th><th>Time</th></tr>
+{rows}
+</table>
+</body></html>"""
+
+    def _send(self, body, content_type):
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
 
 def serve_orders():
-    """Start a simple HTTP server to view order HTML files"""
-    
-    # Change to orders directory
+    """Start a threaded HTTP server to browse orders and view their receipts"""
+
     orders_dir = os.path.join(os.getcwd(), "orders")
-    
-    if not os.path.exists(orders_dir):
-        print("No orders directory found!")
-        return
-    
-    os.chdir(orders_dir)
-    
+
     # Find available port
     PORT = 8000
-    
-    # List HTML files
-    html_files = [f for f in os.listdir('.') if f.endswith('.html')]
-    
-    if not html_files:
-        print("No HTML order files found!")
-        return
-    
-    print(f"Found {len(html_files)} order visualizations:")
-    for i, file in enumerate(html_files, 1):
-        print(f"  {i}. {file}")
-    
+
+    # Creates the orders directory if needed; an empty index still serves the live feed
+    index = OrderIndex(orders_dir)
+    index.refresh(force=True)
+
+    if len(index):
+        print(f"Found {len(index)} orders")
+    else:
+        print("No orders yet; new orders will show up as they are placed")
+
     print(f"\nStarting HTTP server on port {PORT}...")
     print(f"View orders at: http://localhost:{PORT}/")
+    print(f"Live order queue at: http://localhost:{PORT}/kitchen")
     print("Press Ctrl+C to stop the server")
-    
+
     # Start server
-    Handler = http.server.SimpleHTTPRequestHandler
-    
+    Handler = OrderBrowserHandler
+    Handler.index = index
+    Handler.receipts = ReceiptCache(index.load)
+    # An edited legacy order file is rendered again on its next view
+    index.on_update = Handler.receipts.invalidate
+    Handler.feed = OrderFeed()
+    tailer = JournalTailer(Handler.feed, index.journal_dir)
+    tailer.start()
+
     try:
-        with socketserver.TCPServer(("", PORT), Handler) as httpd:
+        with http.server.ThreadingHTTPServer(("", PORT), Handler) as httpd:
             print(f"Server running at http://localhost:{PORT}/")
-            
-            # Open browser to first HTML file
-            if html_files:
-                webbrowser.open(f"http://localhost:{PORT}/{html_files[0]}")
-            
+
+            webbrowser.open(f"http://localhost:{PORT}/")
+
             httpd.serve_forever()
     except KeyboardInterrupt:
         print("\nServer stopped.")
@@ -55,6 +199,8 @@ def serve_orders():
             print(f"Port {PORT} is already in use. Try a different port.")
         else:
             print(f"Error starting server: {e}")
+    finally:
+        tailer.stop()
 
 if __name__ == "__main__":
-    serve_orders()
\ No newline at end of file
+    serve_orders()
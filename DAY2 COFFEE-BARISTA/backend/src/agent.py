@@ -1,6 +1,4 @@
 import logging
-import json
-import os
 from datetime import datetime
 
 from dotenv import load_dotenv
@@ -10,6 +8,7 @@ from livekit.agents import (
     JobContext,
     JobProcess,
     MetricsCollectedEvent,
+    FunctionToolsExecutedEvent,
     RoomInputOptions,
     WorkerOptions,
     cli,
@@ -18,8 +17,13 @@ from livekit.agents import (
     function_tool,
     RunContext
 )
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+from livekit.plugins import murf, google, deepgram
+from latency_metrics import LatencyRecorder
+from loop_monitor import start_blocking_detector
+from model_cache import get_models, prewarm_models
+from order_feed import notify_tailers
+from order_journal import get_journal
+from persistence import run_blocking
 
 logger = logging.getLogger("agent")
 
@@ -44,7 +48,7 @@ class CoffeeBaristaAgent(Agent):
 
     @function_tool
     async def save_coffee_order(self, context: RunContext, drink_type: str, size: str, milk: str, extras: str, name: str):
-        """Save a complete coffee order to a JSON file.
+        """Save a complete coffee order to the order journal.
         
         Args:
             drink_type: Type of coffee drink (latte, cappuccino, etc.)
@@ -65,38 +69,18 @@ class CoffeeBaristaAgent(Agent):
                 "extras": extras_list,
                 "name": name,
                 "timestamp": datetime.now().isoformat(),
-                "order_id": f"order_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
             }
             
-            # Get current working directory and create absolute path
-            current_dir = os.getcwd()
-            orders_dir = os.path.join(current_dir, "orders")
+            # Append to the order journal; returns once the order is fsynced, with its unique ID.
+            # The HTML receipt is rendered later, the first time someone asks for it.
+            journal = await run_blocking(get_journal)
+            order = await journal.append(order)
+            # Kitchen displays tail the journal; wake them instead of waiting for their next poll
+            notify_tailers(journal.directory)
             
-            # Create orders directory if it doesn't exist
-            if not os.path.exists(orders_dir):
-                os.makedirs(orders_dir)
-                logger.info(f"Created orders directory: {orders_dir}")
+            logger.info(f"Order saved successfully: {order['order_id']} (seq {order['seq']})")
             
-            # Save order to JSON file
-            filename = os.path.join(orders_dir, f"{order['order_id']}.json")
-            with open(filename, 'w') as f:
-                json.dump(order, f, indent=2)
-            
-            # Generate HTML visualization
-            try:
-                from beverage_visualizer import generate_beverage_html
-                html_content = generate_beverage_html(order)
-                html_filename = os.path.join(orders_dir, f"{order['order_id']}.html")
-                with open(html_filename, 'w', encoding='utf-8') as f:
-                    f.write(html_content)
-                logger.info(f"Visualization created: {html_filename}")
-            except Exception as viz_error:
-                logger.error(f"Error creating visualization: {viz_error}")
-                # Continue without visualization
-            
-            logger.info(f"Order saved successfully: {filename}")
-            
-            return f"Perfect! Your order has been saved. Order ID: {order['order_id']}. Your {size} {drink_type} will be ready shortly, {name}! I've also created a visual receipt for you."
+            return f"Perfect! Your order has been saved. Order ID: {order['order_id']}. Your {size} {drink_type} will be ready shortly, {name}! Your visual receipt is ready whenever you want it."
             
         except Exception as e:
             logger.error(f"Error saving order: {e}")
@@ -104,7 +88,7 @@ class CoffeeBaristaAgent(Agent):
 
 
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    prewarm_models(proc)
 
 
 async def entrypoint(ctx: JobContext):
@@ -113,6 +97,9 @@ async def entrypoint(ctx: JobContext):
         "room": ctx.room.name,
     }
 
+    models = get_models(ctx.proc)
+    blocking_detector = start_blocking_detector()
+
     session = AgentSession(
         stt=deepgram.STT(model="nova-3"),
         llm=google.LLM(model="gemini-2.5-flash"),
@@ -122,21 +109,30 @@ async def entrypoint(ctx: JobContext):
                 tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=2),
                 text_pacing=True
             ),
-        turn_detection=MultilingualModel(),
-        vad=ctx.proc.userdata["vad"],
+        turn_detection=models.turn_detection,
+        vad=models.vad,
         preemptive_generation=True,
     )
 
     usage_collector = metrics.UsageCollector()
+    latency_recorder = LatencyRecorder(ctx.room.name)
 
     @session.on("metrics_collected")
     def _on_metrics_collected(ev: MetricsCollectedEvent):
         metrics.log_metrics(ev.metrics)
         usage_collector.collect(ev.metrics)
+        latency_recorder.record(ev.metrics)
+
+    @session.on("function_tools_executed")
+    def _on_function_tools_executed(ev: FunctionToolsExecutedEvent):
+        latency_recorder.record_tools(ev)
 
     async def log_usage():
         summary = usage_collector.get_summary()
         logger.info(f"Usage: {summary}")
+        latency_recorder.export()
+        if blocking_detector:
+            blocking_detector.stop()
 
     ctx.add_shutdown_callback(log_usage)
 
@@ -144,7 +140,7 @@ async def entrypoint(ctx: JobContext):
         agent=CoffeeBaristaAgent(),
         room=ctx.room,
         room_input_options=RoomInputOptions(
-            noise_cancellation=noise_cancellation.BVC(),
+            noise_cancellation=models.noise_cancellation,
         ),
     )
 
@@ -0,0 +1,246 @@
+"""Throughput and menu analytics over the coffee order archive.
+
+Orders are streamed from the journal (and any legacy per-order JSON files)
+in fixed-size chunks. Each chunk is turned into columnar numpy arrays:
+drink, size and milk as integer codes, extras as a bitmask per order and the
+timestamp as datetime64. All statistics are computed with vectorized
+group-bys (`np.bincount`, `np.unique`) and merged into small accumulators,
+so memory stays bounded by the chunk size, however large the archive.
+
+    python src/order_analytics.py [--json report.json]
+"""
+
+import argparse
+import json
+import logging
+import os
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from typing import Any, Optional
+
+import numpy as np
+
+from order_journal import JOURNAL_DIR, iter_journal_orders
+
+logger = logging.getLogger("order_analytics")
+
+CHUNK_SIZE = 65536
+# Extras beyond this many distinct values are counted under "other"
+MAX_EXTRAS = 63
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+class Vocabulary:
+    """Maps category strings to stable, dense integer codes."""
+
+    def __init__(self) -> None:
+        self.codes: dict[str, int] = {}
+
+    def encode(self, values: list[str]) -> np.ndarray:
+        # Group in C, then only map the handful of distinct values in Python
+        uniques, inverse = np.unique(np.array(values, dtype=str), return_inverse=True)
+        mapping = np.array(
+            [self.codes.setdefault(value, len(self.codes)) for value in uniques.tolist()], dtype=np.int32
+        )
+        return mapping[inverse.reshape(-1)]
+
+    @property
+    def labels(self) -> list[str]:
+        return list(self.codes)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+
+def _grow(counts: np.ndarray, shape: tuple[int, ...]) -> np.ndarray:
+    """Zero-pad an accumulator when new categories show up."""
+    if counts.shape == shape:
+        return counts
+    grown = np.zeros(shape, dtype=counts.dtype)
+    grown[tuple(slice(0, n) for n in counts.shape)] = counts
+    return grown
+
+
+class OrderAnalytics:
+    def __init__(self) -> None:
+        self.drinks = Vocabulary()
+        self.sizes = Vocabulary()
+        self.milks = Vocabulary()
+        self.extras = Vocabulary()
+        self.total = 0
+        self.undated = 0
+        self.drink_size = np.zeros((0, 0), dtype=np.int64)
+        self.milk_counts = np.zeros(0, dtype=np.int64)
+        self.extra_counts = np.zeros(MAX_EXTRAS + 1, dtype=np.int64)
+        self.heatmap = np.zeros((7, 24), dtype=np.int64)
+        # Orders per wall-clock hour, keyed by hours since the epoch
+        self.hourly: dict[int, int] = {}
+
+    def _extras_mask(self, orders: list[dict]) -> np.ndarray:
+        masks = np.zeros(len(orders), dtype=np.uint64)
+        for i, order in enumerate(orders):
+            bits = 0
+            for extra in order.get("extras") or []:
+                code = self.extras.codes.setdefault(extra.strip().lower(), len(self.extras.codes))
+                bits |= 1 << min(code, MAX_EXTRAS)
+            masks[i] = bits
+        return masks
+
+    @staticmethod
+    def _timestamps(orders: list[dict]) -> np.ndarray:
+        stamps = [str(order.get("timestamp") or "")[:19] for order in orders]
+        try:
+            return np.array(stamps, dtype="datetime64[s]")
+        except ValueError:
+            # A malformed timestamp somewhere in the chunk; fall back per value
+            parsed = []
+            for stamp in stamps:
+                try:
+                    parsed.append(np.datetime64(stamp, "s"))
+                except ValueError:
+                    parsed.append(np.datetime64("NaT"))
+            return np.array(parsed, dtype="datetime64[s]")
+
+    def update(self, orders: list[dict]) -> None:
+        """Fold one chunk of orders into the running totals."""
+        if not orders:
+            return
+        self.total += len(orders)
+
+        drink = self.drinks.encode([str(o.get("drinkType", "")).strip().lower() for o in orders])
+        size = self.sizes.encode([str(o.get("size", "")).strip().lower() for o in orders])
+        milk = self.milks.encode([str(o.get("milk", "")).strip().lower() for o in orders])
+        extras = self._extras_mask(orders)
+        when = self._timestamps(orders)
+
+        # Drink x size mix as one flat bincount
+        n_drinks, n_sizes = len(self.drinks), len(self.sizes)
+        self.drink_size = _grow(self.drink_size, (n_drinks, n_sizes))
+        self.drink_size += np.bincount(drink * n_sizes + size, minlength=n_drinks * n_sizes).reshape(n_drinks, n_sizes)
+        self.milk_counts = _grow(self.milk_counts, (len(self.milks),))
+        self.milk_counts += np.bincount(milk, minlength=len(self.milks))
+
+        # Attach rate numerators: one pass per extra bit over the whole chunk
+        for bit in range(min(len(self.extras), MAX_EXTRAS + 1)):
+            self.extra_counts[bit] += int(np.count_nonzero(extras & np.uint64(1 << bit)))
+
+        dated = ~np.isnat(when)
+        self.undated += int(len(when) - dated.sum())
+        when = when[dated]
+        if len(when):
+            days = when.astype("datetime64[D]")
+            hour_of_day = ((when - days) // np.timedelta64(1, "h")).astype(np.int64)
+            # 1970-01-01 was a Thursday; shift so Monday is 0
+            weekday = (days.astype(np.int64) + 3) % 7
+            self.heatmap += np.bincount(weekday * 24 + hour_of_day, minlength=7 * 24).reshape(7, 24)
+            hours, counts = np.unique(when.astype("datetime64[h]").astype(np.int64), return_counts=True)
+            for hour, count in zip(hours.tolist(), counts.tolist()):
+                self.hourly[hour] = self.hourly.get(hour, 0) + count
+
+    def report(self, top_hours: int = 10) -> dict[str, Any]:
+        total = max(self.total, 1)
+        drink_totals = self.drink_size.sum(axis=1)
+        size_totals = self.drink_size.sum(axis=0)
+        hourly = np.array(list(self.hourly.values()), dtype=np.int64)
+        extra_labels = self.extras.labels[:MAX_EXTRAS] + (["other"] if len(self.extras) > MAX_EXTRAS else [])
+        busiest = sorted(self.hourly.items(), key=lambda kv: -kv[1])[:top_hours]
+        return {
+            "orders": self.total,
+            "undated_orders": self.undated,
+            "throughput": {
+                "active_hours": len(self.hourly),
+                "mean_per_active_hour": round(float(hourly.mean()), 2) if len(hourly) else 0.0,
+                "p95_per_active_hour": float(np.percentile(hourly, 95)) if len(hourly) else 0.0,
+                "busiest_hours": [
+                    {"hour": str(np.datetime64(hour, "h")), "orders": count} for hour, count in busiest
+                ],
+            },
+            "drink_mix": {d: round(int(n) / total, 4) for d, n in zip(self.drinks.labels, drink_totals)},
+            "size_mix": {s: round(int(n) / total, 4) for s, n in zip(self.sizes.labels, size_totals)},
+            "drink_size_counts": {
+                d: {s: int(n) for s, n in zip(self.sizes.labels, row) if n}
+                for d, row in zip(self.drinks.labels, self.drink_size)
+            },
+            "milk_mix": {m: round(int(n) / total, 4) for m, n in zip(self.milks.labels, self.milk_counts)},
+            "extras_attach_rate": {
+                e: round(int(n) / total, 4) for e, n in zip(extra_labels, self.extra_counts)
+            },
+            "peak_heatmap": {day: row.tolist() for day, row in zip(WEEKDAYS, self.heatmap)},
+        }
+
+
+def iter_legacy_orders(orders_dir: str) -> Iterator[dict]:
+    """Orders saved as one JSON file each by older versions of the agent."""
+    if not os.path.isdir(orders_dir):
+        return
+    for entry in os.scandir(orders_dir):
+        if entry.name.endswith(".json") and entry.is_file():
+            try:
+                with open(entry.path, encoding="utf-8") as f:
+                    yield json.load(f)
+            except (ValueError, OSError) as e:
+                logger.warning(f"Skipping unreadable order file {entry.path}: {e}")
+
+
+def analyze(orders: Iterable[dict], chunk_size: int = CHUNK_SIZE) -> dict[str, Any]:
+    analytics = OrderAnalytics()
+    orders = iter(orders)
+    while True:
+        chunk = list(islice(orders, chunk_size))
+        if not chunk:
+            break
+        analytics.update(chunk)
+    return analytics.report()
+
+
+def analyze_archive(orders_dir: Optional[str] = None, chunk_size: int = CHUNK_SIZE) -> dict[str, Any]:
+    orders_dir = orders_dir or os.path.dirname(JOURNAL_DIR) or "orders"
+    journal_dir = os.path.join(orders_dir, os.path.basename(JOURNAL_DIR))
+
+    def orders() -> Iterator[dict]:
+        seen_legacy = set()
+        for order in iter_legacy_orders(orders_dir):
+            seen_legacy.add(order.get("order_id"))
+            yield order
+        for order in iter_journal_orders(journal_dir):
+            # Legacy files folded in with import-legacy are counted once
+            if order.get("order_id") not in seen_legacy:
+                yield order
+
+    return analyze(orders(), chunk_size)
+
+
+def print_report(report: dict[str, Any]) -> None:
+    print(f"\n📊 Brew & Bean order analytics: {report['orders']} orders")
+    throughput = report["throughput"]
+    print(f"\nThroughput: {throughput['mean_per_active_hour']} orders per active hour "
+          f"(p95 {throughput['p95_per_active_hour']}) over {throughput['active_hours']} hours")
+    for item in throughput["busiest_hours"]:
+        print(f"  {item['hour'].replace('T', ' ')}:00  {item['orders']}")
+    for title, key in (("Drinks", "drink_mix"), ("Sizes", "size_mix"), ("Milk", "milk_mix"),
+                       ("Extras attach rate", "extras_attach_rate")):
+        print(f"\n{title}:")
+        for label, share in sorted(report[key].items(), key=lambda kv: -kv[1]):
+            print(f"  {label or 'unknown':<20} {share:6.1%}")
+    print("\nPeak hours (orders by weekday and hour):")
+    print("     " + "".join(f"{h:>5}" for h in range(24)))
+    for day, row in report["peak_heatmap"].items():
+        print(f"{day:<5}" + "".join(f"{n:>5}" for n in row))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Order throughput analytics")
+    parser.add_argument("--orders-dir", default=None, help="orders directory (default: ./orders)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = analyze_archive(args.orders_dir, args.chunk_size)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
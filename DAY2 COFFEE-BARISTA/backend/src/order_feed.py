@@ -0,0 +1,263 @@
+"""Live feed of new orders for kitchen displays.
+
+`OrderFeed` is an in-process publish/subscribe hub. Every order is published
+with its journal sequence number as the offset and kept in a ring buffer of
+the most recent orders, so a subscriber can resume from the last offset it
+saw (SSE `Last-Event-ID`). Each subscriber has its own bounded queue; a
+consumer that falls that far behind is disconnected instead of slowing the
+publisher down or growing memory, and resumes from its offset on reconnect.
+
+The agent and the order browser are separate processes, so orders reach the
+feed through the journal: the order browser runs a `JournalTailer` that
+follows the journal on disk and publishes what it reads. Each tailer listens
+on a Unix datagram socket in the journal directory, and `save_coffee_order`
+calls `notify_tailers` once its order is fsynced, so a new order is read
+right away rather than on the next poll. Polling every `interval` remains as
+the fallback for missed wake-ups and for platforms without Unix sockets.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import select
+import socket
+import threading
+from collections import deque
+from typing import Optional
+
+from order_journal import ACTIVE_FILE, JOURNAL_DIR, SEGMENT_RE
+
+logger = logging.getLogger("order_feed")
+
+RING_SIZE = int(os.getenv("ORDER_FEED_RING_SIZE", "1000"))
+SUBSCRIBER_QUEUE = int(os.getenv("ORDER_FEED_QUEUE", "256"))
+# Directory in the journal holding one wake-up socket per tailer
+WAKE_DIR = "tailers"
+
+
+def notify_tailers(journal_dir: str = JOURNAL_DIR) -> int:
+    """Wake every tailer following `journal_dir`; returns how many were reached.
+
+    Never blocks: a tailer whose socket buffer is full is awake already, and
+    sockets left behind by tailers that exited are removed.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return 0
+    directory = os.path.join(os.path.abspath(journal_dir), WAKE_DIR)
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return 0
+    woken = 0
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+        sock.setblocking(False)
+        for name in names:
+            path = os.path.join(directory, name)
+            try:
+                sock.sendto(b"\n", path)
+                woken += 1
+            except BlockingIOError:
+                woken += 1
+            except (ConnectionRefusedError, FileNotFoundError):
+                with contextlib.suppress(OSError):
+                    os.remove(path)
+            except OSError as e:
+                logger.debug(f"Could not wake order feed tailer {name}: {e}")
+    return woken
+
+
+class Subscription:
+    def __init__(self, feed: "OrderFeed", maxsize: int) -> None:
+        self._feed = feed
+        self._queue: deque[tuple[int, dict]] = deque()
+        self._maxsize = maxsize
+        self._cond = threading.Condition()
+        self.closed = False
+        # True when the requested offset was older than the ring buffer
+        self.missed = False
+
+    def _push(self, offset: int, order: dict) -> bool:
+        with self._cond:
+            if self.closed:
+                return False
+            if len(self._queue) >= self._maxsize:
+                logger.warning("Order feed subscriber fell behind, disconnecting it")
+                self.closed = True
+                self._cond.notify_all()
+                return False
+            self._queue.append((offset, order))
+            self._cond.notify()
+            return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[tuple[int, dict]]:
+        """Next (offset, order), or None on timeout or once the subscription is closed."""
+        with self._cond:
+            if not self._queue and not self.closed:
+                self._cond.wait(timeout)
+            if self._queue:
+                return self._queue.popleft()
+            return None
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+        self._feed._unsubscribe(self)
+
+
+class OrderFeed:
+    def __init__(self, ring_size: int = RING_SIZE, subscriber_queue: int = SUBSCRIBER_QUEUE) -> None:
+        self._ring: deque[tuple[int, dict]] = deque(maxlen=ring_size)
+        self._subscribers: list[Subscription] = []
+        self._subscriber_queue = subscriber_queue
+        self._lock = threading.Lock()
+        self.last_offset = 0
+
+    def publish(self, order: dict) -> int:
+        with self._lock:
+            offset = order.get("seq") or self.last_offset + 1
+            if offset <= self.last_offset:
+                # Already seen (e.g. published by the agent and tailed from the journal)
+                return offset
+            self.last_offset = offset
+            self._ring.append((offset, order))
+            subscribers = list(self._subscribers)
+        dropped = [sub for sub in subscribers if not sub._push(offset, order)]
+        if dropped:
+            with self._lock:
+                self._subscribers = [s for s in self._subscribers if s not in dropped]
+        return offset
+
+    def subscribe(self, from_offset: Optional[int] = None) -> Subscription:
+        """Subscribe to new orders, first replaying those after `from_offset` from the ring."""
+        sub = Subscription(self, self._subscriber_queue)
+        with self._lock:
+            if from_offset is not None:
+                backlog = [(o, order) for o, order in self._ring if o > from_offset]
+                oldest = self._ring[0][0] if self._ring else self.last_offset + 1
+                sub.missed = from_offset < oldest - 1
+                # Replay whatever fits; the rest is reported through `missed`
+                for offset, order in backlog[-self._subscriber_queue:]:
+                    sub._queue.append((offset, order))
+                if len(backlog) > self._subscriber_queue:
+                    sub.missed = True
+            self._subscribers.append(sub)
+        return sub
+
+    def _unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+
+
+class JournalTailer:
+    """Follows the journal's active file and publishes new orders to a feed."""
+
+    def __init__(self, feed: OrderFeed, journal_dir: str = JOURNAL_DIR, interval: float = 0.05) -> None:
+        self.feed = feed
+        self.path = os.path.join(os.path.abspath(journal_dir), ACTIVE_FILE)
+        self.interval = interval
+        self._inode: Optional[int] = None
+        self._offset = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._wake: Optional[socket.socket] = None
+        self._wake_path: Optional[str] = None
+
+    def _drain(self, path: str, offset: int) -> int:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                try:
+                    self.feed.publish(json.loads(line))
+                except ValueError:
+                    continue
+        return offset
+
+    def _sealed_path(self, inode: int) -> Optional[str]:
+        directory = os.path.dirname(self.path)
+        for name in sorted(os.listdir(directory), reverse=True):
+            if SEGMENT_RE.match(name) and os.stat(os.path.join(directory, name)).st_ino == inode:
+                return os.path.join(directory, name)
+        return None
+
+    def _read_new(self) -> None:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if st.st_ino != self._inode:
+            if self._inode is not None:
+                # The file we were following was sealed; pick up its last lines first
+                sealed = self._sealed_path(self._inode)
+                if sealed:
+                    self._drain(sealed, self._offset)
+            self._inode, self._offset = st.st_ino, 0
+        if st.st_size > self._offset:
+            self._offset = self._drain(self.path, self._offset)
+
+    def _open_wake_socket(self) -> None:
+        if not hasattr(socket, "AF_UNIX"):
+            return
+        directory = os.path.join(os.path.dirname(self.path), WAKE_DIR)
+        path = os.path.join(directory, f"{os.getpid()}-{id(self):x}.sock")
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            sock.bind(path)
+        except OSError as e:
+            sock.close()
+            logger.warning(f"Order feed falls back to polling the journal: {e}")
+            return
+        sock.setblocking(False)
+        self._wake, self._wake_path = sock, path
+
+    def _wait(self) -> None:
+        """Sleep until notified or for `interval`, whichever comes first."""
+        if self._wake is None:
+            self._stop.wait(self.interval)
+            return
+        readable, _, _ = select.select([self._wake], [], [], self.interval)
+        if readable:
+            # Several notifications cost a single read of the journal
+            try:
+                while self._wake.recv(64):
+                    pass
+            except OSError:
+                pass
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wait()
+            if self._stop.is_set():
+                break
+            try:
+                self._read_new()
+            except Exception as e:
+                logger.error(f"Journal tailer error: {e}")
+
+    def start(self) -> None:
+        self._open_wake_socket()
+        # Fill the ring buffer with the recent orders so clients can replay them
+        self._read_new()
+        self._thread = threading.Thread(target=self._run, name="journal-tailer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._wake is not None:
+            # Cut the tailer's select short
+            with contextlib.suppress(OSError):
+                self._wake.sendto(b"\n", self._wake_path)
+        if self._thread:
+            self._thread.join(timeout=1)
+        if self._wake is not None:
+            self._wake.close()
+            with contextlib.suppress(OSError):
+                os.remove(self._wake_path)
+            self._wake = None
+
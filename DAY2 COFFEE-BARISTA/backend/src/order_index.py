@@ -0,0 +1,304 @@
+"""Persistent SQLite index over the order archive for browsing.
+
+The index stores order ID, customer name, drink, size, timestamp and where
+the full order lives (journal file + byte offset, or a legacy JSON file).
+Pages are fetched with keyset pagination: a page continues from a cursor
+(the timestamp and order ID of the last order shown) by an index seek, so
+each page costs O(log n + page size) however deep into the archive it is.
+The total shown with a page is counted once per filter and reused until
+the index changes.
+
+`refresh()` is incremental. Journal files are append-only, so only the bytes
+past the last indexed offset are read; legacy per-order JSON files are
+stat'ed and only re-read when their mtime or size changes.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from order_journal import ACTIVE_FILE, JOURNAL_DIR, SEGMENT_RE
+
+logger = logging.getLogger("order_index")
+
+ORDERS_DIR = os.path.dirname(JOURNAL_DIR) or "orders"
+INDEX_FILE = "order_index.sqlite"
+# Requests within this many seconds of the last refresh reuse it
+REFRESH_INTERVAL = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    order_id TEXT PRIMARY KEY,
+    seq INTEGER,
+    name TEXT,
+    name_lc TEXT,
+    drink TEXT,
+    size TEXT,
+    timestamp TEXT,
+    file_key TEXT NOT NULL,
+    offset INTEGER
+);
+CREATE INDEX IF NOT EXISTS orders_by_time ON orders (timestamp DESC, order_id DESC);
+DROP INDEX IF EXISTS orders_by_name;
+DROP INDEX IF EXISTS orders_by_drink;
+CREATE INDEX IF NOT EXISTS orders_by_name_time ON orders (name_lc, timestamp DESC, order_id DESC);
+CREATE INDEX IF NOT EXISTS orders_by_drink_time ON orders (drink, timestamp DESC, order_id DESC);
+CREATE TABLE IF NOT EXISTS files (
+    file_key TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    mtime REAL,
+    offset INTEGER
+);
+"""
+
+FILTERS = {"name": "name_lc = ?", "drink": "drink = ?", "size": "size = ?"}
+# Totals kept per filter combination
+MAX_CACHED_TOTALS = 64
+
+
+def make_cursor(order: dict) -> str:
+    return f"{order['timestamp']}|{order['order_id']}"
+
+
+def parse_cursor(cursor: str) -> tuple[str, str]:
+    timestamp, _, order_id = cursor.rpartition("|")
+    return timestamp, order_id
+
+
+class OrderIndex:
+    def __init__(self, orders_dir: str = ORDERS_DIR, db_path: Optional[str] = None) -> None:
+        self.orders_dir = os.path.abspath(orders_dir)
+        self.journal_dir = os.path.join(self.orders_dir, os.path.basename(JOURNAL_DIR))
+        self.db_path = db_path or os.path.join(self.orders_dir, INDEX_FILE)
+        os.makedirs(self.orders_dir, exist_ok=True)
+        self._local = threading.local()
+        self._refresh_lock = threading.Lock()
+        self._last_refresh = 0.0
+        # Bumped by every refresh that changes an order; keys the cached totals
+        self._changes = 0
+        # (filters, changes) -> total
+        self._totals: dict[tuple, int] = {}
+        # Called with the ID of each legacy order whose file was edited
+        self.on_update: Optional[Callable[[str], None]] = None
+        with self._db() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+
+    def _db(self) -> sqlite3.Connection:
+        # One connection per server thread; SQLite connections cannot be shared
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=10)
+            db.row_factory = sqlite3.Row
+            self._local.db = db
+        return db
+
+    # ---- refresh ----
+
+    def refresh(self, force: bool = False) -> int:
+        """Index orders added since the last refresh; returns how many were added."""
+        if not force and time.monotonic() - self._last_refresh < REFRESH_INTERVAL:
+            return 0
+        with self._refresh_lock:
+            db = self._db()
+            known = {row["file_key"]: row for row in db.execute("SELECT * FROM files")}
+            updated: list[str] = []
+            with db:
+                added = self._refresh_journal(db, known) + self._refresh_legacy(db, known, updated)
+            if added:
+                self._changes += 1
+            self._last_refresh = time.monotonic()
+        if self.on_update:
+            for order_id in updated:
+                self.on_update(order_id)
+        if added:
+            logger.info(f"Indexed {added} new orders")
+        return added
+
+    def _refresh_journal(self, db: sqlite3.Connection, known: dict) -> int:
+        if not os.path.isdir(self.journal_dir):
+            return 0
+        names = [*sorted(n for n in os.listdir(self.journal_dir) if SEGMENT_RE.match(n)), ACTIVE_FILE]
+        added = 0
+        for name in names:
+            path = os.path.join(self.journal_dir, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            # Keyed by inode: sealing renames active.jsonl, the offsets stay valid
+            key = f"ino:{st.st_ino}"
+            row = known.get(key)
+            offset = row["offset"] if row else 0
+            if row and row["path"] != path:
+                db.execute("UPDATE files SET path = ? WHERE file_key = ?", (path, key))
+            if st.st_size <= offset:
+                continue
+            rows = []
+            with open(path, "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        order = json.loads(line)
+                        rows.append(self._row(order, key, offset))
+                    except (ValueError, KeyError, TypeError):
+                        pass
+                    offset += len(line)
+            # The journal wins over a legacy file for the same order (import-legacy)
+            db.executemany(
+                "INSERT OR REPLACE INTO orders VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            db.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", (key, path, st.st_mtime, offset)
+            )
+            added += len(rows)
+        return added
+
+    def _refresh_legacy(self, db: sqlite3.Connection, known: dict, updated: list[str]) -> int:
+        added = 0
+        for entry in os.scandir(self.orders_dir):
+            if not entry.name.endswith(".json") or not entry.is_file():
+                continue
+            key = f"path:{entry.path}"
+            st = entry.stat()
+            row = known.get(key)
+            # An in-place edit keeps the directory mtime, so every file is checked
+            if row and row["mtime"] == st.st_mtime and row["offset"] == st.st_size:
+                continue
+            try:
+                with open(entry.path, encoding="utf-8") as f:
+                    order = json.load(f)
+                order.setdefault("order_id", os.path.splitext(entry.name)[0])
+                # An edited legacy file replaces its old row, but never a journaled copy
+                db.execute(
+                    "INSERT INTO orders VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (order_id) DO UPDATE SET seq = excluded.seq, name = excluded.name, "
+                    "name_lc = excluded.name_lc, drink = excluded.drink, size = excluded.size, "
+                    "timestamp = excluded.timestamp, file_key = excluded.file_key, offset = excluded.offset "
+                    "WHERE orders.file_key LIKE 'path:%'",
+                    self._row(order, key, None),
+                )
+                if row:
+                    updated.append(order["order_id"])
+            except (ValueError, KeyError, TypeError, OSError) as e:
+                logger.warning(f"Skipping unreadable order file {entry.path}: {e}")
+            # A legacy file is read whole, so its indexed offset is its size
+            db.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", (key, entry.path, st.st_mtime, st.st_size)
+            )
+            added += 1
+        return added
+
+    @staticmethod
+    def _row(order: dict, file_key: str, offset: Optional[int]) -> tuple:
+        name = str(order.get("name") or "")
+        return (
+            order["order_id"],
+            order.get("seq"),
+            name,
+            name.strip().lower(),
+            str(order.get("drinkType") or "").lower(),
+            str(order.get("size") or "").lower(),
+            str(order.get("timestamp") or ""),
+            file_key,
+            offset,
+        )
+
+    # ---- queries ----
+
+    def _total(self, db: sqlite3.Connection, where: str, params: list) -> int:
+        key = (where, tuple(params), self._changes)
+        total = self._totals.get(key)
+        if total is None:
+            total = db.execute(f"SELECT COUNT(*) FROM orders {where}", params).fetchone()[0]
+            if len(self._totals) >= MAX_CACHED_TOTALS:
+                self._totals.clear()
+            self._totals[key] = total
+        return total
+
+    def page(
+        self,
+        page_size: int = 20,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+        page: int = 1,
+        **filters: Optional[str],
+    ) -> dict[str, Any]:
+        """One page of orders, newest first, optionally filtered by name, drink or size.
+
+        `after` continues with older orders from a page's `next` cursor, `before`
+        goes back to newer ones from its `prev` cursor. `page` is only carried
+        through for display.
+        """
+        self.refresh()
+        clauses, params = [], []
+        for field, value in filters.items():
+            if value and field in FILTERS:
+                clauses.append(FILTERS[field])
+                params.append(value.strip().lower())
+        db = self._db()
+        total = self._total(db, f"WHERE {' AND '.join(clauses)}" if clauses else "", params)
+
+        seek, seek_params, order = list(clauses), list(params), "DESC"
+        if after:
+            seek.append("(timestamp, order_id) < (?, ?)")
+            seek_params.extend(parse_cursor(after))
+        elif before:
+            # Walk towards newer orders, then flip the rows back to newest first
+            seek.append("(timestamp, order_id) > (?, ?)")
+            seek_params.extend(parse_cursor(before))
+            order = "ASC"
+        where = f"WHERE {' AND '.join(seek)}" if seek else ""
+        rows = [dict(row) for row in db.execute(
+            f"SELECT order_id, seq, name, drink, size, timestamp FROM orders {where} "
+            f"ORDER BY timestamp {order}, order_id {order} LIMIT ?",
+            (*seek_params, page_size + 1),
+        )]
+        more = len(rows) > page_size
+        rows = rows[:page_size]
+        if before:
+            rows.reverse()
+            has_newer, has_older = more, True
+        else:
+            has_newer, has_older = bool(after), more
+        if not has_newer:
+            page = 1
+        return {
+            "page": max(1, page),
+            "page_size": page_size,
+            "total": total,
+            "pages": max(1, -(-total // page_size)),
+            "orders": rows,
+            "next": make_cursor(rows[-1]) if has_older and rows else None,
+            "prev": make_cursor(rows[0]) if has_newer and rows else None,
+        }
+
+    def load(self, order_id: str, _retry: bool = True) -> Optional[dict]:
+        """The full order, read from wherever the index says it lives."""
+        row = self._db().execute(
+            "SELECT o.offset, f.path FROM orders o JOIN files f USING (file_key) WHERE o.order_id = ?",
+            (order_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            with open(row["path"], "rb") as f:
+                if row["offset"] is None:
+                    return json.load(f)
+                f.seek(row["offset"])
+                return json.loads(f.readline())
+        except FileNotFoundError:
+            if not _retry:
+                return None
+            # The journal file was sealed under a new name since the last refresh
+            self.refresh(force=True)
+            return self.load(order_id, _retry=False)
+
+    def __len__(self) -> int:
+        return self._db().execute("SELECT COUNT(*) FROM orders").fetchone()[0]
@@ -0,0 +1,334 @@
+"""Append-only order journal for the coffee shop.
+
+Orders are appended as JSON lines to `orders/journal/active.jsonl` instead of
+one file per order. Appends from concurrent tool calls are grouped: the first
+one waits a few milliseconds, then the whole group is written with a single
+write + fsync, and every caller gets its order back only once it is on disk.
+
+Each order gets a sequence number that only ever grows, even across job
+processes (allocation happens under an exclusive file lock), and the order
+ID is built from it, so two orders in the same second no longer collide.
+When the active file holds `SEGMENT_MAX_ORDERS` orders it is sealed into a
+numbered segment file and a fresh one is started.
+
+The journal keeps an in-memory index of where every order lives and of the
+orders per customer name; the full records stay on disk.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+from collections import defaultdict
+from collections.abc import Iterator
+from datetime import datetime
+from typing import Any, Optional
+
+from persistence import run_blocking
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, a single worker process is assumed
+    fcntl = None
+
+logger = logging.getLogger("order_journal")
+
+JOURNAL_DIR = os.getenv("ORDER_JOURNAL_DIR", os.path.join("orders", "journal"))
+SEGMENT_MAX_ORDERS = int(os.getenv("ORDER_JOURNAL_SEGMENT_ORDERS", "10000"))
+# How long the first append waits for others to join its write + fsync
+BATCH_WINDOW = float(os.getenv("ORDER_JOURNAL_BATCH_MS", "5")) / 1000
+
+ACTIVE_FILE = "active.jsonl"
+SEGMENT_RE = re.compile(r"^segment_(\d{6})\.jsonl$")
+
+
+def make_order_id(seq: int, when: Optional[datetime] = None) -> str:
+    return f"order_{(when or datetime.now()).strftime('%Y%m%d_%H%M%S')}_{seq:06d}"
+
+
+def iter_journal_orders(directory: str = JOURNAL_DIR) -> Iterator[dict]:
+    """Stream the orders in a journal directory without building an index."""
+    directory = os.path.abspath(directory)
+    if not os.path.isdir(directory):
+        return
+    names = sorted(name for name in os.listdir(directory) if SEGMENT_RE.match(name))
+    for name in [*names, ACTIVE_FILE]:
+        try:
+            with open(os.path.join(directory, name), "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n") or not line.strip():
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            continue
+
+
+class OrderJournal:
+    def __init__(self, directory: str = JOURNAL_DIR, segment_max_orders: int = SEGMENT_MAX_ORDERS) -> None:
+        self.directory = os.path.abspath(directory)
+        self.segment_max_orders = segment_max_orders
+        os.makedirs(self.directory, exist_ok=True)
+        self.active_path = os.path.join(self.directory, ACTIVE_FILE)
+
+        # order_id -> (inode, byte offset); inodes survive the rename when a segment is sealed
+        self._locations: dict[str, tuple[int, int]] = {}
+        self._by_name: defaultdict[str, list[str]] = defaultdict(list)
+        self._paths: dict[int, str] = {}
+        self._read_offsets: dict[int, int] = {}
+        self._counts: defaultdict[int, int] = defaultdict(int)
+        self.last_seq = 0
+
+        self._lock = threading.Lock()
+        self._lock_fd = os.open(os.path.join(self.directory, "journal.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        self._pending: list[tuple[dict, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+        with self._locked():
+            self._catch_up()
+        logger.info(f"Order journal at {self.directory}: {len(self._locations)} orders, last seq {self.last_seq}")
+
+    # ---- locking and indexing ----
+
+    def _locked(self) -> "_JournalLock":
+        return _JournalLock(self)
+
+    def _segment_paths(self) -> list[str]:
+        names = sorted(name for name in os.listdir(self.directory) if SEGMENT_RE.match(name))
+        return [os.path.join(self.directory, name) for name in names]
+
+    def _index_file(self, path: str) -> None:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return
+        self._paths[st.st_ino] = path
+        offset = self._read_offsets.get(st.st_ino, 0)
+        if offset >= st.st_size:
+            return
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Torn tail from a crashed writer; the next append starts a new line
+                    break
+                if line.strip():
+                    try:
+                        self._index_record(json.loads(line), st.st_ino, offset)
+                    except (ValueError, KeyError, TypeError):
+                        logger.warning(f"Skipping unreadable journal line at {path}:{offset}")
+                offset += len(line)
+        self._read_offsets[st.st_ino] = offset
+
+    def _index_record(self, record: dict, inode: int, offset: int) -> None:
+        order_id = record["order_id"]
+        if order_id not in self._locations:
+            self._by_name[str(record.get("name") or "").strip().lower()].append(order_id)
+            self._counts[inode] += 1
+        self._locations[order_id] = (inode, offset)
+        self.last_seq = max(self.last_seq, record.get("seq", 0))
+
+    def _catch_up(self) -> None:
+        """Index whatever other processes appended or sealed since we last looked."""
+        for path in self._segment_paths():
+            self._index_file(path)
+        if not os.path.exists(self.active_path):
+            open(self.active_path, "ab").close()
+        self._index_file(self.active_path)
+
+    def _seal_active(self) -> None:
+        segments = self._segment_paths()
+        last = int(SEGMENT_RE.match(os.path.basename(segments[-1])).group(1)) if segments else 0
+        segment_path = os.path.join(self.directory, f"segment_{last + 1:06d}.jsonl")
+        os.replace(self.active_path, segment_path)
+        open(self.active_path, "ab").close()
+        self._catch_up()
+        logger.info(f"Sealed order journal segment {os.path.basename(segment_path)}")
+
+    # ---- writing ----
+
+    def _write_batch(self, orders: list[dict]) -> list[dict]:
+        with self._locked():
+            self._catch_up()
+            now = datetime.now()
+            records, fresh = [], {}
+            for order in orders:
+                order_id = order.get("order_id")
+                if order_id in self._locations:
+                    # Already journaled (re-imported legacy file); hand back the stored copy
+                    records.append(self._read_at(*self._locations[order_id]))
+                    continue
+                if order_id in fresh:
+                    records.append(fresh[order_id])
+                    continue
+                self.last_seq += 1
+                record = dict(order, seq=self.last_seq)
+                record.setdefault("order_id", make_order_id(self.last_seq, now))
+                fresh[record["order_id"]] = record
+                records.append(record)
+            pending = list(fresh.values())
+            while pending:
+                # Fill the active file up to the segment size, seal it, carry on in a fresh one
+                room = max(1, self.segment_max_orders - self._counts[os.stat(self.active_path).st_ino])
+                chunk, pending = pending[:room], pending[room:]
+                self._append_lines(chunk)
+                if self._counts[os.stat(self.active_path).st_ino] >= self.segment_max_orders:
+                    self._seal_active()
+            return records
+
+    def _append_lines(self, records: list[dict]) -> None:
+        data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8")
+        st = os.stat(self.active_path)
+        if st.st_size > self._read_offsets.get(st.st_ino, 0):
+            # Terminate a torn line left by a crashed writer so ours parse
+            data = b"\n" + data
+        fd = os.open(self.active_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        self._index_file(self.active_path)
+
+    def append_sync(self, order: dict) -> dict:
+        """Append one order and fsync it; for scripts running without an event loop."""
+        return self._write_batch([order])[0]
+
+    async def append(self, order: dict) -> dict:
+        """Durably append `order`, returning the stored record with its `seq` and `order_id`."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((order, future))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_pending())
+        return await future
+
+    async def _flush_pending(self) -> None:
+        await asyncio.sleep(BATCH_WINDOW)
+        while self._pending:
+            batch, self._pending = self._pending, []
+            try:
+                records = await run_blocking(self._write_batch, [order for order, _ in batch])
+            except Exception as e:
+                logger.error(f"Order journal write failed for {len(batch)} orders: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), record in zip(batch, records):
+                if not future.done():
+                    future.set_result(record)
+
+    # ---- reading ----
+
+    def refresh(self) -> None:
+        with self._locked():
+            self._catch_up()
+
+    def _read_at(self, inode: int, offset: int) -> dict:
+        with open(self._paths[inode], "rb") as f:
+            if os.fstat(f.fileno()).st_ino != inode:
+                # The path now names another file (active.jsonl after a seal)
+                raise FileNotFoundError(self._paths[inode])
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def get(self, order_id: str) -> Optional[dict]:
+        location = self._locations.get(order_id)
+        if location is None:
+            return None
+        try:
+            return self._read_at(*location)
+        except FileNotFoundError:
+            # Sealed by another process since we last looked; the segment keeps the inode
+            with self._locked():
+                self._catch_up()
+                try:
+                    return self._read_at(*self._locations[order_id])
+                except FileNotFoundError:
+                    return None
+
+    def find_by_name(self, name: str) -> list[dict]:
+        ids = self._by_name.get(name.strip().lower(), [])
+        return [order for order in map(self.get, ids) if order is not None]
+
+    def iter_orders(self) -> Iterator[dict]:
+        """Stream every order in append order, one line in memory at a time."""
+        return iter_journal_orders(self.directory)
+
+    def order_ids(self) -> list[str]:
+        """Every known order ID, oldest first."""
+        return list(self._locations)
+
+    def __contains__(self, order_id: str) -> bool:
+        return order_id in self._locations
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    # ---- migration ----
+
+    def import_legacy_orders(self, orders_dir: str, remove: bool = False) -> int:
+        """Fold the old one-file-per-order JSON files into the journal."""
+        if not os.path.isdir(orders_dir):
+            return 0
+        paths = sorted(
+            os.path.join(orders_dir, name) for name in os.listdir(orders_dir) if name.endswith(".json")
+        )
+        orders = []
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                order = json.load(f)
+            order.setdefault("order_id", os.path.splitext(os.path.basename(path))[0])
+            orders.append(order)
+        for start in range(0, len(orders), 500):
+            self._write_batch(orders[start:start + 500])
+        if remove:
+            for path in paths:
+                os.unlink(path)
+        return len(orders)
+
+
+class _JournalLock:
+    """Thread lock plus, where available, an exclusive flock shared with other processes."""
+
+    def __init__(self, journal: OrderJournal) -> None:
+        self.journal = journal
+
+    def __enter__(self) -> None:
+        self.journal._lock.acquire()
+        if fcntl is not None:
+            fcntl.flock(self.journal._lock_fd, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc: Any) -> None:
+        if fcntl is not None:
+            fcntl.flock(self.journal._lock_fd, fcntl.LOCK_UN)
+        self.journal._lock.release()
+
+
+_journals: dict[str, OrderJournal] = {}
+_journals_lock = threading.Lock()
+
+
+def get_journal(directory: str = JOURNAL_DIR) -> OrderJournal:
+    """Process-wide journal for `directory` (resolved against the current directory)."""
+    path = os.path.abspath(directory)
+    with _journals_lock:
+        if path not in _journals:
+            _journals[path] = OrderJournal(path)
+        return _journals[path]
+
+
+if __name__ == "__main__":
+    import sys
+
+    journal = get_journal()
+    if len(sys.argv) > 1 and sys.argv[1] == "import-legacy":
+        count = journal.import_legacy_orders("orders", remove="--remove" in sys.argv)
+        print(f"Imported {count} legacy order files into {journal.directory}")
+    print(f"{len(journal)} orders in journal, last seq {journal.last_seq}")
@@ -0,0 +1,96 @@
+import os
+
+from beverage_visualizer import (
+    CompiledTemplate,
+    ReceiptCache,
+    generate_beverage_html,
+    render_archive,
+)
+
+
+def _order(order_id: str, **fields) -> dict:
+    order = {
+        "order_id": order_id,
+        "name": "Alice",
+        "drinkType": "latte",
+        "size": "small",
+        "milk": "oat",
+        "extras": [],
+        "timestamp": "2025-01-01T10:00:00.123456",
+    }
+    order.update(fields)
+    return order
+
+
+def test_compiled_template_fills_constants_once_and_fields_per_render() -> None:
+    template = CompiledTemplate("<${tag}>${a} and ${b}, ${a} again</${tag}>", tag="p")
+    assert template.render({"a": "x", "b": "y"}) == "<p>x and y, x again</p>"
+    # The precompiled parts are not changed by a render
+    assert template.render({"a": "1", "b": "2"}) == "<p>1 and 2, 1 again</p>"
+
+
+def test_receipt_escapes_fields_and_shows_extras() -> None:
+    receipt = generate_beverage_html(_order(
+        "order_1", name="<Bob>", drinkType="mocha", size="large", extras=["whipped cream"]
+    ))
+    assert "Order for &lt;Bob&gt;" in receipt
+    assert "<Bob>" not in receipt
+    assert "Mocha" in receipt and "--cup-width: 120px" in receipt
+    assert "whipped-cream'></div>" in receipt
+    assert "whipped cream</div>" in receipt
+    assert "2025-01-01 10:00:00\n" in receipt
+    assert "${" not in receipt
+
+
+def test_receipt_without_extras_has_no_extras_row() -> None:
+    receipt = generate_beverage_html(_order("order_1"))
+    assert "Extras:" not in receipt
+    assert "<div class='whipped-cream'>" not in receipt
+
+
+def test_receipt_cache_renders_once_and_evicts_least_recently_used() -> None:
+    loads = []
+
+    def load(order_id):
+        loads.append(order_id)
+        return _order(order_id) if order_id != "missing" else None
+
+    cache = ReceiptCache(load, maxsize=2)
+    first = cache.get("a")
+    assert "Order ID:</span> a" in first
+    cache.get("b")
+    assert cache.get("a") is first  # a is now the most recently used
+    cache.get("c")  # evicts b
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (1, 3)
+
+    cache.get("a")
+    cache.get("b")
+    assert loads == ["a", "b", "c", "b"]
+    assert cache.get("missing") is None
+    assert len(cache) == 2
+
+
+def test_receipt_cache_invalidate_renders_the_order_again() -> None:
+    orders = {"a": _order("a", size="small"), "b": _order("b")}
+    cache = ReceiptCache(orders.get)
+    cache.get("a")
+    cache.get("b")
+
+    orders["a"] = _order("a", size="large")
+    assert "Small" in cache.get("a")
+    cache.invalidate("a")
+    assert "Large" in cache.get("a")
+    assert len(cache) == 2
+
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def test_render_archive_writes_one_receipt_per_order(tmp_path) -> None:
+    out_dir = os.path.join(str(tmp_path), "receipts")
+    written = render_archive((_order(f"order_{i}", name=f"Customer {i}") for i in range(3)), out_dir)
+    assert written == 3
+    assert sorted(os.listdir(out_dir)) == ["order_0.html", "order_1.html", "order_2.html"]
+    with open(os.path.join(out_dir, "order_2.html"), encoding="utf-8") as f:
+        assert "Order for Customer 2" in f.read()
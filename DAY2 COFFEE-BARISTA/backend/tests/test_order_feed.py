@@ -0,0 +1,59 @@
+import os
+import socket
+import time
+
+from order_feed import WAKE_DIR, JournalTailer, OrderFeed, notify_tailers
+from order_journal import OrderJournal
+
+
+def test_notified_tailer_publishes_without_waiting_for_a_poll(tmp_path) -> None:
+    journal = OrderJournal(str(tmp_path))
+    feed = OrderFeed()
+    # Long enough that only a wake-up can deliver the order in time
+    tailer = JournalTailer(feed, journal.directory, interval=30)
+    tailer.start()
+    try:
+        subscription = feed.subscribe()
+        record = journal.append_sync({"name": "Alice", "drinkType": "latte"})
+        started = time.monotonic()
+        assert notify_tailers(journal.directory) == 1
+        assert subscription.get(timeout=5) == (record["seq"], record)
+        assert time.monotonic() - started < 1
+    finally:
+        tailer.stop()
+    assert os.listdir(os.path.join(journal.directory, WAKE_DIR)) == []
+
+
+def test_stale_tailer_sockets_are_removed(tmp_path) -> None:
+    journal = OrderJournal(str(tmp_path))
+    # A socket left behind by a tailer that exited without cleaning up
+    directory = os.path.join(journal.directory, WAKE_DIR)
+    os.makedirs(directory)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+        sock.bind(os.path.join(directory, "stale.sock"))
+
+    assert notify_tailers(journal.directory) == 0
+    assert os.listdir(directory) == []
+
+
+def test_stop_does_not_wait_for_the_poll_interval(tmp_path) -> None:
+    tailer = JournalTailer(OrderFeed(), str(tmp_path), interval=30)
+    tailer.start()
+    started = time.monotonic()
+    tailer.stop()
+    assert time.monotonic() - started < 1
+    assert not tailer._thread.is_alive()
+
+
+def test_subscriber_resumes_from_offset(tmp_path) -> None:
+    journal = OrderJournal(str(tmp_path))
+    records = [journal.append_sync({"name": "Bob", "n": i}) for i in range(5)]
+    feed = OrderFeed()
+    tailer = JournalTailer(feed, journal.directory, interval=30)
+    tailer.start()
+    try:
+        subscription = feed.subscribe(from_offset=records[2]["seq"])
+        assert [subscription.get(timeout=1)[1] for _ in range(2)] == records[3:]
+        assert not subscription.missed
+    finally:
+        tailer.stop()
@@ -0,0 +1,113 @@
+import json
+import os
+
+from order_index import OrderIndex
+from order_journal import OrderJournal
+
+
+def _journal_orders(orders_dir: str, count: int) -> list[dict]:
+    journal = OrderJournal(os.path.join(orders_dir, "journal"), segment_max_orders=7)
+    return [
+        journal.append_sync({
+            "name": "Alice" if i % 3 else "Bob",
+            "drinkType": "latte" if i % 2 else "mocha",
+            "size": "small",
+            # Several orders share a timestamp, so the order ID breaks ties
+            "timestamp": f"2025-01-01T10:{i // 4:02d}:00",
+        })
+        for i in range(count)
+    ]
+
+
+def _newest_first(orders: list[dict]) -> list[str]:
+    return [o["order_id"] for o in sorted(orders, key=lambda o: (o["timestamp"], o["order_id"]), reverse=True)]
+
+
+def _walk(index: OrderIndex, page_size: int, **filters) -> tuple[list[str], list[dict]]:
+    seen, pages = [], []
+    result = index.page(page_size, **filters)
+    while True:
+        pages.append(result)
+        seen += [o["order_id"] for o in result["orders"]]
+        if not result["next"]:
+            return seen, pages
+        result = index.page(page_size, after=result["next"], page=result["page"] + 1, **filters)
+
+
+def test_cursor_pages_cover_every_order_once(tmp_path) -> None:
+    orders = _journal_orders(str(tmp_path), 47)
+    index = OrderIndex(str(tmp_path))
+
+    seen, pages = _walk(index, 10)
+    assert seen == _newest_first(orders)
+    assert [p["page"] for p in pages] == [1, 2, 3, 4, 5]
+    assert all(p["total"] == 47 and p["pages"] == 5 for p in pages)
+    assert pages[0]["prev"] is None
+
+    # And back again from the last page
+    result, back = pages[-1], []
+    while result["prev"]:
+        result = index.page(10, before=result["prev"], page=result["page"] - 1)
+        back.append([o["order_id"] for o in result["orders"]])
+    assert back == [[o["order_id"] for o in p["orders"]] for p in reversed(pages[:-1])]
+    assert result["page"] == 1
+
+
+def test_filtered_pages(tmp_path) -> None:
+    orders = _journal_orders(str(tmp_path), 30)
+    index = OrderIndex(str(tmp_path))
+
+    seen, pages = _walk(index, 4, name="bob", drink="latte")
+    expected = [o for o in orders if o["name"] == "Bob" and o["drinkType"] == "latte"]
+    assert seen == _newest_first(expected)
+    assert pages[0]["total"] == len(expected)
+
+
+def test_total_follows_new_orders(tmp_path) -> None:
+    _journal_orders(str(tmp_path), 5)
+    index = OrderIndex(str(tmp_path))
+    assert index.page(10)["total"] == 5
+
+    OrderJournal(os.path.join(str(tmp_path), "journal")).append_sync(
+        {"name": "Carol", "drinkType": "latte", "size": "large", "timestamp": "2025-01-02T09:00:00"}
+    )
+    index.refresh(force=True)
+    result = index.page(10)
+    assert result["total"] == 6
+    assert result["orders"][0]["name"] == "Carol"
+
+
+def test_edited_legacy_file_is_reindexed(tmp_path) -> None:
+    path = os.path.join(str(tmp_path), "order_20250101_100000.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"name": "Dan", "drinkType": "latte", "size": "small", "timestamp": "2025-01-01T10:00:00"}, f)
+    index = OrderIndex(str(tmp_path))
+    updated = []
+    index.on_update = updated.append
+    assert index.page(10)["orders"][0]["size"] == "small"
+    assert index.page(10, size="small")["total"] == 1
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"name": "Dan", "drinkType": "latte", "size": "large", "timestamp": "2025-01-01T10:00:00"}, f)
+    os.utime(path, (os.stat(path).st_atime, os.stat(path).st_mtime + 5))
+    index.refresh(force=True)
+    assert index.page(10)["orders"][0]["size"] == "large"
+    assert index.load("order_20250101_100000")["size"] == "large"
+    # The edit replaced a row without adding one; the cached filtered totals follow it
+    assert index.page(10, size="small")["total"] == 0
+    assert index.page(10, size="large")["total"] == 1
+    assert updated == ["order_20250101_100000"]
+
+
+def test_journal_copy_wins_over_legacy_file(tmp_path) -> None:
+    journal = OrderJournal(os.path.join(str(tmp_path), "journal"))
+    journal.append_sync({"order_id": "order_legacy", "name": "Eve", "drinkType": "mocha",
+                         "size": "medium", "timestamp": "2025-01-01T10:00:00"})
+    index = OrderIndex(str(tmp_path))
+    index.refresh(force=True)
+
+    path = os.path.join(str(tmp_path), "order_legacy.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"name": "Eve", "drinkType": "mocha", "size": "tiny", "timestamp": "2025-01-01T10:00:00"}, f)
+    index.refresh(force=True)
+    assert index.load("order_legacy")["size"] == "medium"
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+from order_journal import ACTIVE_FILE, SEGMENT_RE, OrderJournal
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def _order(name: str, i: int) -> dict:
+    return {"name": name, "drink": "latte", "size": "medium", "milk": "oat", "extras": [], "n": i}
+
+
+def _file_sizes(directory: str) -> dict[str, int]:
+    sizes = {}
+    for name in sorted(os.listdir(directory)):
+        if SEGMENT_RE.match(name) or name == ACTIVE_FILE:
+            with open(os.path.join(directory, name), "rb") as f:
+                sizes[name] = sum(1 for line in f if line.strip())
+    return sizes
+
+
+def test_large_batch_is_split_across_segments(tmp_path) -> None:
+    journal = OrderJournal(str(tmp_path), segment_max_orders=50)
+    records = journal._write_batch([_order("Alice", i) for i in range(230)])
+
+    sizes = _file_sizes(journal.directory)
+    assert sum(sizes.values()) == 230
+    assert all(count <= 50 for count in sizes.values())
+    assert [r["seq"] for r in records] == list(range(1, 231))
+    assert all(journal.get(r["order_id"])["n"] == r["n"] for r in records)
+
+
+def test_get_finds_orders_sealed_by_another_process(tmp_path) -> None:
+    reader = OrderJournal(str(tmp_path), segment_max_orders=5)
+    first = [reader.append_sync(_order("Bob", i)) for i in range(3)]
+
+    # A second journal on the same directory stands in for another worker
+    writer = OrderJournal(str(tmp_path), segment_max_orders=5)
+    for i in range(3, 10):
+        writer.append_sync(_order("Carol", i))
+
+    # reader still maps its orders to active.jsonl, which is now a different file
+    for record in first:
+        assert reader.get(record["order_id"]) == record
+    assert [o["n"] for o in reader.find_by_name("bob")] == [0, 1, 2]
+
+
+def test_null_name_is_indexed(tmp_path) -> None:
+    journal = OrderJournal(str(tmp_path))
+    record = journal.append_sync({"name": None, "drink": "mocha"})
+
+    reopened = OrderJournal(str(tmp_path))
+    assert record["order_id"] in reopened
+    assert reopened.find_by_name("") == [record]
+
+
+async def test_concurrent_appends_share_writes(tmp_path) -> None:
+    journal = OrderJournal(str(tmp_path), segment_max_orders=8)
+    records = await asyncio.gather(*(journal.append(_order("Dan", i)) for i in range(40)))
+
+    assert sorted(r["seq"] for r in records) == list(range(1, 41))
+    assert len({r["order_id"] for r in records}) == 40
+    assert all(count <= 8 for count in _file_sizes(journal.directory).values())
+
+
+def test_sequence_numbers_are_unique_across_processes(tmp_path) -> None:
+    script = textwrap.dedent(f"""
+        import sys
+        sys.path.insert(0, {SRC_DIR!r})
+        from order_journal import OrderJournal
+        journal = OrderJournal({str(tmp_path)!r}, segment_max_orders=7)
+        for i in range(30):
+            journal.append_sync({{"name": sys.argv[1], "n": i}})
+    """)
+    workers = [
+        subprocess.Popen([sys.executable, "-c", script, f"worker{n}"]) for n in range(4)
+    ]
+    assert all(worker.wait(timeout=60) == 0 for worker in workers)
+
+    journal = OrderJournal(str(tmp_path), segment_max_orders=7)
+    assert len(journal) == 120
+    orders = list(journal.iter_orders())
+    assert sorted(o["seq"] for o in orders) == list(range(1, 121))
+    assert all(count <= 7 for count in _file_sizes(journal.directory).values())
+    for order in orders:
+        assert journal.get(order["order_id"]) == order
+    for n in range(4):
+        assert [o["n"] for o in journal.find_by_name(f"worker{n}")] == list(range(30))
+
+
+def test_torn_last_line_is_skipped_and_terminated(tmp_path) -> None:
+    journal = OrderJournal(str(tmp_path))
+    journal.append_sync(_order("Eve", 0))
+    with open(journal.active_path, "ab") as f:
+        f.write(b'{"order_id": "torn", "na')
+
+    reopened = OrderJournal(str(tmp_path))
+    record = reopened.append_sync(_order("Eve", 1))
+    assert "torn" not in reopened
+    assert reopened.get(record["order_id"]) == record
+    with open(reopened.active_path, encoding="utf-8") as f:
+        lines = [line for line in f.read().splitlines() if line.startswith("{\"name\"")]
+    assert [json.loads(line)["n"] for line in lines] == [0, 1]
@@ -0,0 +1,45 @@
+import http.server
+import json
+import os
+import threading
+import urllib.request
+
+from beverage_visualizer import ReceiptCache
+from order_feed import JournalTailer, OrderFeed
+from order_index import OrderIndex
+from order_journal import OrderJournal
+from serve_orders import OrderBrowserHandler
+
+
+def test_empty_archive_serves_a_page_and_streams_new_orders(tmp_path) -> None:
+    orders_dir = os.path.join(str(tmp_path), "orders")
+    index = OrderIndex(orders_dir)
+    assert len(index) == 0
+
+    class Handler(OrderBrowserHandler):
+        pass
+
+    Handler.index = index
+    Handler.receipts = ReceiptCache(index.load)
+    Handler.feed = OrderFeed()
+    tailer = JournalTailer(Handler.feed, index.journal_dir)
+    tailer.start()
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with urllib.request.urlopen(f"{base}/api/orders", timeout=5) as response:
+            assert json.load(response)["total"] == 0
+        with urllib.request.urlopen(f"{base}/", timeout=5) as response:
+            assert "0 orders" in response.read().decode("utf-8")
+
+        with urllib.request.urlopen(f"{base}/api/orders/stream", timeout=5) as stream:
+            journal = OrderJournal(index.journal_dir)
+            record = journal.append_sync({"name": "Alice", "drinkType": "latte"})
+            lines = [stream.readline() for _ in range(3)]
+        assert lines[1] == b"event: order\n"
+        assert json.loads(lines[2][len(b"data: "):])["order_id"] == record["order_id"]
+    finally:
+        server.shutdown()
+        server.server_close()
+        tailer.stop()
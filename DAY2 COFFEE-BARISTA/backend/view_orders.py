@@ -4,102 +4,131 @@ Coffee Shop Order Viewer
 View and manage saved coffee orders
 """
 
-import json
 import os
+import sys
 import webbrowser
-from datetime import datetime
 
-def list_orders():
-    """List all saved orders."""
-    orders_dir = "orders"
-    if not os.path.exists(orders_dir):
-        print("No orders directory found!")
-        return []
-    
-    json_files = [f for f in os.listdir(orders_dir) if f.endswith('.json')]
-    
-    if not json_files:
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from beverage_visualizer import render_archive
+from order_index import OrderIndex
+
+PAGE_SIZE = 10
+
+def list_orders(index, page=1, name=None, after=None, before=None):
+    """List one page of saved orders, newest first."""
+    result = index.page(PAGE_SIZE, after=after, before=before, page=page, name=name)
+
+    if not result['total']:
         print("No orders found!")
-        return []
-    
-    orders = []
-    print("\n📋 Coffee Orders:")
+        return result
+
+    print(f"\n📋 Coffee Orders (page {result['page']} of {result['pages']}, {result['total']} total):")
     print("-" * 50)
-    
-    for i, filename in enumerate(sorted(json_files), 1):
-        filepath = os.path.join(orders_dir, filename)
-        with open(filepath, 'r') as f:
-            order = json.load(f)
-        
-        orders.append((filepath, order))
-        
-        timestamp = order.get('timestamp', 'Unknown')
+
+    for i, order in enumerate(result['orders'], 1):
+        timestamp = order.get('timestamp') or 'Unknown'
         if 'T' in timestamp:
             timestamp = timestamp[:19].replace('T', ' ')
-        
-        print(f"{i}. {order['name']} - {order['drinkType'].title()} ({order['size']})")
+
+        print(f"{i}. {order['name']} - {order['drink'].title()} ({order['size']})")
         print(f"   Order ID: {order['order_id']}")
         print(f"   Time: {timestamp}")
         print()
-    
-    return orders
 
-def view_order_details(order_data):
+    return result
+
+def view_order_details(index, order_id):
     """Display detailed order information."""
-    filepath, order = order_data
-    
+    order = index.load(order_id)
+    if order is None:
+        print("Order not found!")
+        return
+
     print(f"\n☕ Order Details:")
     print("=" * 40)
     print(f"Customer: {order['name']}")
     print(f"Drink: {order['drinkType'].title()}")
     print(f"Size: {order['size'].title()}")
     print(f"Milk: {order['milk'].title()}")
-    
+
     if order['extras']:
         print(f"Extras: {', '.join(order['extras'])}")
-    
+
     print(f"Order ID: {order['order_id']}")
     print(f"Timestamp: {order.get('timestamp', 'Unknown')}")
-    
-    # Check if HTML visualization exists
-    html_file = filepath.replace('.json', '.html')
-    if os.path.exists(html_file):
-        print(f"\n🎨 Visual receipt available: {html_file}")
-        choice = input("Open visual receipt in browser? (y/n): ").lower()
-        if choice == 'y':
-            webbrowser.open(f"file://{os.path.abspath(html_file)}")
+
+    # Receipts are rendered on demand into orders/receipts/
+    html_file = os.path.join(index.orders_dir, "receipts", f"{order['order_id']}.html")
+    print(f"\n🎨 Visual receipt available for {order['order_id']}")
+    choice = input("Open visual receipt in browser? (y/n): ").lower()
+    if choice == 'y':
+        if not os.path.exists(html_file):
+            render_archive([order], os.path.dirname(html_file))
+        webbrowser.open(f"file://{os.path.abspath(html_file)}")
 
 def main():
     """Main menu for order management."""
+    if not os.path.exists("orders"):
+        print("No orders directory found!")
+        return
+
+    index = OrderIndex("orders")
+    page, name, result = 1, None, None
+
     while True:
         print("\n☕ Brew & Bean Coffee - Order Management")
-        print("1. List all orders")
-        print("2. View order details")
-        print("3. Exit")
-        
-        choice = input("\nSelect option (1-3): ").strip()
-        
+        print("1. List orders")
+        print("2. Next page")
+        print("3. Previous page")
+        print("4. Search by customer name")
+        print("5. View order details")
+        print("6. Exit")
+
+        choice = input("\nSelect option (1-6): ").strip()
+
         if choice == '1':
-            orders = list_orders()
-        
-        elif choice == '2':
-            orders = list_orders()
-            if orders:
+            page, name = 1, None
+            result = list_orders(index, page)
+
+        elif choice in ('2', '3'):
+            if result is None:
+                result = list_orders(index, page, name)
+            # Pages continue from the cursor of the page on screen
+            cursor = result['next'] if choice == '2' else result['prev']
+            if cursor is None:
+                print("No more orders that way.")
+                continue
+            if choice == '2':
+                result = list_orders(index, page + 1, name, after=cursor)
+            else:
+                result = list_orders(index, page - 1, name, before=cursor)
+            page = result['page']
+
+        elif choice == '4':
+            name = input("Customer name: ").strip() or None
+            page = 1
+            result = list_orders(index, page, name)
+
+        elif choice == '5':
+            if result is None:
+                result = list_orders(index, page, name)
+            if result['orders']:
                 try:
-                    order_num = int(input(f"\nSelect order (1-{len(orders)}): ")) - 1
-                    if 0 <= order_num < len(orders):
-                        view_order_details(orders[order_num])
+                    order_num = int(input(f"\nSelect order (1-{len(result['orders'])}): ")) - 1
+                    if 0 <= order_num < len(result['orders']):
+                        view_order_details(index, result['orders'][order_num]['order_id'])
                     else:
                         print("Invalid order number!")
                 except ValueError:
                     print("Please enter a valid number!")
-        
-        elif choice == '3':
+
+        elif choice == '6':
             print("Thanks for using Brew & Bean Coffee! ☕")
             break
-        
+
         else:
-            print("Invalid choice! Please select 1-3.")
+            print("Invalid choice! Please select 1-6.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,19 @@
+"""Scripted conversation used by the offline benchmarks."""
+
+from fake_plugins import FakeResponse
+
+from agent import Assistant
+
+AGENT_NAME = "assistant"
+
+# (user message, scripted LLM response)
+SCRIPT = [
+    ("Hello", FakeResponse(text="Hi there! How can I help you today?")),
+    ("What can you do?", FakeResponse(text="I can answer questions and chat about almost anything.")),
+    ("Tell me a fun fact", FakeResponse(text="Octopuses have three hearts.")),
+    ("Thanks, bye", FakeResponse(text="You're welcome, have a great day!")),
+]
+
+
+def make_agent() -> Assistant:
+    return Assistant()
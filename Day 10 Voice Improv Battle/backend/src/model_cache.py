@@ -0,0 +1,124 @@
+"""Per-process model cache shared by every job a worker process runs.
+
+`prewarm_models` is meant to be called from the worker's `prewarm_fnc`. It
+loads the VAD, turn detector and noise-cancellation models once, runs a short
+warm-up pass where the model can be exercised outside of a job, and stores the
+instances in `proc.userdata` so each `AgentSession` reuses them instead of
+constructing fresh ones per call.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from livekit import rtc
+from livekit.agents import JobProcess
+from livekit.plugins import noise_cancellation, silero
+from livekit.plugins.turn_detector.multilingual import MultilingualModel
+
+logger = logging.getLogger("model_cache")
+
+MODELS_KEY = "models"
+
+# 100ms of 16kHz mono silence, enough to push one full window through the VAD
+_WARMUP_SAMPLE_RATE = 16000
+_WARMUP_SAMPLES = _WARMUP_SAMPLE_RATE // 10
+
+
+@dataclass
+class PrewarmedModels:
+    """Model instances shared by all sessions in this process."""
+
+    vad: silero.VAD
+    turn_detection: Optional[MultilingualModel]
+    noise_cancellation: Any
+    noise_cancellation_telephony: Any
+    load_times: dict[str, float] = field(default_factory=dict)
+
+
+async def _vad_warmup_pass(vad: silero.VAD) -> None:
+    stream = vad.stream()
+    try:
+        frame = rtc.AudioFrame(
+            data=b"\x00\x00" * _WARMUP_SAMPLES,
+            sample_rate=_WARMUP_SAMPLE_RATE,
+            num_channels=1,
+            samples_per_channel=_WARMUP_SAMPLES,
+        )
+        stream.push_frame(frame)
+        stream.end_input()
+        async for _ in stream:
+            pass
+    finally:
+        await stream.aclose()
+
+
+def _warm_vad(vad: silero.VAD) -> None:
+    """Run one dummy inference so the ONNX session allocates its buffers now."""
+    try:
+        asyncio.run(_vad_warmup_pass(vad))
+    except Exception as e:
+        logger.warning(f"VAD warm-up pass failed, continuing without it: {e}")
+
+
+def _timed(load_times: dict[str, float], name: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    load_times[name] = time.perf_counter() - start
+    return result
+
+
+def _load_turn_detection(load_times: dict[str, float]) -> Optional[MultilingualModel]:
+    # The turn detector's ONNX runner lives in the worker's inference process and
+    # is loaded when the worker starts; the plugin object only binds to that
+    # executor, which some plugin versions look up from the job context. When
+    # that is not available yet, construction is deferred to the first job.
+    try:
+        return _timed(load_times, "turn_detection", MultilingualModel)
+    except RuntimeError as e:
+        logger.info(f"Deferring turn detector until a job is assigned: {e}")
+        return None
+
+
+def prewarm_models(proc: JobProcess) -> PrewarmedModels:
+    """Load and warm every per-process model, then store them on `proc`."""
+    load_times: dict[str, float] = {}
+
+    vad = _timed(load_times, "vad", silero.VAD.load)
+    _timed(load_times, "vad_warmup", lambda: _warm_vad(vad))
+    turn_detection = _load_turn_detection(load_times)
+    nc = _timed(load_times, "noise_cancellation", noise_cancellation.BVC)
+    nc_telephony = _timed(
+        load_times, "noise_cancellation_telephony", noise_cancellation.BVCTelephony
+    )
+
+    models = PrewarmedModels(
+        vad=vad,
+        turn_detection=turn_detection,
+        noise_cancellation=nc,
+        noise_cancellation_telephony=nc_telephony,
+        load_times=load_times,
+    )
+    proc.userdata[MODELS_KEY] = models
+    # Kept for code that still reads the VAD directly
+    proc.userdata["vad"] = vad
+
+    timings = ", ".join(f"{name}={secs * 1000:.1f}ms" for name, secs in load_times.items())
+    logger.info(f"Prewarmed models: {timings}")
+    return models
+
+
+def get_models(proc: JobProcess) -> PrewarmedModels:
+    """Return the cached models, loading them now if prewarm was skipped."""
+    models = proc.userdata.get(MODELS_KEY)
+    if models is None:
+        logger.warning("Models were not prewarmed for this process, loading on demand")
+        models = prewarm_models(proc)
+    if models.turn_detection is None:
+        models.turn_detection = _timed(models.load_times, "turn_detection", MultilingualModel)
+        logger.info(
+            f"Loaded turn detector in {models.load_times['turn_detection'] * 1000:.1f}ms"
+        )
+    return models
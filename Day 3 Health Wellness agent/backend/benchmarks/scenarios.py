@@ -0,0 +1,54 @@
+"""Scripted conversation used by the offline benchmarks."""
+
+import itertools
+import os
+
+from fake_plugins import FakeResponse, ToolCall
+
+import agent
+from agent import CheckInState, Userdata, WellnessAgent, history_version
+
+AGENT_NAME = "wellness"
+
+HISTORY_CONTEXT = "No previous history found. This is the first session."
+
+_user_ids = itertools.count(1)
+
+# (user message, scripted LLM response)
+SCRIPT = [
+    ("Hi", FakeResponse(text="Hi! How are you feeling today, and how is your energy?")),
+    ("I'm a bit stressed and my energy is low", FakeResponse(
+        text="Thanks for sharing. What would you like to get done today?",
+        tool_calls=[ToolCall("record_mood_and_energy", {"mood": "stressed", "energy": "low"})],
+    )),
+    ("Finish my report and go for a walk", FakeResponse(
+        text="Those sound like good goals.",
+        tool_calls=[ToolCall("record_objectives", {"objectives": ["finish report", "go for a walk"]})],
+    )),
+    ("That's all for today", FakeResponse(
+        text="Take care!",
+        tool_calls=[ToolCall("complete_checkin", {
+            "final_advice_summary": "Break the report into small steps and take a short walk.",
+        })],
+    )),
+]
+
+
+def prepare_workdir(path: str) -> None:
+    # Keep benchmark check-ins out of the real wellness logs
+    log_dir = os.path.join(path, agent.WELLNESS_LOG_DIR)
+    agent.get_log_dir = lambda: log_dir
+
+
+def make_userdata() -> Userdata:
+    # Each session is a different participant, so check-ins spread across shards
+    return Userdata(
+        current_checkin=CheckInState(),
+        history_summary=HISTORY_CONTEXT,
+        user_id=f"bench-user-{next(_user_ids)}",
+    )
+
+
+def make_agent() -> WellnessAgent:
+    # Every bench user is new, so they all share the empty-history render
+    return WellnessAgent(history_context=HISTORY_CONTEXT, history_version=history_version("bench-user", None))
@@ -6,11 +6,10 @@
 # ======================================================
 
 import logging
-import json
 import os
 import asyncio
 from datetime import datetime
-from typing import Annotated, Literal, List, Optional
+from typing import Annotated, Hashable, Literal, List, Optional
 from dataclasses import dataclass, field, asdict
 
 print("\n" + "🌿" * 50)
@@ -31,12 +30,20 @@ from livekit.agents import (
     cli,
     metrics,
     MetricsCollectedEvent,
+    FunctionToolsExecutedEvent,
     RunContext,
     function_tool,
 )
 
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+from livekit.plugins import murf, google, deepgram
+from context_budget import ContextBudget
+from model_cache import get_models, prewarm_models
+from latency_metrics import LatencyRecorder
+from loop_monitor import start_blocking_detector
+from persistence import load_json, run_blocking, update_json
+from wellness_store import DEFAULT_IDENTITY, WellnessShards
+from wellness_summary import apply_checkin, build_summary, describe
+from wellness_index import PERIODS, catch_up, empty_index, format_trends, is_current, query, resolve_period
 
 logger = logging.getLogger("agent")
 load_dotenv(".env.local")
@@ -69,36 +76,62 @@ class Userdata:
     """👤 User session data passed to the agent"""
     current_checkin: CheckInState
     history_summary: str  # String containing info about previous sessions
+    user_id: str = DEFAULT_IDENTITY  # Participant identity; selects the history shard
     session_start: datetime = field(default_factory=datetime.now)
 
 # ======================================================
-# 💾 PERSISTENCE LAYERS (JSON LOGGING)
+# 💾 PERSISTENCE LAYERS (JSONL LOGGING)
 # ======================================================
-WELLNESS_LOG_FILE = "wellness_log.json"
+WELLNESS_LOG_DIR = "wellness_logs"
+# Shared logs written by earlier versions; they become the default user's history
+LEGACY_LOG_FILES = ("wellness_log.jsonl", "wellness_log.json")
 
-def get_log_path():
+_shards: dict[str, WellnessShards] = {}
+
+def get_log_dir():
     base_dir = os.path.dirname(__file__)
     backend_dir = os.path.abspath(os.path.join(base_dir, ".."))
-    return os.path.join(backend_dir, WELLNESS_LOG_FILE)
+    return os.path.join(backend_dir, WELLNESS_LOG_DIR)
+
+def get_shards() -> WellnessShards:
+    """📒 Per-user append-only check-in logs (one JSON record per line)"""
+    log_dir = get_log_dir()
+    if log_dir not in _shards:
+        backend_dir = os.path.dirname(log_dir)
+        _shards[log_dir] = WellnessShards(
+            log_dir, legacy_paths=tuple(os.path.join(backend_dir, name) for name in LEGACY_LOG_FILES)
+        )
+    return _shards[log_dir]
 
-def load_history() -> list:
-    """📖 Read previous check-ins from JSON"""
-    path = get_log_path()
-    if not os.path.exists(path):
-        return []
+async def load_user_summary(user_id: str) -> Optional[dict]:
+    """📖 Read the user's rolling summary (one small file, however long their log)"""
+    shards = get_shards()
+    path = shards.summary_path(user_id)
     try:
-        with open(path, "r", encoding='utf-8') as f:
-            data = json.load(f)
-            return data if isinstance(data, list) else []
+        summary = await load_json(path)
+        if summary is None and await run_blocking(os.path.exists, shards.store(user_id).path):
+            # Log from before summaries existed: build it once from the full history
+            summary = await update_json(
+                path, lambda current: current or build_summary(shards.store(user_id)), ensure_ascii=False
+            )
+        return summary
     except Exception as e:
         print(f"⚠️ Could not load history: {e}")
-        return []
+        return None
 
-def save_checkin_entry(entry: CheckInState) -> None:
-    """💾 Append new check-in to the JSON list"""
-    path = get_log_path()
-    history = load_history()
-    
+async def load_trend_index(user_id: str) -> dict:
+    """📈 The user's weekly trend index, caught up with any new check-ins"""
+    shards = get_shards()
+    path = shards.weeks_path(user_id)
+    log_path = shards.store(user_id).path
+    index = await load_json(path)
+    if not await run_blocking(is_current, index, log_path):
+        # Reads only the log lines appended since the index was last saved
+        index = await update_json(path, lambda current: catch_up(current, log_path), ensure_ascii=False)
+    return index or empty_index()
+
+async def save_checkin_entry(entry: CheckInState, user_id: str) -> None:
+    """💾 Append new check-in to the user's wellness log"""
     # Create record
     record = {
         "timestamp": datetime.now().isoformat(),
@@ -108,11 +141,16 @@ def save_checkin_entry(entry: CheckInState) -> None:
         "summary": entry.advice_given
     }
     
-    history.append(record)
-    
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding='utf-8') as f:
-        json.dump(history, f, indent=4, ensure_ascii=False)
+    # One fsync'd append to this user's shard, on the persistence pool
+    shards = get_shards()
+    path = await run_blocking(shards.append, user_id, record)
+
+    # Fold it into their rolling summary (built from the log if it's missing)
+    await update_json(
+        shards.summary_path(user_id),
+        lambda current: apply_checkin(current, record) if current else build_summary(shards.store(user_id)),
+        ensure_ascii=False,
+    )
         
     print(f"\n✅ CHECK-IN SAVED TO {path}")
 
@@ -157,7 +195,7 @@ async def complete_checkin(
         return "I can't finish yet. I still need to know your mood, energy, or at least one goal."
 
     # Save to JSON
-    save_checkin_entry(state)
+    await save_checkin_entry(state, ctx.userdata.user_id)
     
     print("\n" + "⭐" * 60)
     print("🎉 WELLNESS CHECK-IN COMPLETED!")
@@ -176,14 +214,39 @@ async def complete_checkin(
     """
     return recap
 
+@function_tool
+async def query_wellness_trends(
+    ctx: RunContext[Userdata],
+    period: Annotated[
+        Literal[PERIODS],
+        Field(description="Time range to look at, e.g. 'last_month' for 'how was my energy last month'"),
+    ] = "last_30_days",
+    metric: Annotated[
+        Literal["moods", "energy", "objectives", "all"],
+        Field(description="What to summarize: moods, energy levels, goals the user set, or all of them"),
+    ] = "all",
+) -> str:
+    """📈 Look up the user's past check-ins: mood, energy and goal counts per week over a period. Call this when the user asks how they have been doing over time."""
+    try:
+        start, end = resolve_period(period)
+        index = await load_trend_index(ctx.userdata.user_id)
+    except Exception as e:
+        print(f"⚠️ Could not query trends: {e}")
+        return "I couldn't look up your history right now."
+
+    print(f"📈 TRENDS QUERIED: {period} ({metric})")
+    since = "the beginning" if period == "all_time" else start.isoformat()
+    trends = format_trends(query(index, start, end), metric)
+    return f"Period: {period.replace('_', ' ')} ({since} to {end}).\n{trends}"
+
 # ======================================================
 # 🧠 AGENT DEFINITION
 # ======================================================
 
-class WellnessAgent(Agent):
-    def __init__(self, history_context: str):
-        super().__init__(
-            instructions=f"""
+# Keeps the injected history within CONTEXT_BUDGET_TOKENS
+INSTRUCTIONS_BUDGET = ContextBudget("wellness")
+
+WELLNESS_INSTRUCTIONS = """
             You are a compassionate, supportive Daily Wellness Companion.
             
             🧠 **CONTEXT FROM PREVIOUS SESSIONS:**
@@ -192,10 +255,12 @@ class WellnessAgent(Agent):
             🎯 **GOALS FOR THIS SESSION:**
             1. **Check-in:** Ask how they are feeling (Mood) and their energy levels.
                - *Reference the history context if available (e.g., "Last time you were tired, how is today?").*
+               - *Gently mention longer trends or streaks when they help (e.g., "You've checked in 5 days in a row!").*
             2. **Intentions:** Ask for 1-3 simple objectives for the day.
             3. **Support:** Offer small, grounded, NON-MEDICAL advice.
                - Example: "Try a 5-minute walk" or "Break that big task into small steps."
             4. **Recap & Save:** Summarize their mood and goals, then call 'complete_checkin'.
+            5. **Trends:** If they ask how they've been over time (e.g., "How was my energy last month?"), call 'query_wellness_trends'.
 
             🚫 **SAFETY GUARDRAILS:**
             - You are NOT a doctor or therapist.
@@ -203,11 +268,26 @@ class WellnessAgent(Agent):
             - If a user mentions self-harm or severe crisis, gently suggest professional help immediately.
 
             🛠️ **Use the tools to record data as the user speaks.**
-            """,
+            """
+
+def history_version(user_id: str, summary: Optional[dict]) -> tuple:
+    """Cache key for the rendered history: the user, how many check-ins the
+    summary covers, and the day (its "last 7 days" windows move daily)"""
+    return user_id, summary["total"] if summary else 0, datetime.now().date()
+
+class WellnessAgent(Agent):
+    def __init__(self, history_context: str, history_version: Hashable):
+        super().__init__(
+            instructions=INSTRUCTIONS_BUDGET.render(
+                WELLNESS_INSTRUCTIONS,
+                version=history_version,
+                history_context=history_context,
+            ),
             tools=[
                 record_mood_and_energy,
                 record_objectives,
                 complete_checkin,
+                query_wellness_trends,
             ],
         )
 
@@ -216,37 +296,41 @@ class WellnessAgent(Agent):
 # ======================================================
 
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    prewarm_models(proc)
 
 async def entrypoint(ctx: JobContext):
     ctx.log_context_fields = {"room": ctx.room.name}
 
+    models = get_models(ctx.proc)
+    blocking_detector = start_blocking_detector()
+
     print("\n" + "🌿" * 25)
     print("🚀 STARTING WELLNESS SESSION")
     print("👨‍⚕️ Tutorial by Dr. Abhishek")
     
-    # 1. Load History from JSON
-    history = load_history()
-    history_summary = "No previous history found. This is the first session."
+    # 1. Join the room and find out who we're talking to
+    await ctx.connect()
+    participant = await ctx.wait_for_participant()
+    user_id = participant.identity or DEFAULT_IDENTITY
+    print(f"👤 PARTICIPANT: {user_id}")
+
+    # 2. Load their rolling summary: recent moods, recurring goals, streaks
+    summary = await load_user_summary(user_id)
+    history_summary = describe(summary)
     
-    if history:
-        last_entry = history[-1]
-        history_summary = (
-            f"Last check-in was on {last_entry.get('timestamp', 'unknown date')}. "
-            f"User felt {last_entry.get('mood')} with {last_entry.get('energy')} energy. "
-            f"Their goals were: {', '.join(last_entry.get('objectives', []))}."
-        )
+    if summary:
         print("📜 HISTORY LOADED:", history_summary)
     else:
         print("📜 NO HISTORY FOUND.")
 
-    # 2. Initialize Session Data
+    # 3. Initialize Session Data
     userdata = Userdata(
         current_checkin=CheckInState(),
-        history_summary=history_summary
+        history_summary=history_summary,
+        user_id=user_id,
     )
 
-    # 3. Setup Agent
+    # 4. Setup Agent
     session = AgentSession(
         stt=deepgram.STT(model="nova-3"),
         llm=google.LLM(model="gemini-2.5-flash"),
@@ -255,21 +339,45 @@ async def entrypoint(ctx: JobContext):
             style="Promo",         # Often sounds more enthusiastic/supportive
             text_pacing=True,
         ),
-        turn_detection=MultilingualModel(),
-        vad=ctx.proc.userdata["vad"],
+        turn_detection=models.turn_detection,
+        vad=models.vad,
         userdata=userdata,
     )
-    
-    # 4. Start
+
+    # 5. Metrics
+    usage_collector = metrics.UsageCollector()
+    latency_recorder = LatencyRecorder(ctx.room.name)
+
+    @session.on("metrics_collected")
+    def _on_metrics_collected(ev: MetricsCollectedEvent):
+        metrics.log_metrics(ev.metrics)
+        usage_collector.collect(ev.metrics)
+        latency_recorder.record(ev.metrics)
+
+    @session.on("function_tools_executed")
+    def _on_function_tools_executed(ev: FunctionToolsExecutedEvent):
+        latency_recorder.record_tools(ev)
+
+    async def log_usage():
+        summary = usage_collector.get_summary()
+        logger.info(f"Usage: {summary}")
+        latency_recorder.export()
+        if blocking_detector:
+            blocking_detector.stop()
+
+    ctx.add_shutdown_callback(log_usage)
+
+    # 6. Start
     await session.start(
-        agent=WellnessAgent(history_context=history_summary),
+        agent=WellnessAgent(
+            history_context=history_summary,
+            history_version=history_version(user_id, summary),
+        ),
         room=ctx.room,
         room_input_options=RoomInputOptions(
-            noise_cancellation=noise_cancellation.BVC()
+            noise_cancellation=models.noise_cancellation
         ),
     )
 
-    await ctx.connect()
-
 if __name__ == "__main__":
     cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
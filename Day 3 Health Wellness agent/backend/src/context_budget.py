@@ -0,0 +1,123 @@
+"""Token budgets for agent instructions.
+
+Instructions that interpolate data (check-in history, company facts, the
+game universe) grow with that data, and all of it is sent to the LLM on every
+turn. `ContextBudget` renders such instructions with each injected field cut
+down to fit a token budget, logs the resulting size, and caches the render
+per data version so unchanged data is not rendered again.
+"""
+
+import logging
+import os
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Optional
+
+logger = logging.getLogger("context_budget")
+
+# Rough ratio for English text; good enough to keep prompts in bounds
+CHARS_PER_TOKEN = 4
+DEFAULT_BUDGET = int(os.getenv("CONTEXT_BUDGET_TOKENS", "1500"))
+OMITTED = "[... {n} more lines omitted]"
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of `text`."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def truncate_to_budget(text: str, max_tokens: int, keep: str = "head") -> str:
+    """Cut `text` to about `max_tokens`, dropping whole lines from the end
+    (keep="head") or from the start (keep="tail")."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+    lines = text.splitlines()
+    # Leave room for the marker saying what was dropped
+    room = max_tokens * CHARS_PER_TOKEN - len(OMITTED.format(n=len(lines))) - 1
+    ordered = lines if keep == "head" else lines[::-1]
+    kept: list[str] = []
+    for line in ordered:
+        if len(line) + 1 > room:
+            break
+        kept.append(line)
+        room -= len(line) + 1
+    if not kept:
+        # Not even one line fits: cut the first one at a word boundary
+        return ordered[0][: max_tokens * CHARS_PER_TOKEN - 3].rsplit(" ", 1)[0] + "..."
+    marker = OMITTED.format(n=len(lines) - len(kept))
+    if keep == "head":
+        return "\n".join([*kept, marker])
+    return "\n".join([marker, *kept[::-1]])
+
+
+class ContextBudget:
+    def __init__(self, name: str, max_tokens: int = DEFAULT_BUDGET, cache_size: int = 64) -> None:
+        self.name = name
+        self.max_tokens = max_tokens
+        self.cache_size = cache_size
+        self._cache: OrderedDict[tuple, str] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.last_tokens = 0
+
+    def render(
+        self,
+        template: str,
+        version: Hashable,
+        keep: Optional[dict[str, str]] = None,
+        **fields: str,
+    ) -> str:
+        """Fill `template` ({name} placeholders) with `fields`, each trimmed so
+        the whole stays within the budget.
+
+        `version` identifies the data behind `fields`: the same template and
+        version return the cached render without looking at `fields`.
+        `keep` maps a field to "tail" when its latest lines matter most.
+        """
+        key = (template, version)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return cached
+        self.misses += 1
+
+        rendered = self._render(template, keep or {}, fields)
+        self._cache[key] = rendered
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return rendered
+
+    def _render(self, template: str, keep: dict[str, str], fields: dict[str, str]) -> str:
+        fixed = estimate_tokens(template.format(**dict.fromkeys(fields, "")))
+        remaining = max(0, self.max_tokens - fixed)
+
+        # Short fields take what they need; the rest split what's left evenly
+        allowance: dict[str, int] = {}
+        pending = sorted(fields, key=lambda name: estimate_tokens(fields[name]))
+        while pending:
+            share = remaining // len(pending)
+            size = estimate_tokens(fields[pending[0]])
+            if size > share:
+                allowance.update(dict.fromkeys(pending, share))
+                break
+            allowance[pending.pop(0)] = size
+            remaining -= size
+
+        values = {
+            name: truncate_to_budget(value, allowance[name], keep.get(name, "head"))
+            for name, value in fields.items()
+        }
+        rendered = template.format(**values)
+        self.last_tokens = estimate_tokens(rendered)
+        trimmed = [name for name in fields if values[name] != fields[name]]
+        if trimmed:
+            logger.info(
+                f"{self.name} instructions: ~{self.last_tokens} tokens, "
+                f"trimmed {', '.join(trimmed)} to fit {self.max_tokens}"
+            )
+        else:
+            logger.info(f"{self.name} instructions: ~{self.last_tokens} tokens")
+        return rendered
@@ -0,0 +1,191 @@
+"""Weekly buckets over a user's check-in log, for trend questions.
+
+Each user's index is a small JSON document next to their log: one bucket
+per week (keyed by the Monday it starts on) with check-in, mood, energy and
+objective counts, plus the byte offset of the log it covers. Before a query
+the index catches up by reading only the lines appended since that offset,
+so answering "how was my energy last month" merges a handful of weekly
+buckets instead of re-reading the log. Each week also keeps its counts per
+day, so a range that starts or ends mid-week counts only its own days of
+the weeks at either edge.
+"""
+
+import json
+import os
+from collections import Counter
+from datetime import date, timedelta
+from typing import Optional
+
+PERIODS = (
+    "this_week",
+    "last_week",
+    "this_month",
+    "last_month",
+    "last_30_days",
+    "last_90_days",
+    "this_year",
+    "all_time",
+)
+# Longest range listed week by week; longer ranges only get totals
+MAX_WEEKS_LISTED = 13
+# Bumped when the bucket layout changes; older indexes are rebuilt from the log
+INDEX_VERSION = 2
+COUNT_KEYS = ("moods", "energy", "objectives")
+
+
+def week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def _normalize(value) -> str:
+    return " ".join(str(value or "").lower().split())
+
+
+def empty_index() -> dict:
+    return {"version": INDEX_VERSION, "inode": None, "offset": 0, "weeks": {}}
+
+
+def _empty_counts() -> dict:
+    return {"checkins": 0, "moods": {}, "energy": {}, "objectives": {}}
+
+
+def _add(bucket: dict, other: dict) -> None:
+    bucket["checkins"] += other["checkins"]
+    for key in COUNT_KEYS:
+        for value, count in other[key].items():
+            bucket[key][value] = bucket[key].get(value, 0) + count
+
+
+def fold(index: dict, record: dict) -> None:
+    try:
+        day = date.fromisoformat(str(record.get("timestamp") or "")[:10])
+    except ValueError:
+        return
+    counts = _empty_counts()
+    counts["checkins"] = 1
+    for key, values in (
+        ("moods", [record.get("mood")]),
+        ("energy", [record.get("energy")]),
+        ("objectives", record.get("objectives") or []),
+    ):
+        for value in values:
+            value = _normalize(value)
+            if value:
+                counts[key][value] = counts[key].get(value, 0) + 1
+    week = index["weeks"].setdefault(week_start(day).isoformat(), {**_empty_counts(), "days": {}})
+    _add(week, counts)
+    _add(week["days"].setdefault(day.isoformat(), _empty_counts()), counts)
+
+
+def is_current(index: Optional[dict], log_path: str) -> bool:
+    """True when the index already covers everything in the log."""
+    try:
+        st = os.stat(log_path)
+    except FileNotFoundError:
+        return True  # nothing logged yet, nothing to catch up on
+    return (
+        bool(index)
+        and index.get("version") == INDEX_VERSION
+        and index["inode"] == st.st_ino
+        and index["offset"] == st.st_size
+    )
+
+
+def catch_up(index: Optional[dict], log_path: str) -> dict:
+    """Fold in the check-ins appended to `log_path` since the index was last updated."""
+    index = index or empty_index()
+    try:
+        with open(log_path, "rb") as f:
+            st = os.fstat(f.fileno())
+            if index.get("version") != INDEX_VERSION or index["inode"] != st.st_ino or index["offset"] > st.st_size:
+                # An older layout, or a different or rewritten log: start over
+                index = empty_index()
+                index["inode"] = st.st_ino
+            f.seek(index["offset"])
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn or still being written; picked up next time
+                index["offset"] += len(line)
+                if line.strip():
+                    try:
+                        fold(index, json.loads(line))
+                    except ValueError:
+                        continue
+    except FileNotFoundError:
+        pass
+    return index
+
+
+def resolve_period(period: str, today: Optional[date] = None) -> tuple[date, date]:
+    """Inclusive date range for one of `PERIODS`."""
+    today = today or date.today()
+    if period == "this_week":
+        return week_start(today), today
+    if period == "last_week":
+        start = week_start(today) - timedelta(days=7)
+        return start, start + timedelta(days=6)
+    if period == "this_month":
+        return today.replace(day=1), today
+    if period == "last_month":
+        end = today.replace(day=1) - timedelta(days=1)
+        return end.replace(day=1), end
+    if period == "last_30_days":
+        return today - timedelta(days=29), today
+    if period == "last_90_days":
+        return today - timedelta(days=89), today
+    if period == "this_year":
+        return today.replace(month=1, day=1), today
+    if period == "all_time":
+        return date.min, today
+    raise ValueError(f"Unknown period: {period}")
+
+
+def query(index: dict, start: date, end: date) -> dict:
+    """Totals and per-week counts for the check-ins dated within [start, end].
+
+    Weeks wholly inside the range use their weekly bucket; the weeks at either
+    edge add up only the days that fall in the range.
+    """
+    first, last = week_start(start).isoformat(), end.isoformat()
+    start_day = start.isoformat()
+    weeks = []
+    for week, bucket in sorted(index["weeks"].items()):
+        if not first <= week <= last:
+            continue
+        if week < start_day or (date.fromisoformat(week) + timedelta(days=6)).isoformat() > last:
+            clamped = _empty_counts()
+            for day, counts in bucket["days"].items():
+                if start_day <= day <= last:
+                    _add(clamped, counts)
+            bucket = clamped
+        if bucket["checkins"]:
+            weeks.append((week, bucket))
+    totals = {"checkins": 0, "moods": Counter(), "energy": Counter(), "objectives": Counter()}
+    for _, bucket in weeks:
+        totals["checkins"] += bucket["checkins"]
+        for key in COUNT_KEYS:
+            totals[key].update(bucket[key])
+    return {"weeks": weeks, "totals": totals}
+
+
+def _top(counts: dict, n: int = 3) -> str:
+    return ", ".join(f"{value} ({count})" for value, count in Counter(counts).most_common(n)) or "none recorded"
+
+
+def format_trends(result: dict, metric: str = "all") -> str:
+    """Compact, speakable answer for the LLM."""
+    weeks, totals = result["weeks"], result["totals"]
+    if not totals["checkins"]:
+        return "There are no check-ins in that period."
+    keys = COUNT_KEYS if metric == "all" else (metric,)
+    lines = [
+        f"{totals['checkins']} check-ins over {len(weeks)} week(s) with data, "
+        f"from the week of {weeks[0][0]} to the week of {weeks[-1][0]}."
+    ]
+    for key in keys:
+        lines.append(f"{key.title()}: {_top(totals[key], 5)}.")
+    if len(weeks) <= MAX_WEEKS_LISTED:
+        for week, bucket in weeks:
+            detail = "; ".join(f"{key} {_top(bucket[key], 2)}" for key in keys)
+            lines.append(f"Week of {week} ({bucket['checkins']} check-ins): {detail}.")
+    return "\n".join(lines)
@@ -0,0 +1,265 @@
+"""Append-only wellness history.
+
+Check-ins are stored one JSON object per line. Adding one is a single
+`O_APPEND` write plus fsync, no matter how long the log is, and reading the
+latest check-ins seeks back from the end of the file instead of parsing all
+of it. A crash mid-write can only leave a torn last line, which readers skip
+and the next append terminates.
+
+Logs written by older versions (`wellness_log.json`, a single JSON list) are
+converted the first time the store is opened.
+
+`WellnessShards` gives every user (LiveKit participant identity) their own
+log, so sessions in different rooms never write to the same file. Shard
+paths are derived from the identity, so writers need no shared lock or
+lookup; new users are recorded in an append-only directory index, and only
+the most recently used shards keep a file handle open. A shard evicted while
+an append is still writing to it is closed when that append finishes.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator
+from datetime import datetime
+from typing import Optional
+
+logger = logging.getLogger("wellness_store")
+
+# Bytes read per step when scanning backwards for the last lines
+TAIL_BLOCK = 8192
+# Shard logs kept open at once; the least recently used are closed beyond this
+MAX_OPEN_SHARDS = int(os.getenv("WELLNESS_OPEN_SHARDS", "256"))
+INDEX_FILE = "index.jsonl"
+# Owner of check-ins saved before logs were split per user
+DEFAULT_IDENTITY = "default"
+
+
+class WellnessStore:
+    def __init__(self, path: str, legacy_path: Optional[str] = None) -> None:
+        self.path = os.path.abspath(path)
+        self._fd: Optional[int] = None
+        self._lock = threading.Lock()
+        # Appends in flight through WellnessShards, and whether it has evicted us
+        self._users = 0
+        self._evicted = False
+        if legacy_path and os.path.exists(legacy_path) and not os.path.exists(self.path):
+            self._migrate(legacy_path)
+
+    def _migrate(self, legacy_path: str) -> None:
+        with open(legacy_path, encoding="utf-8") as f:
+            data = json.load(f)
+        records = data if isinstance(data, list) else []
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        os.replace(legacy_path, legacy_path + ".migrated")
+        logger.info(f"Migrated {len(records)} check-ins from {legacy_path} to {self.path}")
+
+    def _open(self) -> int:
+        if self._fd is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        return self._fd
+
+    def append(self, record: dict) -> None:
+        """Durably add one check-in; O(1) in the size of the log."""
+        data = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            fd = self._open()
+            size = os.fstat(fd).st_size
+            if size and os.pread(fd, 1, size - 1) != b"\n":
+                # Terminate a torn line left by a crash so this record parses
+                data = b"\n" + data
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+
+    def tail(self, n: int = 1) -> list[dict]:
+        """The last `n` check-ins, oldest first, reading only the end of the file."""
+        if n <= 0 or not os.path.exists(self.path):
+            return []
+        with open(self.path, "rb") as f:
+            end = f.seek(0, os.SEEK_END)
+            pos, buf = end, b""
+            # n records need n + 1 newlines to be sure the first one is complete
+            while pos > 0 and buf.count(b"\n") <= n:
+                step = min(TAIL_BLOCK, pos)
+                pos -= step
+                f.seek(pos)
+                buf = f.read(step) + buf
+        lines = buf.split(b"\n")
+        if pos > 0:
+            lines = lines[1:]  # partial first line
+        if not buf.endswith(b"\n"):
+            lines = lines[:-1]  # torn last line
+        records = []
+        for line in reversed(lines):
+            if len(records) == n:
+                break
+            if line.strip():
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        return records[::-1]
+
+    def __iter__(self) -> Iterator[dict]:
+        """Every check-in, oldest first."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            for line in f:
+                if line.endswith(b"\n") and line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+def shard_name(identity: str) -> str:
+    """Stable, filesystem-safe file name for a participant identity."""
+    digest = hashlib.sha1(identity.encode("utf-8")).hexdigest()
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "_", identity)[:48]
+    # Fan out by hash prefix so no single directory grows to every user
+    return os.path.join(digest[:2], f"{slug}-{digest[:10]}.jsonl")
+
+
+class WellnessShards:
+    def __init__(
+        self,
+        root: str,
+        legacy_paths: tuple[str, ...] = (),
+        max_open: int = MAX_OPEN_SHARDS,
+    ) -> None:
+        self.root = os.path.abspath(root)
+        self.legacy_paths = legacy_paths
+        self.max_open = max_open
+        self._stores: OrderedDict[str, WellnessStore] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def path_for(self, identity: str) -> str:
+        return os.path.join(self.root, shard_name(identity))
+
+    def summary_path(self, identity: str) -> str:
+        """Where the participant's rolling summary lives, next to their log."""
+        return self.path_for(identity or DEFAULT_IDENTITY)[: -len(".jsonl")] + ".summary.json"
+
+    def weeks_path(self, identity: str) -> str:
+        """Where the participant's weekly trend index lives, next to their log."""
+        return self.path_for(identity or DEFAULT_IDENTITY)[: -len(".jsonl")] + ".weeks.json"
+
+    def _open_store(self, identity: str) -> WellnessStore:
+        path = self.path_for(identity)
+        legacy_json = None
+        if identity == DEFAULT_IDENTITY and not os.path.exists(path):
+            # The old shared log becomes the default user's shard
+            for legacy_path in self.legacy_paths:
+                if legacy_path.endswith(".jsonl") and os.path.exists(legacy_path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(legacy_path, path)
+                    self._register(identity, path)
+                    break
+                if legacy_path.endswith(".json"):
+                    legacy_json = legacy_path
+        store = WellnessStore(path, legacy_path=legacy_json)
+        if legacy_json and not os.path.exists(legacy_json) and os.path.exists(path):
+            self._register(identity, path)
+        return store
+
+    def _get(self, identity: str, use: bool) -> WellnessStore:
+        with self._lock:
+            store = self._stores.get(identity)
+            if store is not None:
+                self._stores.move_to_end(identity)
+            else:
+                store = self._open_store(identity)
+                self._stores[identity] = store
+                while len(self._stores) > self.max_open:
+                    _, evicted = self._stores.popitem(last=False)
+                    evicted._evicted = True
+                    if not evicted._users:
+                        evicted.close()
+            if use:
+                store._users += 1
+            return store
+
+    def _release(self, store: WellnessStore) -> None:
+        with self._lock:
+            store._users -= 1
+            if store._evicted and not store._users:
+                store.close()
+
+    def store(self, identity: str) -> WellnessStore:
+        """The log for one participant, opening it (and closing idle ones) as needed."""
+        return self._get(identity or DEFAULT_IDENTITY, use=False)
+
+    def append(self, identity: str, record: dict) -> str:
+        """Append a check-in to the participant's log; returns the shard path."""
+        identity = identity or DEFAULT_IDENTITY
+        # Held until the write is done, so eviction can't close the file under it
+        store = self._get(identity, use=True)
+        try:
+            is_new = not os.path.exists(store.path)
+            store.append(record)
+        finally:
+            self._release(store)
+        if is_new:
+            self._register(identity, store.path)
+        return store.path
+
+    def tail(self, identity: str, n: int = 1) -> list[dict]:
+        return self.store(identity).tail(n)
+
+    def _register(self, identity: str, path: str) -> None:
+        line = json.dumps({
+            "identity": identity,
+            "shard": os.path.relpath(path, self.root),
+            "created": datetime.now().isoformat(),
+        }, ensure_ascii=False) + "\n"
+        os.makedirs(self.root, exist_ok=True)
+        # A single O_APPEND write, so concurrent processes never interleave lines
+        fd = os.open(os.path.join(self.root, INDEX_FILE), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode("utf-8"))
+        finally:
+            os.close(fd)
+
+    def identities(self) -> dict[str, str]:
+        """Every participant with a log, mapped to their shard path."""
+        index: dict[str, str] = {}
+        path = os.path.join(self.root, INDEX_FILE)
+        if not os.path.exists(path):
+            return index
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                index.setdefault(entry["identity"], os.path.join(self.root, entry["shard"]))
+        return index
+
+    def close(self) -> None:
+        with self._lock:
+            while self._stores:
+                store = self._stores.popitem()[1]
+                store._evicted = True
+                if not store._users:
+                    store.close()
@@ -0,0 +1,130 @@
+"""Rolling per-user wellness summary.
+
+A small JSON document kept next to each user's check-in log and updated in
+place on every completed check-in: per-day mood and energy counts for the
+last 30 days, how often each objective comes up, and check-in streaks. It
+never grows with the length of the history, so the agent can describe
+long-term trends at session start from one small read.
+"""
+
+from collections import Counter
+from collections.abc import Iterable
+from datetime import date, timedelta
+from typing import Optional
+
+# Days of per-day buckets kept; the longest window we report on
+WINDOW_DAYS = 30
+# Distinct objectives tracked; the least frequent are dropped beyond this
+MAX_OBJECTIVES = 100
+
+
+def _day(record: dict) -> Optional[str]:
+    timestamp = str(record.get("timestamp") or "")
+    return timestamp[:10] if len(timestamp) >= 10 else None
+
+
+def _normalize(value) -> str:
+    return " ".join(str(value or "").lower().split())
+
+
+def empty_summary() -> dict:
+    return {
+        "total": 0,
+        "first_day": None,
+        "last": None,
+        "days": {},
+        "objectives": {},
+        "streak": {"current": 0, "longest": 0, "last_day": None},
+    }
+
+
+def apply_checkin(summary: Optional[dict], record: dict) -> dict:
+    """Fold one check-in into the summary."""
+    summary = summary or empty_summary()
+    summary["total"] += 1
+    summary["last"] = record
+
+    day = _day(record)
+    if day:
+        summary["first_day"] = min(summary["first_day"] or day, day)
+        bucket = summary["days"].setdefault(day, {"checkins": 0, "moods": {}, "energy": {}})
+        bucket["checkins"] += 1
+        for key, value in (("moods", record.get("mood")), ("energy", record.get("energy"))):
+            value = _normalize(value)
+            if value:
+                bucket[key][value] = bucket[key].get(value, 0) + 1
+        # Buckets are only needed for the rolling windows
+        cutoff = (date.fromisoformat(max(summary["days"])) - timedelta(days=WINDOW_DAYS - 1)).isoformat()
+        for old_day in [d for d in summary["days"] if d < cutoff]:
+            del summary["days"][old_day]
+
+        streak = summary["streak"]
+        last_day = streak["last_day"]
+        if last_day is None or day > last_day:
+            consecutive = last_day == (date.fromisoformat(day) - timedelta(days=1)).isoformat()
+            streak["current"] = streak["current"] + 1 if consecutive else 1
+            streak["longest"] = max(streak["longest"], streak["current"])
+            streak["last_day"] = day
+
+    objectives = summary["objectives"]
+    for objective in record.get("objectives") or []:
+        objective = _normalize(objective)
+        if objective:
+            objectives[objective] = objectives.get(objective, 0) + 1
+    if len(objectives) > MAX_OBJECTIVES:
+        keep = sorted(objectives.items(), key=lambda kv: -kv[1])[:MAX_OBJECTIVES]
+        summary["objectives"] = dict(keep)
+    return summary
+
+
+def build_summary(records: Iterable[dict]) -> dict:
+    """Summary of a whole log; used once for logs that predate summaries."""
+    summary = empty_summary()
+    for record in records:
+        apply_checkin(summary, record)
+    return summary
+
+
+def _window(summary: dict, days: int, today: date) -> tuple[int, Counter, Counter]:
+    start = (today - timedelta(days=days - 1)).isoformat()
+    checkins, moods, energy = 0, Counter(), Counter()
+    for day, bucket in summary["days"].items():
+        if start <= day <= today.isoformat():
+            checkins += bucket["checkins"]
+            moods.update(bucket["moods"])
+            energy.update(bucket["energy"])
+    return checkins, moods, energy
+
+
+def _top(counter: Counter, n: int = 3) -> str:
+    return ", ".join(f"{value} ({count})" for value, count in counter.most_common(n))
+
+
+def describe(summary: Optional[dict], today: Optional[date] = None) -> str:
+    """Short prompt-ready description of the user's history."""
+    if not summary or not summary["total"]:
+        return "No previous history found. This is the first session."
+    today = today or date.today()
+    last = summary["last"] or {}
+    lines = [
+        f"{summary['total']} check-ins since {summary['first_day'] or 'an unknown date'}.",
+        f"Last check-in was on {last.get('timestamp', 'unknown date')}. "
+        f"User felt {last.get('mood')} with {last.get('energy')} energy. "
+        f"Their goals were: {', '.join(last.get('objectives') or [])}.",
+    ]
+    for days in (7, WINDOW_DAYS):
+        checkins, moods, energy = _window(summary, days, today)
+        if checkins:
+            lines.append(
+                f"Past {days} days: {checkins} check-ins; moods: {_top(moods)}; energy: {_top(energy)}."
+            )
+    recurring = Counter({k: v for k, v in summary["objectives"].items() if v > 1})
+    if recurring:
+        lines.append(f"Recurring goals: {_top(recurring, 5)}.")
+
+    streak = summary["streak"]
+    current = streak["current"]
+    if streak["last_day"] and streak["last_day"] < (today - timedelta(days=1)).isoformat():
+        current = 0  # missed a day since the last check-in
+    lines.append(f"Check-in streak: {current} days (longest {streak['longest']}).")
+    return "\n".join(lines)
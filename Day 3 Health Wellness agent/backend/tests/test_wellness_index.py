@@ -0,0 +1,44 @@
+import json
+from datetime import date
+
+from wellness_index import catch_up, empty_index, is_current, query, resolve_period
+
+
+def _write_log(path, days: list[str]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for i, day in enumerate(days):
+            f.write(json.dumps({"timestamp": f"{day}T09:00:00", "mood": f"mood{i}", "energy": "high"}) + "\n")
+
+
+def test_range_edges_count_only_days_in_range(tmp_path) -> None:
+    log = tmp_path / "log.jsonl"
+    # Wed 2025-04-30 and Thu 2025-05-01 share a week, as do Fri 05-30 and Mon 06-02
+    _write_log(log, ["2025-04-28", "2025-04-30", "2025-05-01", "2025-05-14", "2025-05-30", "2025-06-02"])
+    index = catch_up(None, str(log))
+
+    start, end = resolve_period("last_month", today=date(2025, 6, 10))
+    result = query(index, start, end)
+    assert result["totals"]["checkins"] == 3
+    assert set(result["totals"]["moods"]) == {"mood2", "mood3", "mood4"}
+    assert [(week, bucket["checkins"]) for week, bucket in result["weeks"]] == [
+        ("2025-04-28", 1), ("2025-05-12", 1), ("2025-05-26", 1),
+    ]
+
+    # Whole weeks still come straight from the weekly bucket
+    whole = query(index, date(2025, 4, 28), date(2025, 5, 4))
+    assert whole["totals"]["checkins"] == 3
+
+
+def test_index_without_day_counts_is_rebuilt(tmp_path) -> None:
+    log = tmp_path / "log.jsonl"
+    _write_log(log, ["2025-05-01"])
+    old = catch_up(None, str(log))
+    del old["version"]
+    for bucket in old["weeks"].values():
+        del bucket["days"]
+
+    assert not is_current(old, str(log))
+    rebuilt = catch_up(old, str(log))
+    assert is_current(rebuilt, str(log))
+    assert query(rebuilt, date(2025, 5, 1), date(2025, 5, 1))["totals"]["checkins"] == 1
+    assert is_current(empty_index(), str(tmp_path / "missing.jsonl"))
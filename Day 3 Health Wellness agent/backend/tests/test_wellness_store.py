@@ -0,0 +1,35 @@
+import threading
+import time
+
+from wellness_store import WellnessShards
+
+
+def test_shard_evicted_during_append_is_closed_afterwards(tmp_path) -> None:
+    shards = WellnessShards(str(tmp_path), max_open=1)
+    alice = shards.store("alice")
+
+    # Hold Alice's store lock so her append is in flight while she is evicted
+    alice._lock.acquire()
+    writer = threading.Thread(target=shards.append, args=("alice", {"mood": "calm"}))
+    writer.start()
+    while not alice._users:
+        time.sleep(0.001)
+    shards.append("bob", {"mood": "tired"})
+    assert alice._evicted
+    alice._lock.release()
+    writer.join(timeout=5)
+
+    assert alice._fd is None
+    assert list(alice) == [{"mood": "calm"}]
+    shards.close()
+
+
+def test_idle_shards_are_closed_on_eviction(tmp_path) -> None:
+    shards = WellnessShards(str(tmp_path), max_open=2)
+    for user in ("a", "b", "c"):
+        shards.append(user, {"user": user})
+    first = shards.path_for("a")
+    assert all(store.path != first for store in shards._stores.values())
+    assert shards.tail("a") == [{"user": "a"}]
+    assert set(shards.identities()) == {"a", "b", "c"}
+    shards.close()
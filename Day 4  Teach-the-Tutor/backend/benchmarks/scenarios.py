@@ -0,0 +1,67 @@
+"""Scripted conversation used by the offline benchmarks."""
+
+import itertools
+
+from fake_plugins import FakeResponse, FakeTTS, ToolCall
+
+import quiz_bank
+import voice_manager
+from agent import TeachTheTutorAssistant
+from learner_progress import LearnerProgress
+
+# Mode switches draw fake voices from the TTS pool instead of Murf
+voice_manager.TTS_FACTORY = lambda voice, style: FakeTTS()
+
+
+async def _fake_questions(topic: str, count: int, seed: str) -> list[dict]:
+    return [
+        {"question": f"Question {i} about {topic}?", "answer": f"Answer {i}."}
+        for i in range(count)
+    ]
+
+
+# Quiz batches come from a canned generator instead of the LLM
+quiz_bank.QUESTION_GENERATOR = _fake_questions
+
+AGENT_NAME = "teach_the_tutor"
+
+# (user message, scripted LLM response)
+SCRIPT = [
+    ("Hi", FakeResponse(text="Welcome! Would you like to learn, be quizzed, or teach back?")),
+    ("Teach me about variables", FakeResponse(
+        text="A variable is a named place to store a value.",
+        tool_calls=[ToolCall("switch_to_learn_mode", {"topic": "variables"})],
+    )),
+    ("Now quiz me", FakeResponse(
+        text="What does a variable store?",
+        tool_calls=[ToolCall("switch_to_quiz_mode", {"topic": "variables"})],
+    )),
+    ("It stores a value under a name", FakeResponse(
+        text="Exactly right!",
+        tool_calls=[ToolCall("record_quiz_score", {"score": 90})],
+    )),
+    ("Ask me another one", FakeResponse(
+        text="",
+        tool_calls=[ToolCall("next_quiz_question", {})],
+    )),
+    ("Let's do loops instead", FakeResponse(
+        text="What does a for loop do?",
+        tool_calls=[ToolCall("select_topic", {"topic": "loops"})],
+    )),
+    ("Let me explain it back", FakeResponse(
+        text="Go ahead, explain loops to me.",
+        tool_calls=[ToolCall("switch_to_teach_back_mode", {"topic": "loops"})],
+    )),
+    ("Back to learning", FakeResponse(
+        text="Switched to learn mode.",
+        tool_calls=[ToolCall("switch_to_learn_mode", {})],
+    )),
+]
+
+
+# A new learner per session, so progress files grow like they would in production
+_learner_ids = itertools.count()
+
+
+def make_agent() -> TeachTheTutorAssistant:
+    return TeachTheTutorAssistant(LearnerProgress(f"bench-learner-{next(_learner_ids)}"))
@@ -8,31 +8,60 @@ from livekit.agents import (
     JobContext,
     JobProcess,
     MetricsCollectedEvent,
+    FunctionToolsExecutedEvent,
     RoomInputOptions,
     WorkerOptions,
     cli,
     metrics,
-    tokenize,
     function_tool,
     RunContext
 )
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
-from voice_manager import VoiceManager
+from livekit.plugins import google, deepgram
+from latency_metrics import LatencyRecorder
+from learner_progress import DEFAULT_LEARNER, LearnerProgress
+from model_cache import get_models, prewarm_models
+from phrase_cache import get_phrase_cache, prewarm_phrases
+from quiz_bank import generator_for, get_quiz_bank
+from tutor_content import Concept, get_tutor_content, prewarm_content
+from voice_manager import VoiceManager, make_murf_tts
 
 logger = logging.getLogger("agent")
 
 load_dotenv(".env.local")
 
+# Spoken as-is when a mode is picked without a topic, in that mode's voice
+MODE_CONFIRMATIONS = {
+    "learn": "Switched to LEARN mode! What topic would you like me to explain? I can teach you about anything - programming, science, history, math, languages, or any other subject you're curious about.",
+    "quiz": "Switched to QUIZ mode! What topic would you like to be quizzed on? I can create questions about any subject you want to test your knowledge on.",
+    "teach_back": "Switched to TEACH-BACK mode! What topic would you like to teach me about? Pick any subject you want to explain and I'll listen and give you constructive feedback.",
+}
+
+# How each mode opens a concept from the course content
+CONTENT_PROMPTS = {
+    "learn": "Let's learn about {title}. {summary} Does that make sense, or should I give you an example?",
+    "quiz": "Here's a question about {title}. {sample_question}",
+    "teach_back": "Now you're the teacher! {sample_question} Explain it as if I'm learning it for the first time.",
+}
+
+
+def _concept_key(topic: str) -> tuple[str, str]:
+    """(id, title) to track progress under: the course concept if it is one"""
+    concept = get_tutor_content().index.best(topic)
+    if concept is not None:
+        return concept.id, concept.title
+    return "-".join(topic.lower().split()), topic.strip()
+
 
 class TeachTheTutorAssistant(Agent):
-    def __init__(self) -> None:
+    def __init__(self, progress: Optional[LearnerProgress] = None) -> None:
+        self.progress = progress or LearnerProgress()
         self.current_mode = "greeting"  # greeting, learn, quiz, teach_back
-        self.current_topic = None
+        self.current_topic = self.progress.data["topic"]  # resume where they left off
         self._agent_session = None
+        self._mode_tts = None  # pooled TTS for the current mode, once switched
         
         super().__init__(
-            instructions="""You are an Active Recall Coach that helps users learn ANY topic through three modes:
+            instructions=f"""You are an Active Recall Coach that helps users learn ANY topic through three modes:
 
 MODES:
 1. LEARN - Explain any topic clearly (Matthew voice - friendly teacher)
@@ -41,14 +70,21 @@ MODES:
 
 You can teach ANY subject: programming, science, history, math, languages, etc.
 
+COURSE CONTENT: Some programming concepts come from the course content file; use list_concepts to see them and lookup_concept to get a concept's summary and sample question. When a mode switch or topic selection matches one of these concepts, the tool speaks the course summary or question itself. Don't repeat it; wait for the user's reply. For other topics, teach from your own knowledge.
+
 GREETING MODE: Greet warmly and ask which learning mode and topic they prefer.
 
 LEARN MODE: Explain the requested topic clearly with examples. Ask if they want to switch modes or learn another topic.
 
-QUIZ MODE: Create relevant questions about the topic and provide constructive feedback on answers.
+QUIZ MODE: For each new question call next_quiz_question. It asks a prepared question itself and gives you the reference answer, so don't repeat the question. Only write your own question when it says none is ready. Provide constructive feedback on answers.
 
 TEACH_BACK MODE: Ask user to explain the topic back to you and give qualitative feedback on their explanation.
 
+PROGRESS: After the user answers a quiz question, score the answer from 0 to 100 and call record_quiz_score. After a teach-back explanation, score it the same way and call record_teach_back_score. When the user isn't sure what to study, call get_next_review.
+
+LEARNER HISTORY: {self.progress.describe()}
+If they have history, greet them back and offer to continue or review what's due.
+
 Always be encouraging and supportive. Users can switch modes and topics anytime. Start with a warm greeting asking what they'd like to learn about.""",
         )
 
@@ -62,11 +98,78 @@ Always be encouraging and supportive. Users can switch modes and topics anytime.
         """Switch TTS voice based on mode"""
         try:
             new_tts = VoiceManager.get_tts_for_mode(mode)
-            if self._agent_session:
-                self._agent_session.tts = new_tts
-                logger.info(f"Switched to {mode} voice")
         except Exception as e:
             logger.error(f"Failed to switch voice: {e}")
+            return
+        if new_tts is self._mode_tts:
+            # Already speaking with this voice; drop the extra reference
+            VoiceManager.release_tts(new_tts)
+            return
+        self._set_tts(new_tts)
+        if self._mode_tts is not None:
+            VoiceManager.release_tts(self._mode_tts)
+        self._mode_tts = new_tts
+        logger.info(f"Switched to {mode} voice")
+
+    def _set_tts(self, new_tts):
+        if hasattr(self, "update_options"):
+            self.update_options(tts=new_tts)
+        else:
+            # Older livekit-agents: the activity reads the agent's TTS per synthesis
+            self._tts = new_tts
+
+    async def _present_concept(self, context: RunContext, mode: str, topic: str) -> bool:
+        """Speak the course content for `topic` in this mode, if the content has it"""
+        concept = get_tutor_content().index.best(topic)
+        if concept is None:
+            return False
+        self.current_topic = concept.title
+        text = CONTENT_PROMPTS[mode].format(
+            title=concept.title, summary=concept.summary, sample_question=concept.sample_question
+        )
+        logger.info(f"Serving {concept.id} from course content in {mode} mode")
+        get_phrase_cache().say(context.session, text, engine=self._mode_tts)
+        if mode == "learn":
+            await self.progress.record_explained(concept.id, concept.title)
+        return True
+
+    def _quiz_topic(self, topic: str) -> tuple[str, str]:
+        """(name, seed material) to prepare questions under: course concepts share one batch"""
+        concept = get_tutor_content().index.best(topic)
+        if concept is not None:
+            return concept.title, concept.summary
+        return topic, ""
+
+    def _prepare_quiz(self, topic: str):
+        """Start generating questions for `topic` in the background"""
+        name, seed = self._quiz_topic(topic)
+        get_quiz_bank().prefetch(name, generator_for(self.session.llm), seed)
+
+    def _confirm_mode(self, context: RunContext, mode: str):
+        """Speak the fixed confirmation from the phrase cache; no LLM reply follows"""
+        get_phrase_cache().say(context.session, MODE_CONFIRMATIONS[mode], engine=self._mode_tts)
+
+    async def on_exit(self):
+        # Hand the voice back to the pool for the next session
+        if self._mode_tts is not None:
+            VoiceManager.release_tts(self._mode_tts)
+            self._mode_tts = None
+        # Remember where they were so the next session can pick up from here
+        try:
+            await self.progress.set_position(self.current_mode, self.current_topic)
+        except Exception as e:
+            logger.error(f"Failed to save learner position: {e}")
+
+    async def _record_score(self, kind: str, score: int, topic: str) -> str:
+        topic = topic or self.current_topic
+        if not topic:
+            return "No topic selected yet. Ask which topic this was about."
+        concept_id, title = _concept_key(topic)
+        entry = await self.progress.record_score(concept_id, title, kind, score)
+        return (
+            f"Recorded {entry['last_score']} for {title} (average {entry['avg_score']:.0f}). "
+            f"Next review due {entry['due'][:16].replace('T', ' ')} UTC."
+        )
 
     @function_tool
     async def switch_to_learn_mode(self, context: RunContext, topic: str = ""):
@@ -78,11 +181,13 @@ Always be encouraging and supportive. Users can switch modes and topics anytime.
         self.current_mode = "learn"
         await self._switch_voice("learn")
         
+        if topic and await self._present_concept(context, "learn", topic):
+            return None
         if topic:
             self.current_topic = topic
             return f"Switching to LEARN mode for {topic}. Let me explain this topic clearly with examples and make it easy to understand."
         else:
-            return f"Switched to LEARN mode! What topic would you like me to explain? I can teach you about anything - programming, science, history, math, languages, or any other subject you're curious about."
+            self._confirm_mode(context, "learn")
 
     @function_tool
     async def switch_to_quiz_mode(self, context: RunContext, topic: str = ""):
@@ -93,12 +198,16 @@ Always be encouraging and supportive. Users can switch modes and topics anytime.
         """
         self.current_mode = "quiz"
         await self._switch_voice("quiz")
+        if topic:
+            self._prepare_quiz(topic)
         
+        if topic and await self._present_concept(context, "quiz", topic):
+            return None
         if topic:
             self.current_topic = topic
             return f"Switching to QUIZ mode for {topic}. I'll ask you questions to test your understanding. Ready for your first question about {topic}?"
         else:
-            return f"Switched to QUIZ mode! What topic would you like to be quizzed on? I can create questions about any subject you want to test your knowledge on."
+            self._confirm_mode(context, "quiz")
 
     @function_tool
     async def switch_to_teach_back_mode(self, context: RunContext, topic: str = ""):
@@ -110,11 +219,13 @@ Always be encouraging and supportive. Users can switch modes and topics anytime.
         self.current_mode = "teach_back"
         await self._switch_voice("teach_back")
         
+        if topic and await self._present_concept(context, "teach_back", topic):
+            return None
         if topic:
             self.current_topic = topic
             return f"Switching to TEACH-BACK mode for {topic}. Now you become the teacher! Explain {topic} to me as if I'm learning it for the first time. I'll give you feedback on your explanation."
         else:
-            return f"Switched to TEACH-BACK mode! What topic would you like to teach me about? Pick any subject you want to explain and I'll listen and give you constructive feedback."
+            self._confirm_mode(context, "teach_back")
 
     @function_tool
     async def select_topic(self, context: RunContext, topic: str):
@@ -123,6 +234,11 @@ Always be encouraging and supportive. Users can switch modes and topics anytime.
         Args:
             topic: Any topic to select (programming, science, history, math, etc.)
         """
+        if self.current_mode == "quiz":
+            # Other modes prepare their questions when switching to quiz
+            self._prepare_quiz(topic)
+        if self.current_mode in CONTENT_PROMPTS and await self._present_concept(context, self.current_mode, topic):
+            return None
         self.current_topic = topic
         
         if self.current_mode == "learn":
@@ -134,9 +250,104 @@ Always be encouraging and supportive. Users can switch modes and topics anytime.
         else:
             return f"Selected {topic}. Which mode would you like: learn, quiz, or teach-back?"
 
+    @function_tool
+    async def next_quiz_question(self, context: RunContext, topic: str = ""):
+        """Ask the next quiz question from the prepared questions for a topic.
+        
+        Args:
+            topic: The topic to quiz on; defaults to the current topic
+        """
+        topic = topic or self.current_topic
+        if not topic:
+            return "No topic selected yet. Ask what they'd like to be quizzed on."
+        name, seed = self._quiz_topic(topic)
+        question = get_quiz_bank().next_question(name, generator_for(self.session.llm), seed)
+        if question is None:
+            return f"No prepared question for {topic} yet. Ask your own question about it."
+
+        context.session.say(question["question"])
+        # The LLM judges the reply against this; it stays out of what is spoken
+        chat_ctx = self.chat_ctx.copy()
+        chat_ctx.add_message(
+            role="system",
+            content=f"Reference answer to the quiz question \"{question['question']}\": {question['answer']} "
+            "Use it to judge the user's reply; don't read it out.",
+        )
+        await self.update_chat_ctx(chat_ctx)
+        return None
+
+    @function_tool
+    async def list_concepts(self, context: RunContext):
+        """List the programming concepts available in the course content."""
+        concepts = get_tutor_content().index.concepts
+        if not concepts:
+            return "No course content is loaded. Teach from your own knowledge."
+        return "Course concepts: " + ", ".join(concept.title for concept in concepts)
+
+    @function_tool
+    async def lookup_concept(self, context: RunContext, query: str):
+        """Look up a concept in the course content by name, even if misspelled.
+        
+        Args:
+            query: The concept to look up, e.g. "loops" or "if statements"
+        """
+        matches = get_tutor_content().index.find(query)
+        if not matches:
+            return f"No course content for {query}. Teach it from your own knowledge."
+        return "\n".join(_describe_concept(concept, score) for concept, score in matches)
+
+
+    @function_tool
+    async def record_quiz_score(self, context: RunContext, score: int, topic: str = ""):
+        """Record how well the user answered a quiz question, to schedule their reviews.
+        
+        Args:
+            score: 0 to 100, how correct and complete the answer was
+            topic: The topic of the question; defaults to the current topic
+        """
+        return await self._record_score("quiz", score, topic)
+
+    @function_tool
+    async def record_teach_back_score(self, context: RunContext, score: int, topic: str = ""):
+        """Record how well the user taught a topic back, to schedule their reviews.
+        
+        Args:
+            score: 0 to 100, how accurate and clear their explanation was
+            topic: The topic they explained; defaults to the current topic
+        """
+        return await self._record_score("teach_back", score, topic)
+
+    @function_tool
+    async def get_next_review(self, context: RunContext):
+        """Find the concept the user should review or study next."""
+        review = self.progress.next_review()
+        if review is not None:
+            entry, is_due = review
+            if is_due:
+                return f"{entry['title']} is due for review (last score {entry['last_score']}). Suggest a quiz or teach-back on it."
+        studied = self.progress.data["concepts"]
+        for concept in get_tutor_content().index.concepts:
+            if concept.id not in studied:
+                return f"Nothing is due for review. Suggest a new concept: {concept.title}."
+        if review is not None:
+            return f"Nothing is due yet; {review[0]['title']} is next, due {review[0]['due'][:10]}. Offer any topic they like."
+        return "No study history yet. Ask what they'd like to learn."
+
+
+def _describe_concept(concept: Concept, score: float) -> str:
+    return (
+        f"{concept.title} (id: {concept.id}, match {score:.2f}). "
+        f"Summary: {concept.summary} Sample question: {concept.sample_question}"
+    )
+
 
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    prewarm_models(proc)
+    prewarm_content()
+    prewarm_phrases([
+        (lambda http, voice=VoiceManager.voice_for_mode(mode): make_murf_tts(voice, http_session=http), [text])
+        for mode, text in MODE_CONFIRMATIONS.items()
+    ])
 
 
 async def entrypoint(ctx: JobContext):
@@ -144,48 +355,64 @@ async def entrypoint(ctx: JobContext):
         "room": ctx.room.name,
     }
 
+    models = get_models(ctx.proc)
+
+    # Join the room and load the learner's progress so a returning learner resumes right away
+    await ctx.connect()
+    participant = await ctx.wait_for_participant()
+    progress = await LearnerProgress.load(participant.identity or DEFAULT_LEARNER)
+
+    # Connect every mode's voice now (no-op when an earlier session already did)
+    VoiceManager.warm_voices()
+    greeting_tts = VoiceManager.get_tts_for_mode("greeting")
+
     # Create session with Matthew voice as default (learn mode)
     session = AgentSession(
         stt=deepgram.STT(model="nova-3"),
         llm=google.LLM(model="gemini-2.5-flash"),
-        tts=murf.TTS(
-            voice="en-US-matthew",  # Default to Matthew for greeting/learn mode
-            style="Conversation",
-            tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=2),
-            text_pacing=True
-        ),
-        turn_detection=MultilingualModel(),
-        vad=ctx.proc.userdata["vad"],
+        tts=greeting_tts,  # Pooled Matthew voice for greeting/learn mode
+        turn_detection=models.turn_detection,
+        vad=models.vad,
         preemptive_generation=True,
     )
 
     # Metrics collection
     usage_collector = metrics.UsageCollector()
+    latency_recorder = LatencyRecorder(ctx.room.name)
 
     @session.on("metrics_collected")
     def _on_metrics_collected(ev: MetricsCollectedEvent):
         metrics.log_metrics(ev.metrics)
         usage_collector.collect(ev.metrics)
+        latency_recorder.record(ev.metrics)
+
+    @session.on("function_tools_executed")
+    def _on_function_tools_executed(ev: FunctionToolsExecutedEvent):
+        latency_recorder.record_tools(ev)
 
     async def log_usage():
         summary = usage_collector.get_summary()
         logger.info(f"Usage: {summary}")
+        latency_recorder.export()
 
     ctx.add_shutdown_callback(log_usage)
 
+    async def release_voice():
+        VoiceManager.release_tts(greeting_tts)
+
+    ctx.add_shutdown_callback(release_voice)
+
     # Start the session
-    agent = TeachTheTutorAssistant()
+    agent = TeachTheTutorAssistant(progress)
     agent.set_session(session)
     await session.start(
         agent=agent,
         room=ctx.room,
         room_input_options=RoomInputOptions(
-            noise_cancellation=noise_cancellation.BVC(),
+            noise_cancellation=models.noise_cancellation,
         ),
     )
 
-    await ctx.connect()
-
 
 if __name__ == "__main__":
     cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
\ No newline at end of file
@@ -0,0 +1,193 @@
+"""Per-turn latency recording built on the session's metrics events.
+
+`LatencyRecorder` consumes the metrics emitted through `metrics_collected` and
+the tool results from `function_tools_executed`, and keeps fixed-size
+histograms for each pipeline stage, for the room and for the whole worker
+process. On shutdown `export` appends the room's percentiles to a JSONL file
+and rewrites a Prometheus text file with the worker totals.
+"""
+
+import json
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from livekit.agents import metrics
+
+logger = logging.getLogger("latency_metrics")
+
+METRICS_DIR = os.getenv("LATENCY_METRICS_DIR", "metrics")
+
+STAGES = (
+    "end_of_utterance_delay",
+    "llm_ttft",
+    "tts_ttfb",
+    "tool_call_duration",
+    "voice_to_voice",
+)
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Geometric buckets from 1ms growing by 15% each, the last one tops out near 4
+# minutes; anything slower lands in the overflow bucket.
+_BUCKET_START = 0.001
+_BUCKET_GROWTH = 1.15
+_BUCKET_COUNT = 90
+_BUCKET_BOUNDS = tuple(_BUCKET_START * _BUCKET_GROWTH**i for i in range(_BUCKET_COUNT))
+
+# Turns whose EOU/LLM/TTS metrics have not all arrived yet
+_MAX_PENDING_TURNS = 32
+
+
+class LatencyHistogram:
+    """Fixed-size log-bucketed histogram of durations in seconds."""
+
+    __slots__ = ("count", "counts", "max", "total")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (_BUCKET_COUNT + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @staticmethod
+    def _bucket(value: float) -> int:
+        if value <= _BUCKET_START:
+            return 0
+        idx = math.ceil(math.log(value / _BUCKET_START, _BUCKET_GROWTH))
+        return min(idx, _BUCKET_COUNT)
+
+    def observe(self, value: float) -> None:
+        self.counts[self._bucket(value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        """Geometric midpoint of the bucket holding the q-th sample, capped at the max."""
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                if i == _BUCKET_COUNT:
+                    return self.max
+                if i == 0:
+                    return min(_BUCKET_START, self.max)
+                return min(math.sqrt(_BUCKET_BOUNDS[i - 1] * _BUCKET_BOUNDS[i]), self.max)
+        return self.max
+
+    def summary(self) -> dict[str, float]:
+        data = {f"p{int(q * 100)}": round(self.percentile(q), 4) for q in QUANTILES}
+        data["count"] = self.count
+        data["mean"] = round(self.total / self.count, 4) if self.count else 0.0
+        data["max"] = round(self.max, 4)
+        return data
+
+
+class _StageHistograms:
+    def __init__(self) -> None:
+        self.stages = {stage: LatencyHistogram() for stage in STAGES}
+
+    def observe(self, stage: str, value: float) -> None:
+        self.stages[stage].observe(value)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        return {stage: hist.summary() for stage, hist in self.stages.items()}
+
+
+# Aggregate over every room handled by this worker process
+WORKER_LATENCY = _StageHistograms()
+
+
+class LatencyRecorder:
+    """Collects per-turn pipeline latencies for a single room."""
+
+    def __init__(self, room: str, worker: Optional[_StageHistograms] = None) -> None:
+        self.room = room
+        self.started_at = time.time()
+        self._room = _StageHistograms()
+        self._worker = worker if worker is not None else WORKER_LATENCY
+        self._pending: OrderedDict[str, dict[str, float]] = OrderedDict()
+
+    def _observe(self, stage: str, value: float) -> None:
+        if value < 0:
+            # The plugins report -1 when a value could not be measured
+            return
+        self._room.observe(stage, value)
+        self._worker.observe(stage, value)
+
+    def _track_turn(self, speech_id: Optional[str], stage: str, value: float) -> None:
+        if not speech_id or value < 0:
+            return
+        turn = self._pending.setdefault(speech_id, {})
+        turn[stage] = value
+        if len(turn) == 3:
+            del self._pending[speech_id]
+            self._observe("voice_to_voice", sum(turn.values()))
+        elif len(self._pending) > _MAX_PENDING_TURNS:
+            self._pending.popitem(last=False)
+
+    def record(self, ev_metrics: Any) -> None:
+        """Feed one `MetricsCollectedEvent.metrics` payload."""
+        speech_id = getattr(ev_metrics, "speech_id", None)
+        if isinstance(ev_metrics, metrics.EOUMetrics):
+            stage, value = "end_of_utterance_delay", ev_metrics.end_of_utterance_delay
+        elif isinstance(ev_metrics, metrics.LLMMetrics):
+            stage, value = "llm_ttft", ev_metrics.ttft
+        elif isinstance(ev_metrics, metrics.TTSMetrics):
+            stage, value = "tts_ttfb", ev_metrics.ttfb
+        else:
+            return
+        self._observe(stage, value)
+        self._track_turn(speech_id, stage, value)
+
+    def record_tools(self, ev: Any) -> None:
+        """Feed a `FunctionToolsExecutedEvent`; duration runs from call to output."""
+        for call, output in zip(ev.function_calls, ev.function_call_outputs):
+            if output is None:
+                continue
+            self._observe("tool_call_duration", output.created_at - call.created_at)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "room": self.room,
+            "pid": os.getpid(),
+            "started_at": self.started_at,
+            "ended_at": time.time(),
+            "stages": self._room.summary(),
+        }
+
+    def export(self, out_dir: str = METRICS_DIR) -> None:
+        """Append the room summary to JSONL and rewrite the worker's Prometheus file."""
+        try:
+            os.makedirs(out_dir, exist_ok=True)
+            with open(os.path.join(out_dir, "latency.jsonl"), "a", encoding="utf-8") as f:
+                f.write(json.dumps(self.snapshot()) + "\n")
+            prom_path = os.path.join(out_dir, f"latency_worker_{os.getpid()}.prom")
+            tmp_path = prom_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(to_prometheus(self._worker))
+            os.replace(tmp_path, prom_path)
+        except OSError as e:
+            logger.error(f"Could not write latency metrics: {e}")
+            return
+        logger.info(f"Latency: {json.dumps(self._room.summary())}")
+
+
+def to_prometheus(histograms: _StageHistograms) -> str:
+    name = "voice_agent_latency_seconds"
+    lines = [
+        f"# HELP {name} Voice pipeline stage latency per turn.",
+        f"# TYPE {name} summary",
+    ]
+    for stage, hist in histograms.stages.items():
+        for q in QUANTILES:
+            lines.append(f'{name}{{stage="{stage}",quantile="{q}"}} {hist.percentile(q):.6f}')
+        lines.append(f'{name}_sum{{stage="{stage}"}} {hist.total:.6f}')
+        lines.append(f'{name}_count{{stage="{stage}"}} {hist.count}')
+    return "\n".join(lines) + "\n"
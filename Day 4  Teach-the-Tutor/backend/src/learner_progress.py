@@ -0,0 +1,225 @@
+"""Per-learner concept mastery with spaced-repetition review scheduling.
+
+Each learner gets a small JSON document under `learner_progress/`: the mode
+and topic they were last on, and per concept how often it was explained,
+quizzed and taught back, the last and average score (0-100), and when it is
+next due for review. Scores schedule reviews SM-2 style: a passing score
+pushes the next review further out each time, a failing one brings the
+concept back within minutes.
+
+`ReviewQueue` is a heap of (due time, concept) so the next concept to
+review is found in O(log n) however many concepts a learner has studied.
+"""
+
+import hashlib
+import heapq
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from persistence import load_json, update_json
+
+PROGRESS_DIR = os.getenv("LEARNER_PROGRESS_DIR", "learner_progress")
+DEFAULT_LEARNER = "default"
+
+# Scores at or above this count as recalled
+PASS_SCORE = 60
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+# A failed concept comes back this soon
+RELEARN_MINUTES = 10
+# First review after a concept is only explained
+FIRST_REVIEW_DAYS = 1
+
+SCORE_KINDS = ("quiz", "teach_back")
+# Concepts listed by name when describing a learner
+MAX_DESCRIBED = 5
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _stamp(moment: datetime) -> str:
+    # Fixed-width UTC ISO strings sort in time order, so the heap can compare them
+    return moment.astimezone(timezone.utc).isoformat(timespec="seconds")
+
+
+def progress_path(identity: str, root: str = PROGRESS_DIR) -> str:
+    digest = hashlib.sha1(identity.encode("utf-8")).hexdigest()
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "_", identity)[:48]
+    return os.path.join(root, f"{slug}-{digest[:10]}.json")
+
+
+def empty_progress() -> dict:
+    return {"mode": None, "topic": None, "concepts": {}}
+
+
+def _concept(progress: dict, concept_id: str, title: str) -> dict:
+    entry = progress["concepts"].setdefault(concept_id, {
+        "title": title,
+        "times_explained": 0,
+        "times_quizzed": 0,
+        "times_taught_back": 0,
+        "last_score": None,
+        "avg_score": None,
+        "ease": DEFAULT_EASE,
+        "repetitions": 0,
+        "interval_days": 0,
+        "due": None,
+        "last_seen": None,
+    })
+    entry["title"] = title
+    return entry
+
+
+def apply_position(progress: Optional[dict], mode: str, topic: Optional[str]) -> dict:
+    progress = progress or empty_progress()
+    progress["mode"], progress["topic"] = mode, topic
+    return progress
+
+
+def apply_explained(progress: Optional[dict], concept_id: str, title: str, now: Optional[datetime] = None) -> dict:
+    progress = progress or empty_progress()
+    now = now or _now()
+    entry = _concept(progress, concept_id, title)
+    entry["times_explained"] += 1
+    entry["last_seen"] = _stamp(now)
+    if entry["due"] is None:
+        entry["due"] = _stamp(now + timedelta(days=FIRST_REVIEW_DAYS))
+    return progress
+
+
+def apply_score(
+    progress: Optional[dict],
+    concept_id: str,
+    title: str,
+    kind: str,
+    score: int,
+    now: Optional[datetime] = None,
+) -> dict:
+    """Record a quiz or teach-back score (0-100) and reschedule the concept."""
+    progress = progress or empty_progress()
+    now = now or _now()
+    score = max(0, min(100, int(score)))
+    entry = _concept(progress, concept_id, title)
+    entry["times_quizzed" if kind == "quiz" else "times_taught_back"] += 1
+    scored = entry["times_quizzed"] + entry["times_taught_back"]
+    entry["avg_score"] = round(((entry["avg_score"] or 0) * (scored - 1) + score) / scored, 1)
+    entry["last_score"] = score
+    entry["last_seen"] = _stamp(now)
+
+    # SM-2 on a 0-5 grade
+    grade = score / 20
+    entry["ease"] = round(max(MIN_EASE, entry["ease"] + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02)), 2)
+    if score < PASS_SCORE:
+        entry["repetitions"] = 0
+        entry["interval_days"] = 0
+        entry["due"] = _stamp(now + timedelta(minutes=RELEARN_MINUTES))
+        return progress
+    entry["repetitions"] += 1
+    if entry["repetitions"] == 1:
+        entry["interval_days"] = 1
+    elif entry["repetitions"] == 2:
+        entry["interval_days"] = 6
+    else:
+        entry["interval_days"] = round(entry["interval_days"] * entry["ease"])
+    entry["due"] = _stamp(now + timedelta(days=entry["interval_days"]))
+    return progress
+
+
+class ReviewQueue:
+    """Concepts ordered by when they're next due.
+
+    Rescheduling pushes a new heap entry and leaves the old one behind;
+    stale entries are skipped when they reach the top.
+    """
+
+    def __init__(self, concepts: dict) -> None:
+        self._due = {cid: entry["due"] for cid, entry in concepts.items() if entry.get("due")}
+        self._heap = [(due, cid) for cid, due in self._due.items()]
+        heapq.heapify(self._heap)
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def schedule(self, concept_id: str, due: Optional[str]) -> None:
+        if due is None or self._due.get(concept_id) == due:
+            return
+        self._due[concept_id] = due
+        heapq.heappush(self._heap, (due, concept_id))
+
+    def peek(self) -> Optional[tuple[str, str]]:
+        """(due, concept id) of the concept to review next."""
+        while self._heap:
+            due, concept_id = self._heap[0]
+            if self._due.get(concept_id) == due:
+                return due, concept_id
+            heapq.heappop(self._heap)
+        return None
+
+    def upcoming(self, limit: int = 3) -> list[tuple[str, str]]:
+        """The next `limit` (due, concept id) pairs, soonest first."""
+        return heapq.nsmallest(limit, ((due, cid) for cid, due in self._due.items()))
+
+
+class LearnerProgress:
+    """One learner's progress: the document in memory plus its review queue."""
+
+    def __init__(self, identity: str = DEFAULT_LEARNER, data: Optional[dict] = None, root: str = PROGRESS_DIR) -> None:
+        self.identity = identity
+        self.path = progress_path(identity, root)
+        self.data = data or empty_progress()
+        self.queue = ReviewQueue(self.data["concepts"])
+
+    @classmethod
+    async def load(cls, identity: str, root: str = PROGRESS_DIR) -> "LearnerProgress":
+        return cls(identity, await load_json(progress_path(identity, root)), root)
+
+    async def _update(self, apply, *args, concept_id: Optional[str] = None) -> None:
+        # Applied to the file's current contents so two sessions of one learner don't clobber each other
+        self.data = await update_json(self.path, lambda current: apply(current, *args), indent=2)
+        if concept_id is not None:
+            self.queue.schedule(concept_id, self.data["concepts"][concept_id]["due"])
+
+    async def set_position(self, mode: str, topic: Optional[str]) -> None:
+        if (self.data["mode"], self.data["topic"]) != (mode, topic):
+            await self._update(apply_position, mode, topic)
+
+    async def record_explained(self, concept_id: str, title: str) -> None:
+        await self._update(apply_explained, concept_id, title, concept_id=concept_id)
+
+    async def record_score(self, concept_id: str, title: str, kind: str, score: int) -> dict:
+        await self._update(apply_score, concept_id, title, kind, score, concept_id=concept_id)
+        return self.data["concepts"][concept_id]
+
+    def next_review(self) -> Optional[tuple[dict, bool]]:
+        """The concept to review next and whether it's already due."""
+        top = self.queue.peek()
+        if top is None:
+            return None
+        due, concept_id = top
+        return self.data["concepts"][concept_id], due <= _stamp(_now())
+
+    def describe(self) -> str:
+        """Where the learner left off and what's due, for the instructions."""
+        concepts = self.data["concepts"]
+        if not concepts and not self.data["topic"]:
+            return "This is a new learner with no study history."
+        lines = []
+        if self.data["topic"]:
+            lines.append(f"Last session they were on {self.data['topic']} in {self.data['mode']} mode.")
+        scored = [entry for entry in concepts.values() if entry["avg_score"] is not None]
+        if scored:
+            weakest = heapq.nsmallest(MAX_DESCRIBED, scored, key=lambda entry: entry["avg_score"])
+            lines.append(f"{len(scored)} concepts scored; weakest: " + "; ".join(
+                f"{entry['title']} avg {entry['avg_score']:.0f} (last {entry['last_score']})"
+                for entry in weakest
+            ) + ".")
+        review = self.next_review()
+        if review is not None:
+            entry, is_due = review
+            when = "due now" if is_due else f"next due {entry['due'][:10]}"
+            lines.append(f"Next review: {entry['title']} ({when}).")
+        return " ".join(lines)
@@ -0,0 +1,159 @@
+"""File persistence helpers that keep disk I/O off the event loop.
+
+Function tools run on the event loop that also moves audio for the session,
+so a slow `open()`/`json.dump()` inside a tool stalls speech. These helpers
+do the file work on a small bounded thread pool instead. Writes are atomic
+(temp file + rename) and ordered per path, so a slow older write never
+replaces a newer one.
+"""
+
+import asyncio
+import contextlib
+import functools
+import json
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger("persistence")
+
+MAX_WORKERS = int(os.getenv("PERSISTENCE_MAX_WORKERS", "4"))
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="persistence")
+
+# Per-path state exists only while writes to that path are scheduled or
+# running, so writing many distinct files (one per order, per learner, ...)
+# doesn't grow these dicts without bound.
+_path_locks: dict[str, threading.Lock] = {}
+_path_locks_guard = threading.Lock()
+_in_flight: dict[str, int] = {}
+_scheduled_seq: dict[str, int] = {}
+_written_seq: dict[str, int] = {}
+
+
+def _claim(path: str) -> None:
+    # Caller holds _path_locks_guard
+    _in_flight[path] = _in_flight.get(path, 0) + 1
+    _path_locks.setdefault(path, threading.Lock())
+
+
+def _release(path: str) -> None:
+    with _path_locks_guard:
+        _in_flight[path] -= 1
+        if _in_flight[path] == 0:
+            # Nothing else is scheduled for this path; a later write starts afresh
+            del _in_flight[path]
+            del _path_locks[path]
+            _scheduled_seq.pop(path, None)
+            _written_seq.pop(path, None)
+
+
+def _next_seq(path: str) -> int:
+    """Schedule a write to `path`; `_write_ordered` must run for every seq handed out."""
+    with _path_locks_guard:
+        _claim(path)
+        seq = _scheduled_seq.get(path, 0) + 1
+        _scheduled_seq[path] = seq
+        return seq
+
+
+def write_text_atomic(path: str, text: str) -> None:
+    """Write `text` to `path` through a temp file so readers never see half a file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_path)
+        raise
+
+
+def read_json(path: str, default: Any = None) -> Any:
+    if not os.path.exists(path):
+        return default
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_ordered(path: str, text: str, seq: int) -> None:
+    try:
+        with _path_locks[path]:
+            if seq < _written_seq.get(path, 0):
+                # A newer snapshot of this file already landed
+                return
+            write_text_atomic(path, text)
+            _written_seq[path] = seq
+    finally:
+        _release(path)
+
+
+def _update_json(path: str, update: Callable[[Any], Any], default: Any, dump_kwargs: dict) -> Any:
+    path = os.path.abspath(path)
+    with _path_locks_guard:
+        _claim(path)
+    try:
+        with _path_locks[path]:
+            data = update(read_json(path, default))
+            write_text_atomic(path, json.dumps(data, **dump_kwargs))
+            return data
+    finally:
+        _release(path)
+
+
+async def run_blocking(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking callable on the persistence pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+
+
+async def load_json(path: str, default: Any = None) -> Any:
+    return await run_blocking(read_json, path, default)
+
+
+async def save_text(path: str, text: str) -> None:
+    path = os.path.abspath(path)
+    await run_blocking(_write_ordered, path, text, _next_seq(path))
+
+
+async def save_json(path: str, data: Any, **dump_kwargs: Any) -> None:
+    """Snapshot `data` now, on the caller's thread, then write it off the loop."""
+    await save_text(path, json.dumps(data, **dump_kwargs))
+
+
+async def update_json(
+    path: str, update: Callable[[Any], Any], default: Any = None, **dump_kwargs: Any
+) -> Any:
+    """Read-modify-write a JSON file under a per-path lock; returns the new data."""
+    return await run_blocking(_update_json, path, update, default, dump_kwargs)
+
+
+def _log_failure(path: str, future: Future) -> None:
+    exc = future.exception()
+    if exc is not None:
+        logger.error(f"Background write to {path} failed: {exc}")
+
+
+def save_json_soon(path: str, data: Any, **dump_kwargs: Any) -> Optional[Future]:
+    """Fire-and-forget `save_json` for synchronous callers.
+
+    Inside a running event loop the write is handed to the pool and this
+    returns immediately; without one (CLI scripts) it writes inline.
+    """
+    path = os.path.abspath(path)
+    text = json.dumps(data, **dump_kwargs)
+    seq = _next_seq(path)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        _write_ordered(path, text, seq)
+        return None
+    future = _executor.submit(_write_ordered, path, text, seq)
+    future.add_done_callback(functools.partial(_log_failure, path))
+    return future
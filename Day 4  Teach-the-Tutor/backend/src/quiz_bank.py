@@ -0,0 +1,179 @@
+"""Quiz questions generated ahead of time, in batches, per topic.
+
+Asking the LLM for a fresh question on every quiz turn puts a full
+generation between the user's answer and the next question. `QuizBank`
+instead asks for a batch of questions with reference answers in the
+background as soon as a topic is picked in quiz mode, keeps them per topic
+for a while, and hands them out one at a time, so asking the next question
+costs only the TTS. The batch is topped up in the background when it runs
+low. Each question expires `QUIZ_CACHE_TTL` after its own batch arrived, so
+a refill never inherits the age of the questions it joins.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from collections.abc import Awaitable
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from livekit.agents import llm
+
+logger = logging.getLogger("quiz_bank")
+
+BATCH_SIZE = int(os.getenv("QUIZ_BATCH_SIZE", "5"))
+# Generated questions are dropped after this long
+QUIZ_CACHE_TTL = float(os.getenv("QUIZ_CACHE_TTL_SECONDS", "3600"))
+# Top the batch up when this few questions are left
+REFILL_BELOW = 2
+# Topics kept at once; the least recently used is dropped beyond this
+MAX_TOPICS = 256
+
+QUIZ_PROMPT = """Write {count} short quiz questions about {topic} for a beginner, to be asked out loud in a voice conversation.
+Each question must be answerable in a sentence or two, without code or diagrams.
+{seed}Reply with only a JSON array, no other text: [{{"question": "...", "answer": "..."}}]
+The answer is a short reference answer for judging the learner's reply."""
+
+# (topic, count, seed material) -> [{"question": ..., "answer": ...}]
+Generator = Callable[[str, int, str], Awaitable[list[dict]]]
+
+# Used instead of the session's LLM when set; the offline benchmarks swap in a fake here
+QUESTION_GENERATOR: Optional[Generator] = None
+
+
+@dataclass
+class _TopicQuestions:
+    # (expires_at, question), oldest first
+    questions: deque = field(default_factory=deque)
+    pending: Optional[asyncio.Task] = None
+
+    def prune(self) -> None:
+        """Drop the questions that have expired."""
+        now = time.monotonic()
+        while self.questions and self.questions[0][0] <= now:
+            self.questions.popleft()
+
+
+def topic_key(topic: str) -> str:
+    return " ".join(topic.lower().split())
+
+
+def parse_questions(text: str) -> list[dict]:
+    """The question/answer pairs in an LLM reply, ignoring any text around the JSON."""
+    start, end = text.find("["), text.rfind("]")
+    if start < 0 or end <= start:
+        return []
+    try:
+        items = json.loads(text[start:end + 1])
+    except ValueError:
+        return []
+    return [
+        {"question": str(item["question"]).strip(), "answer": str(item.get("answer", "")).strip()}
+        for item in items
+        if isinstance(item, dict) and str(item.get("question", "")).strip()
+    ]
+
+
+def llm_generator(model: llm.LLM) -> Generator:
+    """Generate questions with `model`, outside of the conversation's chat context."""
+
+    async def generate(topic: str, count: int, seed: str = "") -> list[dict]:
+        chat_ctx = llm.ChatContext()
+        chat_ctx.add_message(
+            role="user",
+            content=QUIZ_PROMPT.format(
+                count=count,
+                topic=topic,
+                seed=f"Build on this course material: {seed}\n" if seed else "",
+            ),
+        )
+        parts = []
+        async with model.chat(chat_ctx=chat_ctx) as stream:
+            async for chunk in stream:
+                if chunk.delta and chunk.delta.content:
+                    parts.append(chunk.delta.content)
+        return parse_questions("".join(parts))
+
+    return generate
+
+
+def generator_for(model: llm.LLM) -> Generator:
+    return QUESTION_GENERATOR or llm_generator(model)
+
+
+class QuizBank:
+    """Prepared questions per topic, shared by every session in the process."""
+
+    def __init__(self, batch_size: int = BATCH_SIZE, ttl: float = QUIZ_CACHE_TTL) -> None:
+        self.batch_size = batch_size
+        self.ttl = ttl
+        self._topics: dict[str, _TopicQuestions] = {}
+        self.served = 0
+        self.misses = 0
+
+    def _entry(self, topic: str) -> _TopicQuestions:
+        key = topic_key(topic)
+        entry = self._topics.get(key)
+        if entry is None:
+            entry = self._topics[key] = _TopicQuestions()
+            if len(self._topics) > MAX_TOPICS:
+                oldest = next(iter(self._topics))
+                self._topics.pop(oldest)
+        else:
+            # Most recently used last
+            self._topics[key] = self._topics.pop(key)
+            entry.prune()
+        return entry
+
+    def prefetch(self, topic: str, generate: Generator, seed: str = "") -> None:
+        """Start generating a batch for `topic` unless one is ready or on its way."""
+        entry = self._entry(topic)
+        if entry.pending is not None or len(entry.questions) >= REFILL_BELOW:
+            return
+
+        async def fill() -> None:
+            started = time.perf_counter()
+            try:
+                questions = await generate(topic, self.batch_size, seed)
+            except Exception as e:
+                logger.warning(f"Quiz generation for {topic!r} failed: {e}")
+                return
+            finally:
+                entry.pending = None
+            expires_at = time.monotonic() + self.ttl
+            entry.questions.extend((expires_at, question) for question in questions)
+            logger.info(
+                f"Prepared {len(questions)} quiz questions for {topic!r} "
+                f"in {(time.perf_counter() - started) * 1000:.0f}ms"
+            )
+
+        entry.pending = asyncio.get_running_loop().create_task(fill())
+
+    def next_question(self, topic: str, generate: Optional[Generator] = None, seed: str = "") -> Optional[dict]:
+        """A prepared question for `topic`, or None when none is ready yet.
+
+        With `generate`, the batch is topped up in the background when it runs low.
+        """
+        entry = self._entry(topic)
+        question = entry.questions.popleft()[1] if entry.questions else None
+        if question is None:
+            self.misses += 1
+        else:
+            self.served += 1
+        if generate is not None and len(entry.questions) < REFILL_BELOW:
+            self.prefetch(topic, generate, seed)
+        return question
+
+
+_bank: Optional[QuizBank] = None
+
+
+def get_quiz_bank() -> QuizBank:
+    """The process-wide question bank."""
+    global _bank
+    if _bank is None:
+        _bank = QuizBank()
+    return _bank
@@ -0,0 +1,196 @@
+"""Course content for the tutor, indexed for concept lookup.
+
+Concepts live in JSON files (`shared-data/day4_tutor_content.json` by
+default): a list of objects with `id`, `title`, `summary`,
+`sample_question` and optional `aliases`. They are loaded once per worker
+process into a `ContentIndex`, which finds a concept by id, by title or alias
+words, or by a fuzzy match for misheard titles ("veriables"). The files are
+checked for changes every few seconds and reloaded when edited, so content
+can be updated without restarting the worker.
+"""
+
+import difflib
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger("tutor_content")
+
+CONTENT_PATH = os.getenv(
+    "TUTOR_CONTENT_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "shared-data", "day4_tutor_content.json"),
+)
+# How often the content files are checked for changes
+RELOAD_CHECK_SECONDS = 2.0
+# Lowest score find() counts as a match
+MIN_SCORE = 0.5
+
+# Words that say nothing about which concept is meant
+STOPWORDS = {
+    "a", "an", "and", "about", "are", "coding", "do", "how", "i", "in", "is",
+    "me", "of", "on", "please", "programming", "python", "tell", "the", "to",
+    "what", "with",
+}
+
+
+@dataclass(frozen=True)
+class Concept:
+    id: str
+    title: str
+    summary: str
+    sample_question: str
+    aliases: tuple[str, ...] = ()
+
+
+def _normalize(text: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased words without stopwords, plurals folded ("loops" -> "loop")."""
+    words = []
+    for word in _normalize(text).split():
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+class ContentIndex:
+    def __init__(self, concepts: list[Concept]) -> None:
+        self.concepts = concepts
+        self.by_id = {concept.id: concept for concept in concepts}
+        # Whole id/title/alias -> concept id
+        self._names: dict[str, str] = {}
+        # Title/alias word -> concept ids
+        self._postings: dict[str, set[str]] = {}
+        for concept in concepts:
+            for name in (concept.id, concept.title, *concept.aliases):
+                self._names.setdefault(_normalize(name), concept.id)
+                for word in tokenize(name):
+                    self._postings.setdefault(word, set()).add(concept.id)
+        self._vocabulary = list(self._postings)
+
+    def get(self, concept_id: str) -> Optional[Concept]:
+        return self.by_id.get(concept_id)
+
+    def find(self, query: str, limit: int = 3) -> list[tuple[Concept, float]]:
+        """Best matching concepts for `query`, with scores from 0 to 1."""
+        key = _normalize(query)
+        if key in self._names:
+            return [(self.by_id[self._names[key]], 1.0)]
+
+        words = tokenize(query)
+        scores: dict[str, float] = {}
+        for word in words:
+            if word in self._postings:
+                matches = [(word, 1.0)]
+            else:
+                # Misheard or misspelled word: closest indexed word, at a discount
+                matches = [(close, 0.8) for close in difflib.get_close_matches(word, self._vocabulary, 1, 0.8)]
+            for term, weight in matches:
+                for concept_id in self._postings[term]:
+                    scores[concept_id] = scores.get(concept_id, 0.0) + weight / len(words)
+
+        for name in difflib.get_close_matches(key, self._names, limit, 0.6):
+            concept_id = self._names[name]
+            ratio = difflib.SequenceMatcher(None, key, name).ratio()
+            scores[concept_id] = max(scores.get(concept_id, 0.0), ratio)
+
+        ranked = sorted(scores.items(), key=lambda item: -item[1])
+        return [(self.by_id[concept_id], round(score, 2)) for concept_id, score in ranked[:limit]]
+
+    def best(self, query: str) -> Optional[Concept]:
+        """The concept `query` clearly refers to: a good enough match and no tie."""
+        matches = self.find(query, limit=2)
+        if not matches or matches[0][1] < MIN_SCORE:
+            return None
+        if len(matches) > 1 and matches[1][1] == matches[0][1]:
+            return None
+        return matches[0][0]
+
+
+def _content_files(path: str) -> list[str]:
+    if os.path.isdir(path):
+        return sorted(
+            os.path.join(path, name) for name in os.listdir(path) if name.endswith(".json")
+        )
+    return [path]
+
+
+def load_concepts(path: str) -> list[Concept]:
+    concepts: dict[str, Concept] = {}
+    for file_path in _content_files(path):
+        with open(file_path, encoding="utf-8") as f:
+            items = json.load(f)
+        for item in items:
+            concepts[item["id"]] = Concept(
+                id=item["id"],
+                title=item["title"],
+                summary=item["summary"],
+                sample_question=item["sample_question"],
+                aliases=tuple(item.get("aliases", ())),
+            )
+    return list(concepts.values())
+
+
+class TutorContent:
+    """The content index for a file or directory of files, reloaded when they change."""
+
+    def __init__(self, path: str = CONTENT_PATH) -> None:
+        self.path = path
+        self._index = ContentIndex([])
+        self._signature: Optional[tuple] = None
+        self._checked_at = 0.0
+
+    def _current_signature(self) -> tuple:
+        signature = []
+        for file_path in _content_files(self.path):
+            try:
+                st = os.stat(file_path)
+                signature.append((file_path, st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                signature.append((file_path, None, None))
+        return tuple(signature)
+
+    def reload(self) -> None:
+        self._signature = self._current_signature()
+        try:
+            concepts = load_concepts(self.path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # Keep serving the last good content until the files change again
+            logger.error(f"Could not load tutor content from {self.path}: {e}")
+            return
+        self._index = ContentIndex(concepts)
+        logger.info(f"Loaded {len(concepts)} tutor concepts from {self.path}")
+
+    @property
+    def index(self) -> ContentIndex:
+        now = time.monotonic()
+        if now - self._checked_at >= RELOAD_CHECK_SECONDS:
+            self._checked_at = now
+            if self._current_signature() != self._signature:
+                self.reload()
+        return self._index
+
+
+_content: Optional[TutorContent] = None
+
+
+def get_tutor_content() -> TutorContent:
+    """The process-wide content store."""
+    global _content
+    if _content is None:
+        _content = TutorContent()
+    return _content
+
+
+def prewarm_content() -> None:
+    """Load the content from a worker's prewarm_fnc, before the first session."""
+    get_tutor_content().reload()
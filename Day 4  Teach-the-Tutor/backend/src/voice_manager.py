@@ -1,27 +1,183 @@
-"""Voice Manager for different learning modes"""
+"""Voice Manager for different learning modes
 
+Switching modes used to build a new `murf.TTS` every time, so the first
+utterance in the new voice paid for a fresh websocket handshake. `TTSPool`
+keeps one TTS per (voice, style) for the whole worker process instead: the
+mode voices are warmed (connected) when a session starts, reused across mode
+switches and sessions, and closed after sitting unused for a while.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import weakref
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Callable, ClassVar, Optional
+
+import aiohttp
+from livekit.agents import tokenize, tts
 from livekit.plugins import murf
-from livekit.agents import tokenize
+
+logger = logging.getLogger("voice_manager")
+
+DEFAULT_STYLE = "Conversation"
+# Unused voices are closed after this long
+IDLE_TTL = float(os.getenv("TTS_POOL_IDLE_SECONDS", "600"))
+
+# Builds the TTS for a (voice, style); None means Murf. The offline benchmarks
+# swap in a fake here.
+TTS_FACTORY: Optional[Callable[[str, str], tts.TTS]] = None
+
+
+def make_murf_tts(
+    voice: str,
+    style: str = DEFAULT_STYLE,
+    http_session: Optional[aiohttp.ClientSession] = None,
+) -> tts.TTS:
+    return murf.TTS(
+        voice=voice,
+        style=style,
+        tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=2),
+        text_pacing=True,
+        http_session=http_session,
+    )
+
+
+@dataclass
+class _PooledTTS:
+    tts: tts.TTS
+    refs: int = 0
+    last_used: float = 0.0
+
+
+class TTSPool:
+    """TTS instances shared by every session on one event loop, keyed by (voice, style)"""
+
+    def __init__(
+        self,
+        factory: Optional[Callable[[str, str], tts.TTS]] = None,
+        idle_ttl: float = IDLE_TTL,
+    ) -> None:
+        self._factory = factory
+        self.idle_ttl = idle_ttl
+        self._entries: dict[tuple[str, str], _PooledTTS] = {}
+        self._keys: dict[int, tuple[str, str]] = {}
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        self._reaper: Optional[asyncio.Task] = None
+
+    def _create(self, voice: str, style: str) -> tts.TTS:
+        if self._factory is not None:
+            return self._factory(voice, style)
+        if self._http_session is None or self._http_session.closed:
+            # Our own session: the job's shared one is closed when that job ends
+            self._http_session = aiohttp.ClientSession()
+        return make_murf_tts(voice, style, self._http_session)
+
+    def _entry(self, voice: str, style: str) -> _PooledTTS:
+        key = (voice, style)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = _PooledTTS(tts=self._create(voice, style), last_used=time.monotonic())
+            self._entries[key] = entry
+            self._keys[id(entry.tts)] = key
+            logger.info(f"Created TTS for {voice} ({style})")
+        if self._reaper is None:
+            self._reaper = asyncio.get_running_loop().create_task(self._reap())
+        return entry
+
+    def acquire(self, voice: str, style: str = DEFAULT_STYLE) -> tts.TTS:
+        """Get the shared TTS for a voice; pair every call with `release`."""
+        entry = self._entry(voice, style)
+        entry.refs += 1
+        entry.last_used = time.monotonic()
+        return entry.tts
+
+    def release(self, instance: tts.TTS) -> None:
+        key = self._keys.get(id(instance))
+        entry = self._entries.get(key) if key else None
+        if entry is not None and entry.refs > 0:
+            entry.refs -= 1
+            entry.last_used = time.monotonic()
+
+    def warm(self, voices: Iterable[str], style: str = DEFAULT_STYLE) -> None:
+        """Create the TTS for each voice and start connecting it in the background."""
+        for voice in voices:
+            entry = self._entry(voice, style)
+            entry.tts.prewarm()
+
+    async def evict_idle(self) -> int:
+        """Close voices nobody has used for `idle_ttl` seconds."""
+        now = time.monotonic()
+        idle = [
+            key for key, entry in self._entries.items()
+            if entry.refs == 0 and now - entry.last_used > self.idle_ttl
+        ]
+        for key in idle:
+            entry = self._entries.pop(key)
+            self._keys.pop(id(entry.tts), None)
+            await entry.tts.aclose()
+            logger.info(f"Closed idle TTS for {key[0]} ({key[1]})")
+        return len(idle)
+
+    async def _reap(self) -> None:
+        while True:
+            await asyncio.sleep(max(1.0, self.idle_ttl / 2))
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                logger.error(f"TTS pool eviction failed: {e}")
+
+    async def aclose(self) -> None:
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        entries, self._entries = list(self._entries.values()), {}
+        self._keys.clear()
+        for entry in entries:
+            await entry.tts.aclose()
+        if self._http_session is not None:
+            await self._http_session.close()
+            self._http_session = None
+
+
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, TTSPool]" = weakref.WeakKeyDictionary()
+
+
+def get_tts_pool() -> TTSPool:
+    """The pool for the running event loop (websockets can't move between loops)."""
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = _pools[loop] = TTSPool(factory=TTS_FACTORY)
+    return pool
 
 
 class VoiceManager:
     """Manages different voices for different learning modes"""
-    
+
+    VOICES: ClassVar[dict[str, str]] = {
+        "learn": "en-US-matthew",      # Friendly teacher voice
+        "quiz": "en-US-alicia",       # Encouraging questioner voice
+        "teach_back": "en-US-ken",    # Supportive evaluator voice
+        "greeting": "en-US-matthew"   # Default greeting voice
+    }
+
+    @staticmethod
+    def voice_for_mode(mode: str) -> str:
+        return VoiceManager.VOICES.get(mode, "en-US-matthew")
+
+    @staticmethod
+    def get_tts_for_mode(mode: str) -> tts.TTS:
+        """Get the pooled TTS voice for the learning mode; hand it back with `release_tts`"""
+        return get_tts_pool().acquire(VoiceManager.voice_for_mode(mode))
+
+    @staticmethod
+    def release_tts(instance: tts.TTS) -> None:
+        get_tts_pool().release(instance)
+
     @staticmethod
-    def get_tts_for_mode(mode: str):
-        """Get appropriate TTS voice for the learning mode"""
-        voice_config = {
-            "learn": "en-US-matthew",      # Friendly teacher voice
-            "quiz": "en-US-alicia",       # Encouraging questioner voice  
-            "teach_back": "en-US-ken",    # Supportive evaluator voice
-            "greeting": "en-US-matthew"   # Default greeting voice
-        }
-        
-        voice = voice_config.get(mode, "en-US-matthew")
-        
-        return murf.TTS(
-            voice=voice,
-            style="Conversation",
-            tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=2),
-            text_pacing=True
-        )
\ No newline at end of file
+    def warm_voices() -> None:
+        """Connect every mode's voice ahead of the first switch"""
+        get_tts_pool().warm(sorted(set(VoiceManager.VOICES.values())))
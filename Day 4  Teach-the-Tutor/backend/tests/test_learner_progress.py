@@ -0,0 +1,104 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from learner_progress import (
+    RELEARN_MINUTES,
+    LearnerProgress,
+    ReviewQueue,
+    apply_explained,
+    apply_score,
+)
+
+NOW = datetime(2025, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _due(progress: dict, concept_id: str = "loops") -> datetime:
+    return datetime.fromisoformat(progress["concepts"][concept_id]["due"])
+
+
+def test_passing_scores_push_reviews_further_out() -> None:
+    progress = None
+    intervals = []
+    for _ in range(4):
+        progress = apply_score(progress, "loops", "Loops", "quiz", 100, now=NOW)
+        entry = progress["concepts"]["loops"]
+        intervals.append(entry["interval_days"])
+        assert _due(progress) == NOW + timedelta(days=entry["interval_days"])
+    # 1 day, 6 days, then the previous interval times the growing ease
+    assert intervals == [1, 6, round(6 * 2.8), round(round(6 * 2.8) * 2.9)]
+    assert entry["repetitions"] == 4
+    assert (entry["times_quizzed"], entry["avg_score"]) == (4, 100)
+
+
+def test_failing_score_brings_the_concept_back_soon() -> None:
+    progress = apply_score(None, "loops", "Loops", "quiz", 100, now=NOW)
+    progress = apply_score(progress, "loops", "Loops", "quiz", 100, now=NOW)
+    progress = apply_score(progress, "loops", "Loops", "teach_back", 40, now=NOW)
+    entry = progress["concepts"]["loops"]
+    assert (entry["repetitions"], entry["interval_days"]) == (0, 0)
+    assert _due(progress) == NOW + timedelta(minutes=RELEARN_MINUTES)
+    assert entry["ease"] < 2.5
+    assert (entry["last_score"], entry["avg_score"], entry["times_taught_back"]) == (40, 80, 1)
+
+    # Recalled again: the schedule starts over from one day
+    progress = apply_score(progress, "loops", "Loops", "quiz", 80, now=NOW)
+    assert progress["concepts"]["loops"]["interval_days"] == 1
+
+
+def test_explaining_schedules_a_first_review_only_once() -> None:
+    progress = apply_explained(None, "loops", "Loops", now=NOW)
+    assert _due(progress) == NOW + timedelta(days=1)
+    progress = apply_explained(progress, "loops", "Loops", now=NOW + timedelta(hours=5))
+    assert _due(progress) == NOW + timedelta(days=1)
+    assert progress["concepts"]["loops"]["times_explained"] == 2
+
+
+def test_review_queue_peek_skips_rescheduled_entries() -> None:
+    queue = ReviewQueue({
+        "loops": {"due": "2025-03-01T10:00:00+00:00"},
+        "functions": {"due": "2025-03-02T10:00:00+00:00"},
+        "variables": {"due": None},
+    })
+    assert len(queue) == 2
+    assert queue.peek() == ("2025-03-01T10:00:00+00:00", "loops")
+
+    # The old heap entry for loops stays behind and must be skipped
+    queue.schedule("loops", "2025-03-05T10:00:00+00:00")
+    assert queue.peek() == ("2025-03-02T10:00:00+00:00", "functions")
+    assert len(queue._heap) == 2  # the stale entry was popped
+
+    queue.schedule("variables", "2025-03-01T09:00:00+00:00")
+    assert queue.peek() == ("2025-03-01T09:00:00+00:00", "variables")
+    assert queue.upcoming(3) == [
+        ("2025-03-01T09:00:00+00:00", "variables"),
+        ("2025-03-02T10:00:00+00:00", "functions"),
+        ("2025-03-05T10:00:00+00:00", "loops"),
+    ]
+
+
+async def test_progress_round_trips_through_the_file(tmp_path) -> None:
+    root = str(tmp_path)
+    progress = LearnerProgress("Ada Lovelace", root=root)
+    await progress.set_position("quiz", "loops")
+    await progress.record_explained("loops", "Loops")
+    entry = await progress.record_score("functions", "Functions", "quiz", 30)
+    assert entry["last_score"] == 30
+
+    with open(progress.path, encoding="utf-8") as f:
+        assert json.load(f) == progress.data
+
+    reloaded = await LearnerProgress.load("Ada Lovelace", root=root)
+    assert reloaded.data == progress.data
+    assert reloaded.queue.peek() == progress.queue.peek()
+    assert reloaded.next_review()[0]["title"] == "Functions"
+
+
+async def test_two_sessions_of_one_learner_do_not_clobber_each_other(tmp_path) -> None:
+    root = str(tmp_path)
+    first = LearnerProgress("ada", root=root)
+    second = LearnerProgress("ada", root=root)
+    await first.record_score("loops", "Loops", "quiz", 90)
+    await second.record_score("functions", "Functions", "quiz", 70)
+
+    reloaded = await LearnerProgress.load("ada", root=root)
+    assert sorted(reloaded.data["concepts"]) == ["functions", "loops"]
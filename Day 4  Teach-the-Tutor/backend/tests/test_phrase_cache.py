@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+from livekit.agents import APIConnectOptions, tts, utils
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS
+
+import phrase_cache
+from phrase_cache import PhraseCache, prewarm_phrases, voice_id
+
+
+class SlowTTS(tts.TTS):
+    """Renders a short silence after `delay` seconds."""
+
+    def __init__(self, delay: float) -> None:
+        super().__init__(capabilities=tts.TTSCapabilities(streaming=False), sample_rate=16000, num_channels=1)
+        self.delay = delay
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> "SlowStream":
+        return SlowStream(tts=self, input_text=text, conn_options=conn_options)
+
+
+class SlowStream(tts.ChunkedStream):
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        await asyncio.sleep(self._tts.delay)
+        output_emitter.initialize(
+            request_id=utils.shortuuid(), sample_rate=16000, num_channels=1, mime_type="audio/pcm"
+        )
+        output_emitter.push(b"\x00\x00" * 320)
+        output_emitter.flush()
+
+
+def test_prewarm_renders_concurrently(tmp_path, monkeypatch) -> None:
+    cache = PhraseCache(str(tmp_path))
+    monkeypatch.setattr(phrase_cache, "_cache", cache)
+    texts = [f"phrase {i}" for i in range(8)]
+
+    started = time.monotonic()
+    prewarm_phrases([(lambda http: SlowTTS(0.3), texts)], timeout=10)
+    # Eight 0.3 s renders, four at a time
+    assert time.monotonic() - started < 1.5
+    assert cache.rendered == 8
+    assert all(cache.load(voice_id(SlowTTS(0)), text) for text in texts)
+
+
+def test_prewarm_stops_at_timeout(tmp_path, monkeypatch) -> None:
+    cache = PhraseCache(str(tmp_path))
+    monkeypatch.setattr(phrase_cache, "_cache", cache)
+
+    started = time.monotonic()
+    prewarm_phrases([(lambda http: SlowTTS(0.1), ["quick"]), (lambda http: SlowTTS(30), ["slow"])], timeout=0.5)
+    assert time.monotonic() - started < 2
+    assert cache.load(voice_id(SlowTTS(0)), "quick") is not None
+    assert cache.load(voice_id(SlowTTS(0)), "slow") is None
@@ -0,0 +1,51 @@
+import asyncio
+
+import quiz_bank
+from quiz_bank import QuizBank
+
+
+def _generator(calls: list[str]):
+    async def generate(topic: str, count: int, seed: str = "") -> list[dict]:
+        calls.append(topic)
+        await asyncio.sleep(0)
+        return [{"question": f"{topic} q{len(calls)}.{i}", "answer": "a"} for i in range(count)]
+
+    return generate
+
+
+async def _settle(bank: QuizBank, topic: str) -> None:
+    pending = bank._entry(topic).pending
+    if pending is not None:
+        await pending
+
+
+async def test_refill_after_ttl_keeps_the_new_batch(monkeypatch) -> None:
+    now = [1000.0]
+    monkeypatch.setattr(quiz_bank.time, "monotonic", lambda: now[0])
+    calls: list[str] = []
+    bank = QuizBank(batch_size=3, ttl=60)
+
+    bank.prefetch("loops", _generator(calls))
+    await _settle(bank, "loops")
+    # Two served, one left: below REFILL_BELOW, so a refill starts
+    assert bank.next_question("loops")["question"] == "loops q1.0"
+    assert bank.next_question("loops", _generator(calls))["question"] == "loops q1.1"
+
+    # The refill lands after the first batch has expired
+    now[0] += 61
+    await _settle(bank, "loops")
+    assert [bank.next_question("loops")["question"] for _ in range(3)] == [
+        "loops q2.0", "loops q2.1", "loops q2.2",
+    ]
+    assert bank.next_question("loops") is None
+
+
+async def test_expired_questions_are_not_served(monkeypatch) -> None:
+    now = [0.0]
+    monkeypatch.setattr(quiz_bank.time, "monotonic", lambda: now[0])
+    bank = QuizBank(batch_size=2, ttl=10)
+
+    bank.prefetch("recursion", _generator([]))
+    await _settle(bank, "recursion")
+    now[0] += 11
+    assert bank.next_question("recursion") is None
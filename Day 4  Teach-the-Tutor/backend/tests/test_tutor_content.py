@@ -0,0 +1,76 @@
+import json
+import os
+
+import tutor_content
+from tutor_content import Concept, ContentIndex, TutorContent
+
+
+def _concept(concept_id: str, title: str, *aliases: str) -> Concept:
+    return Concept(concept_id, title, f"About {title}.", f"What is {title}?", aliases)
+
+
+INDEX = ContentIndex([
+    _concept("variables", "Variables", "names"),
+    _concept("loops", "Loops", "for loop", "while loop"),
+    _concept("functions", "Functions", "def"),
+    _concept("for_else", "For Else", "loop else"),
+])
+
+
+def test_find_matches_ids_titles_and_aliases_exactly() -> None:
+    assert INDEX.find("variables") == [(INDEX.get("variables"), 1.0)]
+    assert INDEX.find("  For Else ") == [(INDEX.get("for_else"), 1.0)]
+    assert INDEX.find("while loop")[0] == (INDEX.get("loops"), 1.0)
+
+
+def test_find_scores_words_and_misheard_titles() -> None:
+    concept, score = INDEX.find("tell me about veriables")[0]
+    assert concept.id == "variables" and 0.5 <= score < 1.0
+    # Plurals fold, stopwords are ignored
+    assert INDEX.find("what are the functions in python")[0][0].id == "functions"
+    assert INDEX.find("quantum chromodynamics") == []
+
+
+def test_best_needs_a_clear_winner() -> None:
+    assert INDEX.best("veriables").id == "variables"
+    assert INDEX.best("def").id == "functions"
+    # "loop" is in both the loops and for_else aliases
+    assert INDEX.best("loop") is None
+    assert INDEX.best("quantum chromodynamics") is None
+
+
+def _write(path: str, items: list[dict]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(items, f)
+
+
+def _item(concept_id: str, title: str) -> dict:
+    return {"id": concept_id, "title": title, "summary": "s", "sample_question": "q"}
+
+
+def test_content_reloads_when_a_file_changes(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(tutor_content, "RELOAD_CHECK_SECONDS", 0.0)
+    _write(os.path.join(str(tmp_path), "basics.json"), [_item("variables", "Variables")])
+    content = TutorContent(str(tmp_path))
+    assert [c.id for c in content.index.concepts] == ["variables"]
+
+    _write(os.path.join(str(tmp_path), "basics.json"), [_item("variables", "Variables"), _item("loops", "Loops")])
+    _write(os.path.join(str(tmp_path), "more.json"), [_item("functions", "Functions")])
+    assert content.index.best("functions").id == "functions"
+    assert sorted(content.index.by_id) == ["functions", "loops", "variables"]
+
+
+def test_unreadable_content_keeps_the_last_good_index(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(tutor_content, "RELOAD_CHECK_SECONDS", 0.0)
+    path = os.path.join(str(tmp_path), "content.json")
+    _write(path, [_item("loops", "Loops")])
+    content = TutorContent(path)
+    assert content.index.get("loops") is not None
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[{")
+    assert content.index.get("loops") is not None
+
+    _write(path, [_item("functions", "Functions")])
+    assert content.index.get("loops") is None
+    assert content.index.get("functions") is not None
@@ -0,0 +1,78 @@
+import asyncio
+
+from voice_manager import TTSPool
+
+
+class FakeTTS:
+    """Records prewarm and close calls; the pool needs nothing else."""
+
+    def __init__(self, voice: str, style: str) -> None:
+        self.voice = voice
+        self.style = style
+        self.prewarmed = False
+        self.closed = False
+
+    def prewarm(self) -> None:
+        self.prewarmed = True
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+async def test_acquire_shares_one_tts_per_voice_and_style() -> None:
+    pool = TTSPool(factory=FakeTTS)
+    try:
+        first = pool.acquire("en-US-matthew")
+        assert pool.acquire("en-US-matthew") is first
+        assert pool.acquire("en-US-alicia") is not first
+        assert pool.acquire("en-US-matthew", style="Promo") is not first
+        assert (first.voice, first.style) == ("en-US-matthew", "Conversation")
+        assert pool._entries[("en-US-matthew", "Conversation")].refs == 2
+    finally:
+        await pool.aclose()
+    assert first.closed
+
+
+async def test_release_counts_down_and_ignores_unknown_instances() -> None:
+    pool = TTSPool(factory=FakeTTS)
+    try:
+        instance = pool.acquire("en-US-ken")
+        entry = pool._entries[("en-US-ken", "Conversation")]
+        pool.release(instance)
+        pool.release(instance)
+        assert entry.refs == 0
+        pool.release(FakeTTS("en-US-ken", "Conversation"))
+        assert entry.refs == 0
+    finally:
+        await pool.aclose()
+
+
+async def test_only_unused_voices_are_evicted_after_the_idle_ttl() -> None:
+    pool = TTSPool(factory=FakeTTS, idle_ttl=0.01)
+    try:
+        in_use = pool.acquire("en-US-matthew")
+        released = pool.acquire("en-US-alicia")
+        pool.release(released)
+        assert await pool.evict_idle() == 0  # released just now
+
+        await asyncio.sleep(0.02)
+        assert await pool.evict_idle() == 1
+        assert released.closed and not in_use.closed
+        assert pool.acquire("en-US-matthew") is in_use
+        # An evicted voice gets a fresh instance on its next use
+        assert pool.acquire("en-US-alicia") is not released
+    finally:
+        await pool.aclose()
+
+
+async def test_warm_prewarms_without_holding_a_reference() -> None:
+    pool = TTSPool(factory=FakeTTS, idle_ttl=0.01)
+    try:
+        pool.warm(["en-US-matthew", "en-US-ken"])
+        warmed = [entry.tts for entry in pool._entries.values()]
+        assert len(warmed) == 2 and all(t.prewarmed for t in warmed)
+
+        await asyncio.sleep(0.02)
+        assert await pool.evict_idle() == 2
+    finally:
+        await pool.aclose()
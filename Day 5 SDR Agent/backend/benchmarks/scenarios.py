@@ -0,0 +1,63 @@
+"""Scripted conversation used by the offline benchmarks.
+
+`agent` reads `data/` relative to the working directory at import time, so the
+benchmarks must be started from the backend directory.
+"""
+
+import itertools
+import os
+import shutil
+
+from fake_plugins import FakeResponse, ToolCall
+
+from agent import Userdata, ZerodhaSDRAssistant
+
+AGENT_NAME = "zerodha_sdr"
+
+DATA_DIR = os.path.abspath("data")
+
+_rooms = itertools.count(1)
+
+SCRIPT = [
+    ("Hi, what does Zerodha do?", FakeResponse(
+        text="Zerodha lets you trade stocks, F&O and invest in mutual funds.",
+        tool_calls=[ToolCall("search_zerodha_faq", {"query": "what does zerodha do"})],
+    )),
+    ("How much are the brokerage charges?", FakeResponse(
+        text="Equity delivery is free and intraday is a flat fee per order.",
+        tool_calls=[ToolCall("search_zerodha_faq", {"query": "brokerage charges"})],
+    )),
+    ("I'm Priya, I want to start investing in mutual funds", FakeResponse(
+        text="Nice to meet you Priya!",
+        tool_calls=[
+            ToolCall("capture_lead_field", {"field_type": "name", "value": "Priya"}),
+            ToolCall("capture_lead_field", {"field_type": "use_case", "value": "mutual funds"}),
+        ],
+    )),
+    ("Can I book a demo?", FakeResponse(
+        text="Here are a few slots.",
+        tool_calls=[ToolCall("show_available_meeting_slots", {})],
+    )),
+    ("The first one", FakeResponse(
+        text="You're booked!",
+        tool_calls=[ToolCall("book_meeting_slot", {"slot_choice": "first"})],
+    )),
+    ("That's all, thanks", FakeResponse(
+        text="Thanks for your time!",
+        tool_calls=[ToolCall("generate_final_summary", {})],
+    )),
+]
+
+
+def prepare_workdir(path: str) -> None:
+    # Bookings are journaled next to data/mock_calendar.json, relative to the working directory
+    shutil.copytree(DATA_DIR, os.path.join(path, "data"), dirs_exist_ok=True)
+
+
+def make_agent() -> ZerodhaSDRAssistant:
+    return ZerodhaSDRAssistant()
+
+
+def make_userdata() -> Userdata:
+    # A fresh lead per session, as in the worker
+    return Userdata(room_name=f"bench-{next(_rooms)}")
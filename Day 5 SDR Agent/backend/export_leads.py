@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Export archived SDR leads to CSV for CRM import.
+
+Leads are streamed from the archive one line at a time, so memory use does
+not grow with the number of leads.
+
+    python export_leads.py -o leads.csv
+    python export_leads.py --since 2025-11-01 > november.csv
+    python export_leads.py --stats
+    python export_leads.py --import-legacy
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from lead_sink import ARCHIVE_DIR, LeadSink
+
+LEGACY_LEADS_DIR = "leads"
+
+COLUMNS = [
+    "lead_id", "timestamp", "session_id", "name", "email", "company", "role",
+    "use_case", "team_size", "timeline", "fit_score", "urgency_level",
+    "decision_maker_type", "budget_mentioned", "pain_points", "meeting_date",
+    "meeting_time", "lead_summary", "next_steps",
+]
+
+
+def lead_row(lead):
+    """One CSV row for an archived lead."""
+    meeting = lead.get("meeting_booked") or {}
+    crm = lead.get("crm_analysis") or {}
+    row = {column: lead.get(column) for column in COLUMNS}
+    row.update({
+        "pain_points": "; ".join(lead.get("pain_points") or []),
+        "meeting_date": meeting.get("date"),
+        "meeting_time": meeting.get("time"),
+        "lead_summary": crm.get("lead_summary"),
+        "next_steps": crm.get("next_steps"),
+    })
+    return ["" if row[column] is None else row[column] for column in COLUMNS]
+
+
+def export_csv(sink, out, since=None):
+    writer = csv.writer(out)
+    writer.writerow(COLUMNS)
+    count = 0
+    for lead in sink.iter_leads(since=since):
+        writer.writerow(lead_row(lead))
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-o", "--output", help="CSV file to write (default: stdout)")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="only leads from this date/time on")
+    parser.add_argument("--archive", default=ARCHIVE_DIR, help=f"lead archive directory (default: {ARCHIVE_DIR})")
+    parser.add_argument("--stats", action="store_true", help="print fit score and urgency distributions instead")
+    parser.add_argument(
+        "--import-legacy", action="store_true",
+        help=f"first append the old per-lead JSON files from {LEGACY_LEADS_DIR}/ to the archive",
+    )
+    args = parser.parse_args()
+
+    sink = LeadSink(args.archive)
+
+    if args.import_legacy:
+        count = sink.import_legacy_leads(LEGACY_LEADS_DIR)
+        print(f"Imported {count} legacy lead files into {sink.directory}", file=sys.stderr)
+
+    if args.stats:
+        print(json.dumps(sink.stats(), indent=2))
+        return
+
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            count = export_csv(sink, f, args.since)
+        print(f"Exported {count} leads to {args.output}", file=sys.stderr)
+    else:
+        export_csv(sink, sys.stdout, args.since)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
+import hashlib
 import logging
 import json
 import os
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Dict, Any
 
@@ -11,6 +13,7 @@ from livekit.agents import (
     JobContext,
     JobProcess,
     MetricsCollectedEvent,
+    FunctionToolsExecutedEvent,
     RoomInputOptions,
     WorkerOptions,
     cli,
@@ -19,43 +22,54 @@ from livekit.agents import (
     function_tool,
     RunContext
 )
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+from livekit.plugins import murf, google, deepgram
+from calendar_service import get_calendar
+from context_budget import ContextBudget
+from faq_index import get_faq_index
+from faq_vectors import fuse, get_faq_vectors
+from latency_metrics import LatencyRecorder
+from lead_sink import get_lead_sink
+from lead_state import LeadState
+from loop_monitor import start_blocking_detector
+from model_cache import get_models, prewarm_models
 
 logger = logging.getLogger("agent")
 
 load_dotenv(".env.local")
 
+COMPANY_FAQ_PATH = "data/company_faq.json"
+
 # Load Zerodha company data
-with open("data/company_faq.json", "r") as f:
-    COMPANY_DATA = json.load(f)
-
-# Load mock calendar data
-with open("data/mock_calendar.json", "r") as f:
-    CALENDAR_DATA = json.load(f)
-
-# Global lead storage for the session
-LEAD_DATA = {
-    "name": None,
-    "company": None,
-    "email": None,
-    "role": None,
-    "use_case": None,
-    "team_size": None,
-    "timeline": None,
-    "conversation_notes": [],
-    "meeting_booked": None,
-    "pain_points": [],
-    "budget_mentioned": False,
-    "decision_maker_type": "unknown",
-    "urgency_level": "unknown"
-}
+with open(COMPANY_FAQ_PATH, "rb") as f:
+    _company_bytes = f.read()
+COMPANY_DATA = json.loads(_company_bytes)
+# Rendered instructions are cached per version of the company data
+COMPANY_DATA_VERSION = hashlib.sha1(_company_bytes).hexdigest()
 
+# FAQ entries handed to the LLM per search
+FAQ_TOP_K = 3
+# "keyword" (BM25), "semantic" (hashed n-gram vectors) or "hybrid" (both, rank-fused)
+FAQ_SEARCH_MODE = os.getenv("FAQ_SEARCH_MODE", "keyword")
 
-class ZerodhaSDRAssistant(Agent):
-    def __init__(self) -> None:
-        super().__init__(
-            instructions=f"""You are an SDR (Sales Development Representative) for {COMPANY_DATA['company']}.
+
+def search_faq(query: str, k: int = FAQ_TOP_K):
+    if FAQ_SEARCH_MODE == "keyword":
+        return get_faq_index(COMPANY_DATA, COMPANY_DATA_VERSION).search(query, k)
+    vectors = get_faq_vectors(COMPANY_DATA, COMPANY_FAQ_PATH, COMPANY_DATA_VERSION)
+    if FAQ_SEARCH_MODE == "semantic":
+        return vectors.search(query, k)
+    keyword = get_faq_index(COMPANY_DATA, COMPANY_DATA_VERSION)
+    return fuse([keyword.search(query, 2 * k), vectors.search(query, 2 * k)], k)
+
+@dataclass
+class Userdata:
+    """Per-session state; one worker can host many calls at once."""
+    lead: LeadState = field(default_factory=LeadState)
+    # Recorded with the lead; tools only get a RunContext, which has no room
+    room_name: str = ""
+
+
+SDR_INSTRUCTIONS = """You are an SDR (Sales Development Representative) for {company}.
 
 Your job:
 1. Greet every visitor warmly: "Hi! I'm your Zerodha assistant. What brings you here today?"
@@ -74,7 +88,24 @@ Your job:
 9. Be proactive: "Based on what you've told me, I think Zerodha would be perfect for you. Let me book you a demo!"
 10. When conversation naturally ends, provide summary with fit score and save data
 
-Be enthusiastic, helpful, and always guide toward booking a demo!""",
+Be enthusiastic, helpful, and always guide toward booking a demo!"""
+
+# Keeps company data injected into the prompt within CONTEXT_BUDGET_TOKENS
+INSTRUCTIONS_BUDGET = ContextBudget("sdr")
+
+
+def render_instructions() -> str:
+    return INSTRUCTIONS_BUDGET.render(
+        SDR_INSTRUCTIONS,
+        version=COMPANY_DATA_VERSION,
+        company=COMPANY_DATA["company"],
+    )
+
+
+class ZerodhaSDRAssistant(Agent):
+    def __init__(self) -> None:
+        super().__init__(
+            instructions=render_instructions(),
         )
 
     @function_tool
@@ -84,173 +115,29 @@ Be enthusiastic, helpful, and always guide toward booking a demo!""",
         Args:
             query: The user's question or topic to search for
         """
-        query_lower = query.lower()
-        
-        # Enhanced keyword mapping for comprehensive matching
-        keyword_mapping = {
-            # Basic company info
-            "what does zerodha do": ["what does zerodha do"],
-            "about zerodha": ["what does zerodha do"],
-            "zerodha business": ["what does zerodha do"],
-            
-            # Pricing and fees
-            "free": ["do you have a free plan", "what are your brokerage fees"],
-            "cost": ["what are your brokerage fees"],
-            "price": ["what are your brokerage fees"],
-            "brokerage": ["what are your brokerage fees"],
-            "charges": ["what are your brokerage fees", "what are amc charges", "what are the fund transfer charges"],
-            "fees": ["what are your brokerage fees"],
-            "expensive": ["what are your brokerage fees"],
-            "cheap": ["what are your brokerage fees"],
-            
-            # Account opening
-            "account": ["how do i open an account", "what documents are required"],
-            "open account": ["how do i open an account"],
-            "signup": ["how do i open an account"],
-            "register": ["how do i open an account"],
-            "documents": ["what documents are required"],
-            "kyc": ["how do i open an account"],
-            
-            # Trading platforms
-            "kite": ["what is kite", "what trading platforms do you offer"],
-            "app": ["do you have a mobile app", "what is kite"],
-            "mobile": ["do you have a mobile app"],
-            "platform": ["what trading platforms do you offer"],
-            "software": ["what trading platforms do you offer"],
-            
-            # Mutual funds
-            "mutual fund": ["do you offer mutual funds", "what is coin", "what are the charges for mutual funds"],
-            "sip": ["do you offer mutual funds", "what is coin"],
-            "coin": ["what is coin"],
-            
-            # Safety and security
-            "safe": ["is zerodha safe"],
-            "security": ["is zerodha safe"],
-            "secure": ["is zerodha safe"],
-            "trust": ["is zerodha safe"],
-            "reliable": ["is zerodha safe"],
-            
-            # Trading types
-            "intraday": ["what are the intraday timings", "can i convert intraday to delivery"],
-            "delivery": ["can i convert intraday to delivery"],
-            "options": ["can i trade options and futures", "what is sensibull"],
-            "futures": ["can i trade options and futures"],
-            "f&o": ["can i trade options and futures"],
-            "commodity": ["do you offer commodity trading"],
-            "currency": ["can i trade currencies"],
-            
-            # Support
-            "support": ["do you have customer support"],
-            "help": ["do you have customer support"],
-            "contact": ["do you have customer support"],
-            "phone": ["do you have customer support"],
-            
-            # Minimum investment
-            "minimum": ["what is the minimum amount to start trading"],
-            "start": ["what is the minimum amount to start trading"],
-            "begin": ["what is the minimum amount to start trading"],
-            
-            # Research and tips
-            "tips": ["do you provide research and tips"],
-            "research": ["do you provide research and tips"],
-            "advice": ["do you provide research and tips"],
-            "recommendation": ["do you provide research and tips"],
-            
-            # IPO
-            "ipo": ["can i invest in ipos"],
-            
-            # Algo trading
-            "algo": ["do you offer algo trading", "what is streak"],
-            "algorithm": ["do you offer algo trading", "what is streak"],
-            "streak": ["what is streak"],
-            
-            # Margin
-            "margin": ["what is your margin policy"],
-            "leverage": ["what is your margin policy"],
-            
-            # Time related
-            "time": ["how long does account opening take", "what are the intraday timings"],
-            "timing": ["what are the intraday timings"],
-            "hours": ["what are the intraday timings"],
-            
-            # Payment methods
-            "upi": ["do you support upi payments"],
-            "payment": ["do you support upi payments", "what are the fund transfer charges"],
-            "transfer": ["what are the fund transfer charges"],
-            
-            # Tax
-            "tax": ["what are the tax implications"],
-            
-            # Portfolio
-            "portfolio": ["do you offer portfolio management", "what is console"],
-            "console": ["what is console"],
-            
-            # Education
-            "learn": ["what is varsity"],
-            "education": ["what is varsity"],
-            "varsity": ["what is varsity"]
-        }
-        
-        # First try exact question matching
-        for faq in COMPANY_DATA['faqs']:
-            if query_lower in faq['question'].lower() or faq['question'].lower() in query_lower:
-                return faq['answer']
-        
-        # Then try keyword-based matching
-        matched_faqs = []
-        for keyword, questions in keyword_mapping.items():
-            if keyword in query_lower:
-                for faq in COMPANY_DATA['faqs']:
-                    for question in questions:
-                        if question in faq['question'].lower():
-                            matched_faqs.append(faq)
-        
-        # Return first match or search by individual words
-        if matched_faqs:
-            return matched_faqs[0]['answer']
-        
-        # Search in company details and other sections
-        if 'founder' in query_lower or 'who started' in query_lower or 'who founded' in query_lower:
-            return f"Zerodha was founded in 2010 by {COMPANY_DATA['company_details']['founders']} in {COMPANY_DATA['company_details']['headquarters']}."
-        
-        if 'how big' in query_lower or 'size' in query_lower or 'customers' in query_lower:
-            return f"Zerodha has {COMPANY_DATA['company_details']['customers']} customers and handles {COMPANY_DATA['company_details']['daily_trades']} trades daily."
-        
-        if 'how it works' in query_lower or 'process' in query_lower:
-            return COMPANY_DATA['how_it_works']['trading_process']
-        
-        if 'why zerodha' in query_lower or 'why choose' in query_lower:
-            return COMPANY_DATA['why_zerodha']['cost_advantage'] + ' ' + COMPANY_DATA['why_zerodha']['technology_first']
-        
-        # Last resort: search by individual words in query
-        query_words = query_lower.split()
-        for faq in COMPANY_DATA['faqs']:
-            faq_text = (faq['question'] + ' ' + faq['answer']).lower()
-            if any(word in faq_text for word in query_words if len(word) > 3):
-                return faq['answer']
+        results = search_faq(query)
+        if results:
+            lines = [f"[score {score:.2f}] {doc.question}: {doc.answer}" for doc, score in results]
+            return "FAQ matches, best first. Answer only from the ones that fit the question:\n" + "\n".join(lines)
         
         return "This information is not in my FAQ, so I can't confirm that. Let me connect you with our team for detailed information."
     
     @function_tool
-    async def capture_lead_field(self, context: RunContext, field_type: str, value: str):
+    async def capture_lead_field(self, context: RunContext[Userdata], field_type: str, value: str):
         """Capture specific lead information during conversation.
         
         Args:
             field_type: Type of information (name, email, role, use_case, timeline, company, team_size)
             value: The actual value provided by the user
         """
-        global LEAD_DATA
-        
-        if field_type in LEAD_DATA:
-            LEAD_DATA[field_type] = value
-            LEAD_DATA['conversation_notes'].append(f"Captured {field_type}: {value}")
+        if context.userdata.lead.set_field(field_type, value):
             logger.info(f"Captured lead field: {field_type} = {value}")
             return f"Perfect! I've noted that your {field_type} is {value}."
         else:
             return "I'll make a note of that information."
     
     @function_tool
-    async def detect_end_call_intent(self, context: RunContext, user_message: str):
+    async def detect_end_call_intent(self, context: RunContext[Userdata], user_message: str):
         """Detect if user wants to end the call and trigger summary.
         
         Args:
@@ -271,58 +158,47 @@ Be enthusiastic, helpful, and always guide toward booking a demo!""",
         return None
     
     @function_tool
-    async def generate_final_summary(self, context: RunContext):
-        """Generate final lead summary with CRM analysis and save to JSON file."""
-        global LEAD_DATA
+    async def generate_final_summary(self, context: RunContext[Userdata]):
+        """Generate final lead summary with CRM analysis and save it to the lead archive."""
+        lead = context.userdata.lead
         
         # Analyze conversation for CRM insights
-        conversation_text = " ".join(LEAD_DATA.get('conversation_notes', []))
-        await self.analyze_conversation_for_crm(context, conversation_text)
-        
-        # Add session metadata
-        LEAD_DATA['timestamp'] = datetime.now().isoformat()
-        LEAD_DATA['session_id'] = context.room.name
-        LEAD_DATA['company_contacted'] = COMPANY_DATA['company']
+        await self.analyze_conversation_for_crm(context, lead.notes_text())
         
         # Create CRM notes
         crm_notes = {
-            "lead_summary": f"{LEAD_DATA.get('name', 'Unknown')} - {LEAD_DATA.get('role', 'Unknown role')} interested in {LEAD_DATA.get('use_case', 'general services')}",
-            "key_points": LEAD_DATA.get('pain_points', []),
-            "budget_discussed": LEAD_DATA.get('budget_mentioned', False),
-            "decision_authority": LEAD_DATA.get('decision_maker_type', 'unknown'),
-            "urgency": LEAD_DATA.get('urgency_level', 'unknown'),
-            "timeline_refined": LEAD_DATA.get('timeline', 'not specified'),
-            "fit_score": LEAD_DATA.get('fit_score', 50),
-            "next_steps": "Follow up via email" + (" and demo call scheduled" if LEAD_DATA.get('meeting_booked') else "")
+            "lead_summary": f"{lead.name or 'Unknown'} - {lead.role or 'Unknown role'} interested in {lead.use_case or 'general services'}",
+            "key_points": list(lead.pain_points),
+            "budget_discussed": lead.budget_mentioned,
+            "decision_authority": lead.decision_maker_type,
+            "urgency": lead.urgency_level,
+            "timeline_refined": lead.timeline or 'not specified',
+            "fit_score": lead.fit_score,
+            "next_steps": "Follow up via email" + (" and demo call scheduled" if lead.meeting_booked else "")
         }
         
-        LEAD_DATA['crm_analysis'] = crm_notes
-        
-        # Create directories
-        os.makedirs('leads', exist_ok=True)
-        os.makedirs('crm_notes', exist_ok=True)
-        
-        # Save lead file
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        lead_filename = f"leads/zerodha_lead_{timestamp}.json"
-        crm_filename = f"crm_notes/crm_analysis_{timestamp}.json"
-        
-        with open(lead_filename, 'w') as f:
-            json.dump(LEAD_DATA, f, indent=2)
+        # Lead record with session metadata
+        lead_record = {
+            **lead.to_dict(),
+            "timestamp": datetime.now().isoformat(),
+            "session_id": context.userdata.room_name,
+            "company_contacted": COMPANY_DATA['company'],
+            "crm_analysis": crm_notes,
+        }
         
-        with open(crm_filename, 'w') as f:
-            json.dump(crm_notes, f, indent=2)
+        # Append to the lead archive (one JSON line; see lead_sink.py)
+        lead_record = await get_lead_sink().append(lead_record)
         
         # Generate verbal summary
-        name = LEAD_DATA.get('name', 'our visitor')
-        role = LEAD_DATA.get('role', 'not specified')
-        use_case = LEAD_DATA.get('use_case', 'general interest')
-        timeline = LEAD_DATA.get('timeline', 'not specified')
-        fit_score = LEAD_DATA.get('fit_score', 50)
+        name = lead.name or 'our visitor'
+        role = lead.role or 'not specified'
+        use_case = lead.use_case or 'general interest'
+        timeline = lead.timeline or 'not specified'
+        fit_score = lead.fit_score
         meeting_info = ""
         
-        if LEAD_DATA.get('meeting_booked'):
-            meeting = LEAD_DATA['meeting_booked']
+        if lead.meeting_booked:
+            meeting = lead.meeting_booked
             meeting_info = f" We've also scheduled a demo for {meeting['date']} at {meeting['time']}."
         
         summary = f"""Thank you for your time today! Let me quickly summarize:
@@ -334,88 +210,64 @@ Based on our conversation, I've given this lead a fit score of {fit_score}/100.{
 I've saved all your details and our CRM analysis. Someone from our team will follow up with you soon. 
 Thank you for considering Zerodha for your investment and trading needs!"""
         
-        logger.info(f"Lead and CRM analysis saved to {lead_filename} and {crm_filename}")
-        logger.info(f"Lead data: {LEAD_DATA}")
+        logger.info(f"Lead {lead_record['lead_id']} with CRM analysis saved to {get_lead_sink().active_path}")
+        logger.info(f"Lead data: {lead_record}")
         
         return summary
     
     @function_tool
     async def show_available_meeting_slots(self, context: RunContext):
         """Show available meeting slots when user wants to book a demo or meeting."""
-        available_slots = [slot for slot in CALENDAR_DATA['available_slots'] 
-                          if slot['id'] not in [meeting['slot_id'] for meeting in CALENDAR_DATA['booked_meetings']]]
+        calendar = get_calendar()
+        await calendar.refresh()
+        available_slots = calendar.free_slots(3)
         
         if not available_slots:
             return "I don't have any available slots right now. Let me check with our team and get back to you."
         
         slots_text = "I have these available slots for a Zerodha demo:\n"
-        for i, slot in enumerate(available_slots[:3], 1):
+        for i, slot in enumerate(available_slots, 1):
             slots_text += f"{i}. {slot['date']} at {slot['time']} ({slot['duration']})\n"
         
         slots_text += "Which slot works best for you? Just say the number or tell me the date and time."
         return slots_text
     
     @function_tool
-    async def book_meeting_slot(self, context: RunContext, slot_choice: str):
+    async def book_meeting_slot(self, context: RunContext[Userdata], slot_choice: str):
         """Book a specific meeting slot based on user choice.
         
         Args:
             slot_choice: User's choice (number, date, or time preference)
         """
-        global LEAD_DATA, CALENDAR_DATA
-        
-        available_slots = [slot for slot in CALENDAR_DATA['available_slots'] 
-                          if slot['id'] not in [meeting['slot_id'] for meeting in CALENDAR_DATA['booked_meetings']]]
-        
-        selected_slot = None
-        choice_lower = slot_choice.lower()
-        
-        # Try to match by number
-        if choice_lower in ['1', 'first', 'one']:
-            selected_slot = available_slots[0] if available_slots else None
-        elif choice_lower in ['2', 'second', 'two']:
-            selected_slot = available_slots[1] if len(available_slots) > 1 else None
-        elif choice_lower in ['3', 'third', 'three']:
-            selected_slot = available_slots[2] if len(available_slots) > 2 else None
-        else:
-            # Try to match by date or time
-            for slot in available_slots:
-                if slot['date'] in choice_lower or slot['time'].lower() in choice_lower:
-                    selected_slot = slot
-                    break
+        lead = context.userdata.lead
+        calendar = get_calendar()
+        await calendar.refresh()
         
+        selected_slot = calendar.find(slot_choice)
         if not selected_slot:
             return "I couldn't find that slot. Could you please choose from the available options I mentioned?"
         
-        # Book the meeting
-        meeting_details = {
-            "slot_id": selected_slot['id'],
-            "date": selected_slot['date'],
-            "time": selected_slot['time'],
-            "duration": selected_slot['duration'],
-            "lead_name": LEAD_DATA.get('name', 'Unknown'),
-            "lead_email": LEAD_DATA.get('email', 'Not provided'),
-            "booked_at": datetime.now().isoformat()
-        }
-        
-        CALENDAR_DATA['booked_meetings'].append(meeting_details)
-        LEAD_DATA['meeting_booked'] = meeting_details
+        # Book the meeting; fails if another caller got the slot first
+        meeting_details = await calendar.book(
+            selected_slot['id'],
+            lead_name=lead.name or 'Unknown',
+            lead_email=lead.email or 'Not provided',
+        )
+        if meeting_details is None:
+            return "Sorry, that slot was just taken by someone else. " + await self.show_available_meeting_slots(context)
         
-        # Save updated calendar
-        with open("data/mock_calendar.json", "w") as f:
-            json.dump(CALENDAR_DATA, f, indent=2)
+        lead.meeting_booked = meeting_details
         
         return f"Perfect! I've booked your Zerodha demo for {selected_slot['date']} at {selected_slot['time']}. You'll receive a confirmation email shortly. Looking forward to showing you our platform!"
     
     @function_tool
-    async def analyze_conversation_for_crm(self, context: RunContext, conversation_text: str):
+    async def analyze_conversation_for_crm(self, context: RunContext[Userdata], conversation_text: str):
         """Analyze conversation to extract CRM insights and qualification score.
         
         Args:
             conversation_text: The full conversation transcript
         """
-        global LEAD_DATA
-        
+        lead = context.userdata.lead
         text_lower = conversation_text.lower()
         
         # Extract pain points
@@ -454,37 +306,35 @@ Thank you for considering Zerodha for your investment and trading needs!"""
         # Calculate fit score (0-100)
         fit_score = 50  # Base score
         
-        if LEAD_DATA.get('email'): fit_score += 15
-        if LEAD_DATA.get('name'): fit_score += 10
-        if LEAD_DATA.get('use_case'): fit_score += 15
+        if lead.email: fit_score += 15
+        if lead.name: fit_score += 10
+        if lead.use_case: fit_score += 15
         if budget_mentioned: fit_score += 10
         if decision_maker_type == "decision_maker": fit_score += 20
         elif decision_maker_type == "influencer": fit_score += 10
         if urgency_level == "high": fit_score += 15
         elif urgency_level == "medium": fit_score += 10
-        if LEAD_DATA.get('meeting_booked'): fit_score += 15
+        if lead.meeting_booked: fit_score += 15
         
         # Update lead data
-        LEAD_DATA.update({
-            'pain_points': pain_points,
-            'budget_mentioned': budget_mentioned,
-            'decision_maker_type': decision_maker_type,
-            'urgency_level': urgency_level,
-            'fit_score': min(fit_score, 100)
-        })
+        lead.pain_points = pain_points
+        lead.budget_mentioned = budget_mentioned
+        lead.decision_maker_type = decision_maker_type
+        lead.urgency_level = urgency_level
+        lead.fit_score = min(fit_score, 100)
         
         return f"CRM analysis complete. Fit score: {fit_score}/100"
     
     @function_tool
-    async def proactive_demo_offer(self, context: RunContext):
+    async def proactive_demo_offer(self, context: RunContext[Userdata]):
         """Proactively offer demo booking after collecting basic lead info."""
-        global LEAD_DATA
+        lead = context.userdata.lead
         
         # Check if we have enough info to offer demo
-        has_name = LEAD_DATA.get('name') is not None
-        has_interest = LEAD_DATA.get('use_case') is not None
+        has_name = lead.name is not None
+        has_interest = lead.use_case is not None
         
-        if has_name and has_interest and not LEAD_DATA.get('meeting_booked'):
+        if has_name and has_interest and not lead.meeting_booked:
             return await self.show_available_meeting_slots(context)
         
         return "Let me learn a bit more about you first, then I can show you our platform!"
@@ -507,23 +357,27 @@ Thank you for considering Zerodha for your investment and trading needs!"""
         return prompts.get(missing_field, "Could you tell me more about your investment goals?")
     
     @function_tool
-    async def add_conversation_note(self, context: RunContext, note: str):
+    async def add_conversation_note(self, context: RunContext[Userdata], note: str):
         """Add a note about the conversation for lead context.
         
         Args:
             note: Important information or context from the conversation
         """
-        global LEAD_DATA
-        LEAD_DATA['conversation_notes'].append(f"{datetime.now().strftime('%H:%M:%S')}: {note}")
+        context.userdata.lead.add_note(f"{datetime.now().strftime('%H:%M:%S')}: {note}")
         return "Noted."
 
 
 def prewarm(proc: JobProcess):
     """Preload models and company data for faster agent startup."""
-    proc.userdata["vad"] = silero.VAD.load()
+    prewarm_models(proc)
     
-    # Preload company FAQ data
+    # Preload company FAQ data and build its search index
     proc.userdata["company_data"] = COMPANY_DATA
+    get_calendar()
+    get_lead_sink()
+    get_faq_index(COMPANY_DATA, COMPANY_DATA_VERSION)
+    if FAQ_SEARCH_MODE != "keyword":
+        get_faq_vectors(COMPANY_DATA, COMPANY_FAQ_PATH, COMPANY_DATA_VERSION)
     logger.info(f"Preloaded {COMPANY_DATA['company']} FAQ with {len(COMPANY_DATA['faqs'])} entries")
 
 
@@ -534,8 +388,13 @@ async def entrypoint(ctx: JobContext):
         "room": ctx.room.name,
     }
 
+    models = get_models(ctx.proc)
+    blocking_detector = start_blocking_detector()
+
     # Set up a voice AI pipeline using OpenAI, Cartesia, AssemblyAI, and the LiveKit turn detector
+    userdata = Userdata(room_name=ctx.room.name)
     session = AgentSession(
+        userdata=userdata,
         # Speech-to-text (STT) is your agent's ears, turning the user's speech into text that the LLM can understand
         # See all available models at https://docs.livekit.io/agents/models/stt/
         stt=deepgram.STT(model="nova-3"),
@@ -554,8 +413,8 @@ async def entrypoint(ctx: JobContext):
             ),
         # VAD and turn detection are used to determine when the user is speaking and when the agent should respond
         # See more at https://docs.livekit.io/agents/build/turns
-        turn_detection=MultilingualModel(),
-        vad=ctx.proc.userdata["vad"],
+        turn_detection=models.turn_detection,
+        vad=models.vad,
         # allow the LLM to generate a response while waiting for the end of turn
         # See more at https://docs.livekit.io/agents/build/audio/#preemptive-generation
         preemptive_generation=True,
@@ -574,15 +433,26 @@ async def entrypoint(ctx: JobContext):
     # Metrics collection, to measure pipeline performance
     # For more information, see https://docs.livekit.io/agents/build/metrics/
     usage_collector = metrics.UsageCollector()
+    latency_recorder = LatencyRecorder(ctx.room.name)
 
     @session.on("metrics_collected")
     def _on_metrics_collected(ev: MetricsCollectedEvent):
         metrics.log_metrics(ev.metrics)
         usage_collector.collect(ev.metrics)
+        latency_recorder.record(ev.metrics)
+
+    @session.on("function_tools_executed")
+    def _on_function_tools_executed(ev: FunctionToolsExecutedEvent):
+        latency_recorder.record_tools(ev)
 
     async def log_usage():
         summary = usage_collector.get_summary()
         logger.info(f"Usage: {summary}")
+        latency_recorder.export()
+        # The lead was saved by generate_final_summary, if the call got that far
+        userdata.lead.close()
+        if blocking_detector:
+            blocking_detector.stop()
 
     ctx.add_shutdown_callback(log_usage)
 
@@ -600,7 +470,7 @@ async def entrypoint(ctx: JobContext):
         room=ctx.room,
         room_input_options=RoomInputOptions(
             # For telephony applications, use `BVCTelephony` for best results
-            noise_cancellation=noise_cancellation.BVC(),
+            noise_cancellation=models.noise_cancellation,
         ),
     )
 
@@ -0,0 +1,303 @@
+"""Demo-slot calendar with safe concurrent booking.
+
+The calendar is `data/mock_calendar.json` (the slots and the meetings booked
+when it was last compacted) plus an append-only journal next to it, one
+booked meeting per line. Booking a slot appends a single line instead of
+rewriting the whole calendar; every so many bookings the journal is folded
+back into the JSON file.
+
+In memory the booked slot ids are a set and the free slots a list sorted by
+date and time, so listing or finding a slot is a bisect rather than a scan
+over slots times bookings. Booking is compare-and-book: under an asyncio lock
+(sessions in this worker) and an exclusive file lock (other workers), the
+journal is caught up, the slot is checked, and only then is the booking
+appended. A slot can be booked once, however many calls race for it.
+
+Catching up starts from the calendar file: when another worker has compacted
+(the file is a different one than this process loaded), the snapshot is
+loaded again before any journal is read, so bookings folded into it are
+never missed.
+"""
+
+import asyncio
+import bisect
+import json
+import logging
+import os
+import re
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+
+from persistence import run_blocking, write_text_atomic
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+logger = logging.getLogger("calendar_service")
+
+CALENDAR_PATH = os.getenv("CALENDAR_PATH", "data/mock_calendar.json")
+# Journal entries folded back into the calendar file at once
+COMPACT_EVERY = int(os.getenv("CALENDAR_COMPACT_EVERY", "100"))
+
+ORDINALS = {
+    "1": 0, "first": 0, "one": 0,
+    "2": 1, "second": 1, "two": 1,
+    "3": 2, "third": 2, "three": 2,
+}
+
+_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_TIME = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*([ap])\.?\s*m\b", re.IGNORECASE)
+
+
+def parse_time(text: str) -> Optional[int]:
+    """Minutes after midnight for "9:00 AM", "2 pm", ...; None without a time."""
+    match = _TIME.search(text)
+    if not match:
+        return None
+    hour, minute = int(match.group(1)) % 12, int(match.group(2) or 0)
+    if match.group(3).lower() == "p":
+        hour += 12
+    return hour * 60 + minute
+
+
+def slot_key(slot: dict) -> tuple[str, int, str]:
+    # ISO dates sort as strings; times are compared as minutes
+    return slot["date"], parse_time(slot["time"]) or 0, slot["id"]
+
+
+class CalendarService:
+    def __init__(self, path: str = CALENDAR_PATH) -> None:
+        self.path = os.path.abspath(path)
+        self.journal_path = os.path.splitext(self.path)[0] + ".journal.jsonl"
+        self.lock_path = os.path.splitext(self.path)[0] + ".lock"
+        self._slots: dict[str, dict] = {}
+        self._booked: dict[str, dict] = {}
+        # (date, minutes, id) of every free slot, in order
+        self._free: list[tuple[str, int, str]] = []
+        # Calendar file this process loaded, as (dev, inode, mtime, size)
+        self._snapshot_id: Optional[tuple[int, int, int, int]] = None
+        # Journal file and how far into it this process has read
+        self._journal_id: Optional[tuple[int, int]] = None
+        self._journal_offset = 0
+        self._journal_entries = 0
+        self._lock = asyncio.Lock()
+        self._thread_lock = threading.Lock()
+
+    # ---- file side, run on the persistence pool ----
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool) -> Iterator[None]:
+        with self._thread_lock:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+            with open(self.lock_path, "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _file_id(st: os.stat_result) -> tuple[int, int, int, int]:
+        return st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _load_snapshot(self) -> None:
+        with open(self.path, encoding="utf-8") as f:
+            self._snapshot_id = self._file_id(os.fstat(f.fileno()))
+            data = json.load(f)
+        self._slots = {slot["id"]: slot for slot in data.get("available_slots", [])}
+        self._booked = {}
+        for meeting in data.get("booked_meetings", []):
+            self._booked.setdefault(meeting["slot_id"], meeting)
+        self._free = sorted(
+            slot_key(slot) for slot_id, slot in self._slots.items() if slot_id not in self._booked
+        )
+        self._journal_id = None
+        self._journal_offset = 0
+        self._journal_entries = 0
+
+    def _apply(self, meeting: dict) -> bool:
+        slot_id = meeting["slot_id"]
+        if slot_id in self._booked:
+            return False
+        self._booked[slot_id] = meeting
+        slot = self._slots.get(slot_id)
+        if slot is not None:
+            key = slot_key(slot)
+            i = bisect.bisect_left(self._free, key)
+            if i < len(self._free) and self._free[i] == key:
+                del self._free[i]
+        return True
+
+    def _catch_up(self) -> None:
+        """Apply bookings other processes journaled since the last read."""
+        if self._file_id(os.stat(self.path)) != self._snapshot_id:
+            # Compacted by another process: the journal we followed is in the
+            # new snapshot, and any journal there now starts after it
+            self._load_snapshot()
+        try:
+            st = os.stat(self.journal_path)
+        except FileNotFoundError:
+            if self._journal_id is not None:
+                self._load_snapshot()  # removed without a compaction
+            return
+        journal_id = (st.st_dev, st.st_ino)
+        if self._journal_id is not None and (journal_id != self._journal_id or st.st_size < self._journal_offset):
+            self._load_snapshot()
+        if self._journal_id is None:
+            self._journal_id = journal_id
+        if st.st_size == self._journal_offset:
+            return
+        with open(self.journal_path, "rb") as f:
+            f.seek(self._journal_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn last line from a crash; the next append terminates it
+                self._journal_offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    meeting = json.loads(line)
+                except ValueError:
+                    continue
+                self._journal_entries += 1
+                self._apply(meeting)
+
+    def _append(self, meeting: dict) -> None:
+        data = (json.dumps(meeting, ensure_ascii=False) + "\n").encode("utf-8")
+        fd = os.open(self.journal_path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            size = os.fstat(fd).st_size
+            if size and os.pread(fd, 1, size - 1) != b"\n":
+                data = b"\n" + data
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+            st = os.fstat(fd)
+        finally:
+            os.close(fd)
+        if self._journal_id is None:
+            self._journal_id = (st.st_dev, st.st_ino)
+        self._journal_offset = st.st_size
+        self._journal_entries += 1
+
+    def _compact(self) -> None:
+        snapshot = {
+            "available_slots": list(self._slots.values()),
+            "booked_meetings": list(self._booked.values()),
+        }
+        write_text_atomic(self.path, json.dumps(snapshot, indent=2))
+        self._snapshot_id = self._file_id(os.stat(self.path))
+        # Replaying a journal that is already in the snapshot is harmless,
+        # so a crash between these two steps loses nothing
+        os.remove(self.journal_path)
+        self._journal_id = None
+        self._journal_offset = 0
+        self._journal_entries = 0
+        logger.info(f"Compacted calendar journal into {self.path}")
+
+    def load(self) -> None:
+        with self._file_lock(exclusive=False):
+            self._load_snapshot()
+            self._catch_up()
+        logger.info(f"Loaded calendar with {len(self._slots)} slots, {len(self._free)} free")
+
+    def _refresh(self) -> None:
+        with self._file_lock(exclusive=False):
+            self._catch_up()
+
+    def _book(self, slot_id: str, details: dict) -> Optional[dict]:
+        with self._file_lock(exclusive=True):
+            self._catch_up()
+            slot = self._slots.get(slot_id)
+            if slot is None or slot_id in self._booked:
+                return None
+            meeting = {
+                "slot_id": slot_id,
+                "date": slot["date"],
+                "time": slot["time"],
+                "duration": slot["duration"],
+                **details,
+                "booked_at": datetime.now().isoformat(),
+            }
+            self._append(meeting)
+            self._apply(meeting)
+            if self._journal_entries >= COMPACT_EVERY:
+                try:
+                    self._compact()
+                except OSError as e:
+                    logger.warning(f"Could not compact calendar journal: {e}")
+            return meeting
+
+    # ---- queries and booking, for the agent ----
+
+    def free_slots(self, limit: int = 3, date: Optional[str] = None) -> list[dict]:
+        """The earliest free slots, optionally on one date."""
+        start = bisect.bisect_left(self._free, (date, -1, "")) if date else 0
+        slots = []
+        for key in self._free[start:start + limit]:
+            if date and key[0] != date:
+                break
+            slots.append(self._slots[key[2]])
+        return slots
+
+    def find(self, choice: str, offered: int = 3) -> Optional[dict]:
+        """The free slot a spoken choice refers to.
+
+        "first"/"2"/"three" pick from the `offered` earliest free slots; otherwise
+        a date and/or time ("2024-11-29", "2 PM") picks the earliest free match.
+        """
+        choice = choice.lower().strip()
+        if choice in ORDINALS:
+            slots = self.free_slots(offered)
+            index = ORDINALS[choice]
+            return slots[index] if index < len(slots) else None
+        date_match = _DATE.search(choice)
+        date = date_match.group(0) if date_match else None
+        minutes = parse_time(choice)
+        if date is None and minutes is None:
+            return None
+        if date is not None and minutes is not None:
+            key = (date, minutes)
+            i = bisect.bisect_left(self._free, (date, minutes, ""))
+            if i < len(self._free) and self._free[i][:2] == key:
+                return self._slots[self._free[i][2]]
+            return None
+        if date is not None:
+            slots = self.free_slots(1, date=date)
+            return slots[0] if slots else None
+        for key in self._free:
+            if key[1] == minutes:
+                return self._slots[key[2]]
+        return None
+
+    async def refresh(self) -> None:
+        """Pick up bookings made by other workers."""
+        async with self._lock:
+            await run_blocking(self._refresh)
+
+    async def book(self, slot_id: str, **details) -> Optional[dict]:
+        """Book `slot_id` unless it's already taken; returns the meeting or None."""
+        async with self._lock:
+            return await run_blocking(self._book, slot_id, details)
+
+
+_calendar: Optional[CalendarService] = None
+
+
+def get_calendar() -> CalendarService:
+    """The process-wide calendar, loaded on first use."""
+    global _calendar
+    if _calendar is None:
+        calendar = CalendarService()
+        calendar.load()
+        _calendar = calendar
+    return _calendar
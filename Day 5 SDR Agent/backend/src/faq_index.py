@@ -0,0 +1,203 @@
+"""BM25 search over the company FAQ.
+
+Every FAQ entry, and every entry of the other `company_faq.json` sections
+(company details, how it works, why Zerodha, ...), becomes a document. The
+documents are tokenized, stemmed and put in an inverted index once per
+process, with each posting's BM25 term score computed up front. A query
+only touches the postings of its own terms, one vectorized add per term,
+so it stays fast however large the FAQ grows.
+"""
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import numpy as np
+
+# BM25 parameters (the usual defaults)
+K1 = 1.2
+B = 0.75
+# Question words count this many times as much as answer words
+QUESTION_WEIGHT = 2.0
+
+STOPWORDS = {
+    "a", "about", "am", "an", "and", "any", "are", "as", "at", "be", "by",
+    "can", "could", "do", "does", "for", "from", "have", "how", "i", "if",
+    "in", "into", "is", "it", "its", "me", "my", "of", "on", "or", "our",
+    "so", "that", "the", "their", "there", "this", "to", "us", "was", "we",
+    "what", "when", "where", "which", "who", "why", "will", "with", "would",
+    "you", "your",
+}
+
+# Everyday words for the terms the FAQ uses; applied to queries only
+SYNONYMS = {
+    "cost": ["fee", "charge", "brokerage"],
+    "price": ["fee", "charge", "brokerage"],
+    "pricing": ["fee", "charge", "brokerage"],
+    "expensive": ["fee", "brokerage"],
+    "cheap": ["fee", "brokerage"],
+    "commission": ["brokerage"],
+    "signup": ["open", "account"],
+    "sign": ["open", "account"],
+    "register": ["open", "account"],
+    "kyc": ["open", "account", "document"],
+    "app": ["mobile", "kite"],
+    "phone": ["mobile"],
+    "secure": ["safe"],
+    "security": ["safe"],
+    "trust": ["safe"],
+    "choose": ["different", "advantage"],
+    "better": ["different", "advantage"],
+    "sip": ["mutual", "fund", "coin"],
+    "started": ["found"],
+    "start": ["minimum", "open"],
+    "tip": ["research"],
+    "advice": ["research", "tip"],
+    "recommendation": ["research", "tip"],
+    "algo": ["streak"],
+    "education": ["varsity"],
+    "learn": ["varsity"],
+}
+
+
+def stem(word: str) -> str:
+    """Light suffix stripping: enough to match "charges"/"charge", "trading"/"trade"."""
+    if len(word) <= 3:
+        return word
+    for suffix, replacement in (
+        ("ies", "y"), ("sses", "ss"), ("ings", ""), ("ing", ""), ("ed", ""),
+        ("ers", ""), ("er", ""), ("ly", ""), ("es", ""), ("s", ""),
+    ):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[: -len(suffix)] + replacement
+            break
+    # "trad" (trading) and "trade" should meet: drop a trailing e
+    if word.endswith("e") and len(word) > 4:
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    return [stem(word) for word in re.findall(r"[a-z0-9&]+", text.lower()) if word not in STOPWORDS]
+
+
+@dataclass(frozen=True)
+class FaqDoc:
+    section: str
+    question: str
+    answer: str
+
+
+def _humanize(key: str) -> str:
+    return key.replace("_", " ")
+
+
+def company_documents(data: dict[str, Any]) -> list[FaqDoc]:
+    """One document per FAQ entry and per entry of the other sections."""
+    docs = [
+        FaqDoc("faqs", faq["question"], faq["answer"])
+        for faq in data.get("faqs", [])
+    ]
+    for section, value in data.items():
+        if section in ("faqs", "company"):
+            continue
+        if isinstance(value, dict):
+            for key, text in value.items():
+                docs.append(FaqDoc(section, f"{_humanize(section)}: {_humanize(key)}", str(text)))
+        elif isinstance(value, list):
+            for text in value:
+                docs.append(FaqDoc(section, _humanize(section), str(text)))
+        elif isinstance(value, str):
+            docs.append(FaqDoc(section, _humanize(section), value))
+    return docs
+
+
+def _normalize(text: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9&]+", text.lower()))
+
+
+class FaqIndex:
+    def __init__(self, docs: list[FaqDoc]) -> None:
+        self.docs = docs
+        # The exact wording of an FAQ question always wins
+        self._questions = {_normalize(doc.question): number for number, doc in enumerate(docs)}
+
+        term_freqs: list[Counter] = []
+        for doc in docs:
+            tf: Counter = Counter()
+            for term in tokenize(doc.question):
+                tf[term] += QUESTION_WEIGHT
+            for term in tokenize(doc.answer):
+                tf[term] += 1
+            term_freqs.append(tf)
+        lengths = np.array([sum(tf.values()) for tf in term_freqs], dtype=np.float64)
+        avg_length = lengths.mean() if len(docs) else 1.0
+        norms = K1 * (1 - B + B * lengths / avg_length)
+
+        postings: dict[str, tuple[list[int], list[float]]] = {}
+        for number, tf in enumerate(term_freqs):
+            for term, freq in tf.items():
+                ids, freqs = postings.setdefault(term, ([], []))
+                ids.append(number)
+                freqs.append(freq)
+
+        # term -> (doc numbers, idf-weighted BM25 term scores), all computed up front
+        self._postings: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        n = len(docs)
+        for term, (ids, freqs) in postings.items():
+            ids_array = np.array(ids, dtype=np.int32)
+            freqs_array = np.array(freqs, dtype=np.float64)
+            idf = math.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+            weights = idf * freqs_array * (K1 + 1) / (freqs_array + norms[ids_array])
+            self._postings[term] = (ids_array, weights.astype(np.float32))
+
+    @classmethod
+    def from_company_data(cls, data: dict[str, Any]) -> "FaqIndex":
+        return cls(company_documents(data))
+
+    def _query_terms(self, query: str) -> Counter:
+        terms: Counter = Counter()
+        for word in re.findall(r"[a-z0-9&]+", query.lower()):
+            if word in STOPWORDS:
+                continue
+            terms[stem(word)] += 1.0
+            for synonym in SYNONYMS.get(word, SYNONYMS.get(stem(word), [])):
+                # Expansions help recall but shouldn't outweigh the user's own words
+                terms[stem(synonym)] += 0.5
+        return terms
+
+    def search(self, query: str, k: int = 3) -> list[tuple[FaqDoc, float]]:
+        """Top `k` documents for `query` with their BM25 scores, best first.
+
+        A query that is exactly an FAQ question returns that entry first.
+        """
+        scores = np.zeros(len(self.docs), dtype=np.float32)
+        for term, weight in self._query_terms(query).items():
+            posting = self._postings.get(term)
+            if posting is not None:
+                ids, term_scores = posting
+                scores[ids] += weight * term_scores
+
+        exact = self._questions.get(_normalize(query))
+        if exact is not None:
+            scores[exact] = scores.max() + 1.0
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        ranked = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(self.docs[number], round(float(scores[number]), 3)) for number in ranked]
+
+
+_index: Optional[FaqIndex] = None
+_index_version: Optional[str] = None
+
+
+def get_faq_index(data: dict[str, Any], version: str) -> FaqIndex:
+    """The process-wide index, rebuilt only when the company data changes."""
+    global _index, _index_version
+    if _index is None or _index_version != version:
+        _index = FaqIndex.from_company_data(data)
+        _index_version = version
+    return _index
@@ -0,0 +1,146 @@
+"""Semantic FAQ search with hashed n-gram vectors.
+
+Keyword search misses paraphrases: "how much do you charge per trade" has
+no word in common with "What are your brokerage fees?" once stopwords are
+gone. Here every FAQ document is turned into a fixed-size vector of hashed
+word and character n-grams, so "charge" still lands near "charges" and
+word order matters a little. No model download is needed. The vectors are
+stacked into one normalized NumPy matrix, so a query is a single
+matrix-vector product and a top-k partition.
+
+The matrix is saved next to the FAQ file (`company_faq.vectors.npz`)
+together with the FAQ's content hash, and rebuilt when the FAQ changes.
+"""
+
+import logging
+import os
+import re
+import tempfile
+import zlib
+from typing import Optional
+
+import numpy as np
+
+from faq_index import STOPWORDS, FaqDoc, company_documents
+
+logger = logging.getLogger("faq_vectors")
+
+DIM = 4096
+CHAR_NGRAMS = (3, 4, 5)
+# Bump when the vectorizer changes so saved matrices are rebuilt
+VECTORIZER_VERSION = 1
+
+
+def _features(text: str) -> list[str]:
+    words = [word for word in re.findall(r"[a-z0-9&]+", text.lower()) if word not in STOPWORDS]
+    features = [f"w:{word}" for word in words]
+    features += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f"<{word}>"
+        for n in CHAR_NGRAMS:
+            features += [f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1)]
+    return features
+
+
+def embed(texts: list[str], dim: int = DIM) -> np.ndarray:
+    """Unit-length hashed n-gram vectors, one row per text."""
+    matrix = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for feature in _features(text):
+            # crc32 is stable across processes, unlike hash()
+            h = zlib.crc32(feature.encode("utf-8"))
+            matrix[row, h % dim] += 1.0 if h & 0x80000000 else -1.0
+    # Sublinear term frequency, then unit length so dot products are cosines
+    matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def _document_text(doc: FaqDoc) -> str:
+    # Questions are what users paraphrase, so they count twice
+    return f"{doc.question} {doc.question} {doc.answer}"
+
+
+def vectors_path(faq_path: str) -> str:
+    return os.path.splitext(faq_path)[0] + ".vectors.npz"
+
+
+def _save(path: str, matrix: np.ndarray, content_hash: str) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=".npz")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, matrix=matrix, content_hash=np.array(content_hash), version=np.array(VECTORIZER_VERSION))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _load(path: str, content_hash: str, rows: int) -> Optional[np.ndarray]:
+    try:
+        with np.load(path) as saved:
+            if (
+                str(saved["content_hash"]) != content_hash
+                or int(saved["version"]) != VECTORIZER_VERSION
+                or saved["matrix"].shape != (rows, DIM)
+            ):
+                return None
+            return saved["matrix"]
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+class FaqVectors:
+    def __init__(self, docs: list[FaqDoc], matrix: np.ndarray) -> None:
+        self.docs = docs
+        self.matrix = matrix
+
+    @classmethod
+    def load_or_build(cls, data: dict, faq_path: str, content_hash: str) -> "FaqVectors":
+        """Vectors for the FAQ, from the saved matrix when it matches `content_hash`."""
+        docs = company_documents(data)
+        path = vectors_path(faq_path)
+        matrix = _load(path, content_hash, len(docs))
+        if matrix is None:
+            matrix = embed([_document_text(doc) for doc in docs])
+            try:
+                _save(path, matrix, content_hash)
+                logger.info(f"Saved FAQ vectors for {len(docs)} documents to {path}")
+            except OSError as e:
+                logger.warning(f"Could not save FAQ vectors to {path}: {e}")
+        return cls(docs, matrix)
+
+    def search(self, query: str, k: int = 3) -> list[tuple[FaqDoc, float]]:
+        """Top `k` documents by cosine similarity, best first."""
+        scores = self.matrix @ embed([query])[0]
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.docs[number], round(float(scores[number]), 3)) for number in top if scores[number] > 0]
+
+
+def fuse(rankings: list[list[tuple[FaqDoc, float]]], k: int = 3) -> list[tuple[FaqDoc, float]]:
+    """Reciprocal rank fusion of several result lists (hybrid search)."""
+    fused: dict[FaqDoc, float] = {}
+    for ranking in rankings:
+        for rank, (doc, _) in enumerate(ranking):
+            fused[doc] = fused.get(doc, 0.0) + 1.0 / (60 + rank)
+    best = sorted(fused.items(), key=lambda item: -item[1])[:k]
+    return [(doc, round(score, 4)) for doc, score in best]
+
+
+_vectors: Optional[FaqVectors] = None
+_vectors_hash: Optional[str] = None
+
+
+def get_faq_vectors(data: dict, faq_path: str, content_hash: str) -> FaqVectors:
+    """The process-wide vectors, reloaded only when the FAQ content changes."""
+    global _vectors, _vectors_hash
+    if _vectors is None or _vectors_hash != content_hash:
+        _vectors = FaqVectors.load_or_build(data, faq_path, content_hash)
+        _vectors_hash = content_hash
+    return _vectors
@@ -0,0 +1,399 @@
+"""Append-only archive of qualified leads.
+
+Every finished call appends one JSON line (the lead, its CRM analysis and
+session metadata) to `leads/archive/active.jsonl`. Each lead gets a sequence
+number that only ever grows, even across worker processes (allocated under
+an exclusive file lock), and its lead ID is built from it. When the active
+file holds `SEGMENT_MAX_LEADS` leads it is sealed into a numbered segment.
+
+Sealed segments get a columnar sidecar (`segment_000001.columns.npz`) with
+one NumPy array per column: sequence number, byte offset, timestamp,
+fit score and urgency. A lead is found by ID with a binary search over
+those arrays, fit score and urgency distributions are computed from them
+without parsing any JSON, and exports can skip whole segments by date.
+"""
+
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections.abc import Iterator
+from datetime import datetime
+from typing import Any, Optional
+
+import numpy as np
+
+from persistence import run_blocking
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, a single worker process is assumed
+    fcntl = None
+
+logger = logging.getLogger("lead_sink")
+
+ARCHIVE_DIR = os.getenv("LEAD_ARCHIVE_DIR", os.path.join("leads", "archive"))
+SEGMENT_MAX_LEADS = int(os.getenv("LEAD_ARCHIVE_SEGMENT_LEADS", "5000"))
+
+ACTIVE_FILE = "active.jsonl"
+SEGMENT_RE = re.compile(r"^segment_(\d{6})\.jsonl$")
+# Files written by the agent before the archive: leads/zerodha_lead_YYYYmmdd_HHMMSS.json
+LEGACY_NAME_RE = re.compile(r"^zerodha_lead_(\d{8}_\d{6})\.json$")
+URGENCY_LEVELS = ("unknown", "low", "medium", "high")
+# Fit score histogram bucket width
+FIT_BUCKET = 10
+
+
+def make_lead_id(seq: int, when: Optional[datetime] = None) -> str:
+    return f"lead_{(when or datetime.now()).strftime('%Y%m%d_%H%M%S')}_{seq:06d}"
+
+
+def lead_seq(lead_id: str) -> Optional[int]:
+    try:
+        return int(lead_id.rsplit("_", 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def _legacy_time(name: str, lead: dict) -> Optional[datetime]:
+    """When a legacy lead was saved: its own timestamp, else the time in its file name."""
+    try:
+        return datetime.fromisoformat(str(lead["timestamp"]))
+    except (KeyError, ValueError):
+        pass
+    match = LEGACY_NAME_RE.match(name)
+    return datetime.strptime(match.group(1), "%Y%m%d_%H%M%S") if match else None
+
+
+def _timestamp(record: dict) -> np.datetime64:
+    try:
+        return np.datetime64(str(record.get("timestamp", ""))[:19], "s")
+    except ValueError:
+        return np.datetime64("NaT", "s")
+
+
+def _urgency_code(record: dict) -> int:
+    level = record.get("urgency_level", "unknown")
+    return URGENCY_LEVELS.index(level) if level in URGENCY_LEVELS else 0
+
+
+def _iter_lines(path: str, offset: int = 0) -> Iterator[tuple[int, bytes]]:
+    """(offset, line) for every complete line from `offset` on."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                # Torn tail from a crashed writer; the next append starts a new line
+                break
+            yield offset, line
+            offset += len(line)
+
+
+def iter_segment_leads(path: str) -> Iterator[dict]:
+    try:
+        for _, line in _iter_lines(path):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        return
+
+
+class _Columns:
+    """Column arrays for the leads of one file."""
+
+    __slots__ = ("fit_score", "offset", "seq", "timestamp", "urgency")
+
+    def __init__(self, seq, offset, timestamp, fit_score, urgency) -> None:
+        self.seq = np.asarray(seq, dtype=np.int64)
+        self.offset = np.asarray(offset, dtype=np.int64)
+        self.timestamp = np.asarray(timestamp, dtype="datetime64[s]")
+        self.fit_score = np.asarray(fit_score, dtype=np.int16)
+        self.urgency = np.asarray(urgency, dtype=np.int8)
+
+    @classmethod
+    def scan(cls, path: str) -> "_Columns":
+        seq, offset, timestamp, fit_score, urgency = [], [], [], [], []
+        for line_offset, line in _iter_lines(path):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            seq.append(record.get("seq", 0))
+            offset.append(line_offset)
+            timestamp.append(_timestamp(record))
+            fit_score.append(record.get("fit_score") or 0)
+            urgency.append(_urgency_code(record))
+        return cls(seq, offset, timestamp, fit_score, urgency)
+
+    @classmethod
+    def load(cls, path: str) -> "_Columns":
+        with np.load(path) as saved:
+            return cls(**{name: saved[name] for name in cls.__slots__})
+
+    def save(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **{name: getattr(self, name) for name in self.__slots__})
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+class LeadSink:
+    def __init__(self, directory: str = ARCHIVE_DIR, segment_max_leads: int = SEGMENT_MAX_LEADS) -> None:
+        self.directory = os.path.abspath(directory)
+        self.segment_max_leads = segment_max_leads
+        os.makedirs(self.directory, exist_ok=True)
+        self.active_path = os.path.join(self.directory, ACTIVE_FILE)
+
+        # Sealed segment path -> its columns, loaded on first use
+        self._segments: dict[str, Optional[_Columns]] = {}
+        # Active file: which one (inode), how far it's been read, and its rows
+        self._active_inode: Optional[int] = None
+        self._active_offset = 0
+        self._active_rows: list[tuple[int, int, np.datetime64, int, int]] = []
+        self.last_seq = 0
+
+        self._lock = threading.Lock()
+        self._lock_fd = os.open(os.path.join(self.directory, "archive.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        with self._locked():
+            self._catch_up()
+        logger.info(f"Lead archive at {self.directory}: {len(self._segments)} sealed segments, last seq {self.last_seq}")
+
+    # ---- locking and indexing ----
+
+    def _locked(self) -> "_ArchiveLock":
+        return _ArchiveLock(self)
+
+    def _segment_paths(self) -> list[str]:
+        names = sorted(name for name in os.listdir(self.directory) if SEGMENT_RE.match(name))
+        return [os.path.join(self.directory, name) for name in names]
+
+    @staticmethod
+    def _columns_path(segment_path: str) -> str:
+        return segment_path[: -len(".jsonl")] + ".columns.npz"
+
+    def _columns(self, segment_path: str) -> _Columns:
+        columns = self._segments.get(segment_path)
+        if columns is None:
+            columns_path = self._columns_path(segment_path)
+            try:
+                columns = _Columns.load(columns_path)
+            except (OSError, KeyError, ValueError):
+                # Sealed without its sidecar (crash mid-seal); rebuild it once
+                columns = _Columns.scan(segment_path)
+                columns.save(columns_path)
+            self._segments[segment_path] = columns
+        return columns
+
+    def _catch_up(self) -> None:
+        """Pick up segments and leads other processes wrote since we last looked."""
+        new_segments = [path for path in self._segment_paths() if path not in self._segments]
+        for path in new_segments:
+            self._segments[path] = None
+        if new_segments:
+            # Sealed by another process, possibly with leads we never read from the active file
+            seq = self._columns(new_segments[-1]).seq
+            if len(seq):
+                self.last_seq = max(self.last_seq, int(seq.max()))
+        if not os.path.exists(self.active_path):
+            open(self.active_path, "ab").close()
+        st = os.stat(self.active_path)
+        if st.st_ino != self._active_inode:
+            self._active_inode, self._active_offset, self._active_rows = st.st_ino, 0, []
+        if st.st_size <= self._active_offset:
+            return
+        for offset, line in _iter_lines(self.active_path, self._active_offset):
+            self._active_offset = offset + len(line)
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping unreadable lead archive line at {self.active_path}:{offset}")
+                continue
+            seq = record.get("seq", 0)
+            self._active_rows.append(
+                (seq, offset, _timestamp(record), record.get("fit_score") or 0, _urgency_code(record))
+            )
+            self.last_seq = max(self.last_seq, seq)
+
+    def _active_columns(self) -> _Columns:
+        return _Columns(*zip(*self._active_rows)) if self._active_rows else _Columns([], [], [], [], [])
+
+    def _seal_active(self) -> None:
+        segments = self._segment_paths()
+        last = int(SEGMENT_RE.match(os.path.basename(segments[-1])).group(1)) if segments else 0
+        segment_path = os.path.join(self.directory, f"segment_{last + 1:06d}.jsonl")
+        columns = self._active_columns()
+        os.replace(self.active_path, segment_path)
+        columns.save(self._columns_path(segment_path))
+        self._segments[segment_path] = columns
+        open(self.active_path, "ab").close()
+        self._catch_up()
+        logger.info(f"Sealed lead archive segment {os.path.basename(segment_path)}")
+
+    # ---- writing ----
+
+    def _write(self, lead: dict, when: Optional[datetime] = None) -> dict:
+        with self._locked():
+            self._catch_up()
+            self.last_seq += 1
+            record = {**lead, "lead_id": make_lead_id(self.last_seq, when), "seq": self.last_seq}
+            data = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+            if os.path.getsize(self.active_path) > self._active_offset:
+                # Terminate a torn line left by a crashed writer so ours parses
+                data = b"\n" + data
+            fd = os.open(self.active_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(fd, view):]
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            self._catch_up()
+            if len(self._active_rows) >= self.segment_max_leads:
+                self._seal_active()
+            return record
+
+    def append_sync(self, lead: dict) -> dict:
+        """Append one lead and fsync it; for scripts running without an event loop."""
+        return self._write(lead)
+
+    async def append(self, lead: dict) -> dict:
+        """Durably append `lead`, returning the stored record with its `lead_id`."""
+        return await run_blocking(self._write, lead)
+
+    # ---- reading ----
+
+    def refresh(self) -> None:
+        with self._locked():
+            self._catch_up()
+
+    def get(self, lead_id: str) -> Optional[dict]:
+        """One lead by ID: a binary search in the segment holding its sequence number."""
+        seq = lead_seq(lead_id)
+        if seq is None:
+            return None
+        with self._locked():
+            self._catch_up()
+            files = [(path, self._columns(path)) for path in self._segments]
+            files.append((self.active_path, self._active_columns()))
+        for path, columns in files:
+            i = int(np.searchsorted(columns.seq, seq))
+            if i < len(columns.seq) and columns.seq[i] == seq:
+                with open(path, "rb") as f:
+                    f.seek(int(columns.offset[i]))
+                    record = json.loads(f.readline())
+                return record if record.get("lead_id") == lead_id else None
+        return None
+
+    def iter_leads(self, since: Optional[datetime] = None) -> Iterator[dict]:
+        """Stream leads oldest first, one line in memory at a time.
+
+        With `since`, segments whose newest lead is older are skipped unread.
+        """
+        with self._locked():
+            self._catch_up()
+            paths = list(self._segments)
+        cutoff = np.datetime64(since.replace(microsecond=0).isoformat(), "s") if since else None
+        for path in [*paths, self.active_path]:
+            if cutoff is not None and path != self.active_path:
+                timestamps = self._columns(path).timestamp
+                if not len(timestamps) or timestamps.max() < cutoff:
+                    continue
+            for record in iter_segment_leads(path):
+                if cutoff is None or _timestamp(record) >= cutoff:
+                    yield record
+
+    def stats(self) -> dict[str, Any]:
+        """Fit score and urgency distributions over every archived lead."""
+        with self._locked():
+            self._catch_up()
+            columns = [self._columns(path) for path in self._segments] + [self._active_columns()]
+        fit_scores = np.concatenate([c.fit_score for c in columns]).astype(np.int64)
+        urgency = np.concatenate([c.urgency for c in columns]).astype(np.int64)
+        buckets = np.bincount(np.clip(fit_scores, 0, 100) // FIT_BUCKET, minlength=100 // FIT_BUCKET + 1)
+        return {
+            "leads": len(fit_scores),
+            "fit_score_mean": round(float(fit_scores.mean()), 1) if len(fit_scores) else None,
+            "fit_score_median": float(np.median(fit_scores)) if len(fit_scores) else None,
+            "fit_score_buckets": {
+                f"{start}-{min(start + FIT_BUCKET - 1, 100)}": int(count)
+                for start, count in zip(range(0, 101, FIT_BUCKET), buckets)
+            },
+            "urgency": {
+                level: int(count)
+                for level, count in zip(URGENCY_LEVELS, np.bincount(urgency, minlength=len(URGENCY_LEVELS)))
+            },
+        }
+
+    def __len__(self) -> int:
+        segment_leads = sum(len(self._columns(path).seq) for path in self._segments)
+        return segment_leads + len(self._active_rows)
+
+    # ---- migration ----
+
+    def import_legacy_leads(self, leads_dir: str) -> int:
+        """Append the old one-file-per-lead JSON files (`zerodha_lead_*.json`).
+
+        Leads saved without a `timestamp` get the time from their file name, and
+        the lead ID is built from that time rather than the import's. Imported
+        files are renamed to `*.json.imported`, so running this twice doesn't
+        archive them twice.
+        """
+        if not os.path.isdir(leads_dir):
+            return 0
+        names = sorted(name for name in os.listdir(leads_dir) if name.endswith(".json"))
+        for name in names:
+            path = os.path.join(leads_dir, name)
+            with open(path, encoding="utf-8") as f:
+                lead = json.load(f)
+            when = _legacy_time(name, lead)
+            if when is not None and not lead.get("timestamp"):
+                lead["timestamp"] = when.isoformat()
+            self._write(lead, when)
+            os.replace(path, path + ".imported")
+        return len(names)
+
+
+class _ArchiveLock:
+    """Thread lock plus, where available, an exclusive flock shared with other processes."""
+
+    def __init__(self, sink: LeadSink) -> None:
+        self.sink = sink
+
+    def __enter__(self) -> None:
+        self.sink._lock.acquire()
+        if fcntl is not None:
+            fcntl.flock(self.sink._lock_fd, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc: Any) -> None:
+        if fcntl is not None:
+            fcntl.flock(self.sink._lock_fd, fcntl.LOCK_UN)
+        self.sink._lock.release()
+
+
+_sinks: dict[str, LeadSink] = {}
+_sinks_lock = threading.Lock()
+
+
+def get_lead_sink(directory: str = ARCHIVE_DIR) -> LeadSink:
+    """Process-wide archive for `directory` (resolved against the current directory)."""
+    path = os.path.abspath(directory)
+    with _sinks_lock:
+        if path not in _sinks:
+            _sinks[path] = LeadSink(path)
+        return _sinks[path]
@@ -0,0 +1,80 @@
+"""Lead details collected during one SDR call.
+
+Each session gets its own `LeadState` on the session's userdata, so calls
+handled by the same worker never see each other's leads. Conversation notes
+are kept in a bounded deque: a long call keeps its most recent notes instead
+of growing without limit. `close()` ends the lead's lifecycle when the call
+ends, dropping the notes so a finished session holds on to nothing large.
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Optional
+
+# Fields the LLM may fill in with capture_lead_field
+CAPTURE_FIELDS = ("name", "company", "email", "role", "use_case", "team_size", "timeline")
+# Notes kept per lead; older notes are dropped first
+MAX_NOTES = 50
+# Longest note or captured value kept, in characters
+MAX_VALUE_CHARS = 500
+
+
+def _clip(value: str) -> str:
+    value = str(value).strip()
+    return value if len(value) <= MAX_VALUE_CHARS else value[:MAX_VALUE_CHARS - 3] + "..."
+
+
+@dataclass
+class LeadState:
+    name: Optional[str] = None
+    company: Optional[str] = None
+    email: Optional[str] = None
+    role: Optional[str] = None
+    use_case: Optional[str] = None
+    team_size: Optional[str] = None
+    timeline: Optional[str] = None
+    conversation_notes: deque = field(default_factory=lambda: deque(maxlen=MAX_NOTES))
+    meeting_booked: Optional[dict] = None
+    pain_points: list[str] = field(default_factory=list)
+    budget_mentioned: bool = False
+    decision_maker_type: str = "unknown"
+    urgency_level: str = "unknown"
+    fit_score: int = 50
+    started_at: datetime = field(default_factory=datetime.now)
+    closed: bool = False
+
+    def set_field(self, field_type: str, value: str) -> bool:
+        """Store a captured detail; False for fields the lead doesn't have."""
+        if field_type not in CAPTURE_FIELDS:
+            return False
+        value = _clip(value)
+        setattr(self, field_type, value)
+        self.add_note(f"Captured {field_type}: {value}")
+        return True
+
+    def add_note(self, note: str) -> None:
+        if not self.closed:
+            self.conversation_notes.append(_clip(note))
+
+    def notes_text(self) -> str:
+        return " ".join(self.conversation_notes)
+
+    def to_dict(self) -> dict[str, Any]:
+        """The lead as saved to the leads file."""
+        return {
+            **{name: getattr(self, name) for name in CAPTURE_FIELDS},
+            "conversation_notes": list(self.conversation_notes),
+            "meeting_booked": self.meeting_booked,
+            "pain_points": list(self.pain_points),
+            "budget_mentioned": self.budget_mentioned,
+            "decision_maker_type": self.decision_maker_type,
+            "urgency_level": self.urgency_level,
+            "fit_score": self.fit_score,
+        }
+
+    def close(self) -> None:
+        """End of the call: drop the notes and ignore further ones."""
+        self.closed = True
+        self.conversation_notes.clear()
+        self.pain_points.clear()
@@ -0,0 +1,128 @@
+"""Opt-in detector for code that blocks the event loop.
+
+Enable it with `BLOCKING_DETECTOR=1` (threshold in `BLOCKING_THRESHOLD_MS`,
+default 100). A heartbeat task on the loop updates a timestamp every few
+milliseconds and a watchdog thread checks it. When the loop has not ticked
+for longer than the threshold, the watchdog grabs the loop thread's current
+stack, so every stall is reported with the function tool and the file/line
+that was holding the loop.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Optional
+
+logger = logging.getLogger("loop_monitor")
+
+ENABLED = os.getenv("BLOCKING_DETECTOR", "").lower() in ("1", "true", "yes")
+THRESHOLD_MS = float(os.getenv("BLOCKING_THRESHOLD_MS", "100"))
+
+# Frames from files under this directory count as "ours" when attributing a stall
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_HANDLE_RUN = os.path.join("asyncio", "events.py")
+
+
+@dataclass
+class Stall:
+    blocked_ms: float
+    location: str
+    tool: str
+    stack: list[str] = field(default_factory=list)
+
+
+class BlockingDetector:
+    def __init__(self, threshold_ms: float = THRESHOLD_MS, interval_ms: float = 10.0) -> None:
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.stalls: list[Stall] = []
+        self._last_beat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            self._last_beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Must be called from the event loop thread."""
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._heartbeat_task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._thread.start()
+        logger.info(f"Blocking detector on, threshold {self.threshold * 1000:.0f}ms")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+        if self._thread:
+            self._thread.join(timeout=1)
+        self.log_report()
+
+    def _capture(self, blocked: float) -> Stall:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.extract_stack(frame) if frame else []
+        # Only look at the callback the loop is currently running, not the frames that started the loop
+        step = max((i for i, f in enumerate(stack) if f.filename.endswith(_HANDLE_RUN)), default=-1)
+        ours = [f for f in stack[step + 1:] if os.path.abspath(f.filename).startswith(PROJECT_DIR)]
+        innermost = stack[-1] if stack else None
+        location = f"{innermost.filename}:{innermost.lineno}" if innermost else "unknown"
+        # The outermost of our own frames is the tool (or callback) that was running
+        tool = ours[0].name if ours else "unknown"
+        if ours and ours[-1] is not innermost:
+            location = f"{ours[-1].filename}:{ours[-1].lineno} -> {location}"
+        return Stall(
+            blocked_ms=blocked * 1000,
+            location=location,
+            tool=tool,
+            stack=[f"{f.filename}:{f.lineno} in {f.name}" for f in stack[-12:]],
+        )
+
+    def _watch(self) -> None:
+        current: Optional[Stall] = None
+        while not self._stop.wait(self.interval):
+            blocked = time.monotonic() - self._last_beat - self.interval
+            if blocked > self.threshold:
+                if current is None:
+                    current = self._capture(blocked)
+                    self.stalls.append(current)
+                current.blocked_ms = blocked * 1000
+            elif current is not None:
+                logger.warning(
+                    f"Event loop blocked for {current.blocked_ms:.0f}ms in {current.tool} "
+                    f"at {current.location}\n  " + "\n  ".join(current.stack)
+                )
+                current = None
+
+    def log_report(self) -> None:
+        if not self.stalls:
+            return
+        by_site: dict[tuple[str, str], list[float]] = defaultdict(list)
+        for stall in self.stalls:
+            by_site[(stall.tool, stall.location)].append(stall.blocked_ms)
+        lines = [
+            f"  {tool} at {location}: {len(times)}x, max {max(times):.0f}ms, total {sum(times):.0f}ms"
+            for (tool, location), times in sorted(by_site.items(), key=lambda kv: -sum(kv[1]))
+        ]
+        logger.warning("Event loop stalls this session:\n" + "\n".join(lines))
+
+
+def start_blocking_detector() -> Optional[BlockingDetector]:
+    """Start a detector on the running loop when BLOCKING_DETECTOR is set."""
+    if not ENABLED:
+        return None
+    detector = BlockingDetector()
+    detector.start()
+    return detector
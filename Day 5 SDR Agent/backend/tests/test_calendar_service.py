@@ -0,0 +1,95 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+from calendar_service import CalendarService
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def _write_calendar(path: str, slots: int) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "available_slots": [
+                {"id": f"slot_{i}", "date": "2025-03-03", "time": f"{8 + i % 10}:00 AM",
+                 "duration": "30 minutes", "type": "Demo Call"}
+                for i in range(slots)
+            ],
+            "booked_meetings": [],
+        }, f)
+
+
+def _booked_slots(path: str) -> list[str]:
+    """Every booking on disk, from the snapshot and the journal, duplicates included."""
+    with open(path, encoding="utf-8") as f:
+        slots = [meeting["slot_id"] for meeting in json.load(f)["booked_meetings"]]
+    journal = os.path.splitext(path)[0] + ".journal.jsonl"
+    if os.path.exists(journal):
+        with open(journal, encoding="utf-8") as f:
+            slots += [json.loads(line)["slot_id"] for line in f if line.strip()]
+    return slots
+
+
+def test_slots_are_booked_once_across_processes(tmp_path) -> None:
+    path = str(tmp_path / "calendar.json")
+    _write_calendar(path, 12)
+    # Each worker loads the calendar, then tries every slot in its own order,
+    # while the journal is compacted every two bookings
+    script = textwrap.dedent(f"""
+        import asyncio, os, random, sys
+        os.environ["CALENDAR_COMPACT_EVERY"] = "2"
+        sys.path.insert(0, {SRC_DIR!r})
+        from calendar_service import CalendarService
+
+        async def main():
+            calendar = CalendarService({path!r})
+            calendar.load()
+            slot_ids = list(calendar._slots)
+            random.Random(int(sys.argv[1])).shuffle(slot_ids)
+            for slot_id in slot_ids:
+                if await calendar.book(slot_id, name=sys.argv[1]):
+                    print(slot_id, flush=True)
+
+        asyncio.run(main())
+    """)
+    workers = [
+        subprocess.Popen([sys.executable, "-c", script, str(n)], stdout=subprocess.PIPE, text=True)
+        for n in range(6)
+    ]
+    booked = []
+    for worker in workers:
+        out, _ = worker.communicate(timeout=60)
+        assert worker.returncode == 0
+        booked += out.split()
+
+    assert sorted(booked) == sorted(f"slot_{i}" for i in range(12))
+    assert sorted(_booked_slots(path)) == sorted(booked)
+    calendar = CalendarService(path)
+    calendar.load()
+    assert calendar.free_slots() == []
+
+
+def test_compaction_by_another_process_is_picked_up(tmp_path, monkeypatch) -> None:
+    import calendar_service
+
+    monkeypatch.setattr(calendar_service, "COMPACT_EVERY", 2)
+    path = str(tmp_path / "calendar.json")
+    _write_calendar(path, 4)
+    first, second = CalendarService(path), CalendarService(path)
+    first.load()
+    second.load()
+
+    async def book(calendar: CalendarService, slot_id: str):
+        return await calendar.book(slot_id, name="test")
+
+    # `second` compacts these two away, then journals a third
+    assert asyncio.run(book(second, "slot_0"))
+    assert asyncio.run(book(second, "slot_1"))
+    assert asyncio.run(book(second, "slot_2"))
+
+    asyncio.run(first.refresh())
+    assert [slot["id"] for slot in first.free_slots(5)] == ["slot_3"]
+    assert asyncio.run(book(first, "slot_0")) is None
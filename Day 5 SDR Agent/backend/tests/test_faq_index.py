@@ -0,0 +1,67 @@
+import faq_index
+from faq_index import FaqIndex, company_documents, get_faq_index, stem
+
+DATA = {
+    "company": {"name": "Zerodha"},
+    "faqs": [
+        {"question": "What are your brokerage charges?",
+         "answer": "Equity delivery is free. Intraday and F&O trades cost a flat fee per executed order."},
+        {"question": "How do I open an account?",
+         "answer": "Sign up online with your PAN and bank details; the KYC takes a few minutes."},
+        {"question": "Is my money safe with Zerodha?",
+         "answer": "Client funds are held with the clearing corporation and are audited."},
+        {"question": "Do you offer mutual funds?",
+         "answer": "Coin lets you invest in direct mutual funds with no commission."},
+    ],
+    "company_details": {"founded": "Zerodha was founded in 2010 by Nithin Kamath."},
+    "target_audience": ["Active traders", "Long-term investors"],
+}
+
+
+def _questions(results) -> list[str]:
+    return [doc.question for doc, _ in results]
+
+
+def test_documents_cover_faqs_and_the_other_sections() -> None:
+    docs = company_documents(DATA)
+    assert len(docs) == 7
+    assert docs[4].question == "company details: founded"
+    assert [doc.answer for doc in docs if doc.section == "target_audience"] == ["Active traders", "Long-term investors"]
+
+
+def test_stemming_folds_plurals_and_verb_forms() -> None:
+    assert stem("charges") == stem("charge")
+    assert stem("trading") == stem("trade") == stem("trades")
+    assert stem("policies") == "policy"
+
+
+def test_search_ranks_the_matching_entry_first() -> None:
+    index = FaqIndex.from_company_data(DATA)
+    assert _questions(index.search("what do you charge for brokerage"))[0] == "What are your brokerage charges?"
+    # Everyday words reach the FAQ's terms through the synonyms
+    assert _questions(index.search("how expensive is it"))[0] == "What are your brokerage charges?"
+    assert _questions(index.search("can I register today"))[0] == "How do I open an account?"
+    assert _questions(index.search("who founded the company"))[0] == "company details: founded"
+
+
+def test_search_scores_are_sorted_and_limited_to_k() -> None:
+    index = FaqIndex.from_company_data(DATA)
+    results = index.search("zerodha funds account", k=2)
+    assert len(results) == 2
+    assert results[0][1] >= results[1][1] > 0
+    assert index.search("quantum chromodynamics") == []
+
+
+def test_exact_question_wins_over_a_longer_match() -> None:
+    index = FaqIndex.from_company_data(DATA)
+    results = index.search("is my money safe with zerodha")
+    assert results[0][0].question == "Is my money safe with Zerodha?"
+    assert results[0][1] > results[1][1]
+
+
+def test_index_is_rebuilt_only_for_a_new_version(monkeypatch) -> None:
+    monkeypatch.setattr(faq_index, "_index", None)
+    first = get_faq_index(DATA, "v1")
+    assert get_faq_index(DATA, "v1") is first
+    assert get_faq_index({"faqs": DATA["faqs"][:1]}, "v2") is not first
+    assert len(get_faq_index(DATA, "v2").docs) == 1
@@ -0,0 +1,92 @@
+import os
+
+import numpy as np
+
+import faq_vectors
+from faq_index import FaqDoc
+from faq_vectors import FaqVectors, embed, fuse, get_faq_vectors, vectors_path
+
+DATA = {
+    "faqs": [
+        {"question": "What are your brokerage fees?",
+         "answer": "Equity delivery is free; intraday trades cost a flat amount per executed order."},
+        {"question": "How do I open an account?",
+         "answer": "Sign up online with your PAN and bank details."},
+        {"question": "Is my money safe?",
+         "answer": "Client funds are held with the clearing corporation."},
+    ],
+}
+
+
+def _faq_path(tmp_path) -> str:
+    return os.path.join(str(tmp_path), "company_faq.json")
+
+
+def _count_embeds(monkeypatch) -> list[int]:
+    calls = []
+    real_embed = faq_vectors.embed
+
+    def counting_embed(texts, *args, **kwargs):
+        calls.append(len(texts))
+        return real_embed(texts, *args, **kwargs)
+
+    monkeypatch.setattr(faq_vectors, "embed", counting_embed)
+    return calls
+
+
+def test_embed_returns_unit_rows_and_is_stable() -> None:
+    matrix = embed(["brokerage charges", "", "brokerage charges"])
+    assert matrix.shape == (3, faq_vectors.DIM)
+    assert np.isclose(np.linalg.norm(matrix[0]), 1.0)
+    assert not matrix[1].any()
+    assert np.array_equal(matrix[0], matrix[2])
+
+
+def test_search_finds_a_paraphrase(tmp_path) -> None:
+    vectors = FaqVectors.load_or_build(DATA, _faq_path(tmp_path), "hash-1")
+    results = vectors.search("how much do you charge per trade")
+    assert results[0][0].question == "What are your brokerage fees?"
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+
+
+def test_saved_matrix_is_reused_until_the_content_hash_changes(tmp_path, monkeypatch) -> None:
+    faq_path = _faq_path(tmp_path)
+    calls = _count_embeds(monkeypatch)
+    built = FaqVectors.load_or_build(DATA, faq_path, "hash-1")
+    assert calls == [3]
+    assert os.path.exists(vectors_path(faq_path))
+
+    loaded = FaqVectors.load_or_build(DATA, faq_path, "hash-1")
+    assert calls == [3]
+    assert np.array_equal(loaded.matrix, built.matrix)
+
+    # New content: rebuilt and saved again under the new hash
+    changed = {"faqs": [*DATA["faqs"], {"question": "Do you offer mutual funds?", "answer": "Yes, on Coin."}]}
+    rebuilt = FaqVectors.load_or_build(changed, faq_path, "hash-2")
+    assert calls == [3, 4]
+    assert rebuilt.matrix.shape[0] == 4
+    FaqVectors.load_or_build(changed, faq_path, "hash-2")
+    assert calls == [3, 4]
+
+
+def test_saved_matrix_of_the_wrong_shape_is_rebuilt(tmp_path, monkeypatch) -> None:
+    faq_path = _faq_path(tmp_path)
+    FaqVectors.load_or_build({"faqs": DATA["faqs"][:1]}, faq_path, "hash-1")
+    calls = _count_embeds(monkeypatch)
+    # Same hash but a different number of documents: the saved file cannot be used
+    assert FaqVectors.load_or_build(DATA, faq_path, "hash-1").matrix.shape[0] == 3
+    assert calls == [3]
+
+
+def test_process_vectors_are_kept_per_content_hash(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(faq_vectors, "_vectors", None)
+    faq_path = _faq_path(tmp_path)
+    first = get_faq_vectors(DATA, faq_path, "hash-1")
+    assert get_faq_vectors(DATA, faq_path, "hash-1") is first
+    assert get_faq_vectors(DATA, faq_path, "hash-2") is not first
+
+
+def test_fuse_rewards_documents_ranked_well_by_both() -> None:
+    a, b, c = (FaqDoc("faqs", q, "") for q in ("a", "b", "c"))
+    fused = fuse([[(a, 3.0), (b, 2.0)], [(b, 0.9), (c, 0.5)]], k=2)
+    assert [doc for doc, _ in fused] == [b, a]
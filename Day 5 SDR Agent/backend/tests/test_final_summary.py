@@ -0,0 +1,43 @@
+import importlib
+import os
+import sys
+
+from livekit.agents import AgentSession
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+
+from fake_plugins import FakeLLM, FakeResponse, FakeSTT, FakeTTS, ToolCall  # noqa: E402
+
+
+async def test_final_summary_is_archived_with_the_room(tmp_path, monkeypatch) -> None:
+    # agent loads data/ relative to the working directory at import time
+    monkeypatch.chdir(BACKEND_DIR)
+    agent = importlib.import_module("agent")
+    from lead_sink import get_lead_sink
+
+    monkeypatch.chdir(tmp_path)
+    userdata = agent.Userdata(room_name="room-42")
+    userdata.lead.set_field("name", "Priya")
+    userdata.lead.set_field("use_case", "mutual funds")
+    fake_llm = FakeLLM({"That's all, thanks": FakeResponse(
+        text="Thanks for your time!",
+        tool_calls=[ToolCall("generate_final_summary", {})],
+    )})
+    session = AgentSession(
+        llm=fake_llm, stt=FakeSTT(), tts=FakeTTS(), userdata=userdata, session_close_transcript_timeout=0.0
+    )
+    errors = []
+    session.on("function_tools_executed", lambda ev: errors.extend(o for o in ev.function_call_outputs if o.is_error))
+    try:
+        await session.start(agent.ZerodhaSDRAssistant())
+        await session.run(user_input="That's all, thanks")
+    finally:
+        await session.aclose()
+
+    assert errors == []
+    leads = list(get_lead_sink().iter_leads())
+    assert len(leads) == 1
+    assert leads[0]["session_id"] == "room-42"
+    assert leads[0]["name"] == "Priya"
+    assert leads[0]["crm_analysis"]["lead_summary"].startswith("Priya")
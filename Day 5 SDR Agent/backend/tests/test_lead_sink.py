@@ -0,0 +1,141 @@
+import csv
+import io
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from datetime import datetime
+
+from lead_sink import SEGMENT_RE, LeadSink
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(BACKEND_DIR, "src")
+sys.path.insert(0, BACKEND_DIR)
+
+from export_leads import COLUMNS, export_csv  # noqa: E402
+
+
+def _lead(name: str, fit_score: int = 50, urgency: str = "medium", day: str = "2025-05-01") -> dict:
+    return {"name": name, "fit_score": fit_score, "urgency_level": urgency, "timestamp": f"{day}T10:00:00"}
+
+
+def _segments(directory: str) -> list[str]:
+    return sorted(name for name in os.listdir(directory) if SEGMENT_RE.match(name))
+
+
+def test_sequence_numbers_are_unique_across_processes(tmp_path) -> None:
+    script = textwrap.dedent(f"""
+        import sys
+        sys.path.insert(0, {SRC_DIR!r})
+        from lead_sink import LeadSink
+        sink = LeadSink({str(tmp_path)!r}, segment_max_leads=7)
+        for i in range(25):
+            sink.append_sync({{"name": sys.argv[1], "n": i, "fit_score": 50}})
+    """)
+    workers = [subprocess.Popen([sys.executable, "-c", script, f"worker{n}"]) for n in range(4)]
+    assert all(worker.wait(timeout=60) == 0 for worker in workers)
+
+    sink = LeadSink(str(tmp_path), segment_max_leads=7)
+    leads = list(sink.iter_leads())
+    assert sorted(lead["seq"] for lead in leads) == list(range(1, 101))
+    assert len(sink) == 100
+    for n in range(4):
+        assert [lead["n"] for lead in leads if lead["name"] == f"worker{n}"] == list(range(25))
+    for name in _segments(sink.directory):
+        with open(os.path.join(sink.directory, name), "rb") as f:
+            assert sum(1 for _ in f) == 7
+        assert os.path.exists(os.path.join(sink.directory, name[: -len(".jsonl")] + ".columns.npz"))
+    assert all(sink.get(lead["lead_id"]) == lead for lead in leads)
+
+
+def test_get_and_since_across_sealed_segments(tmp_path) -> None:
+    sink = LeadSink(str(tmp_path), segment_max_leads=3)
+    records = [sink.append_sync(_lead(f"lead{i}", day=f"2025-05-{i + 1:02d}")) for i in range(8)]
+
+    assert len(_segments(sink.directory)) == 2
+    assert all(sink.get(record["lead_id"]) == record for record in records)
+    assert sink.get("lead_20250101_000000_000099") is None
+    # Right seq, wrong lead ID
+    assert sink.get("lead_19990101_000000_000001") is None
+
+    since = [lead["name"] for lead in sink.iter_leads(since=datetime(2025, 5, 5))]
+    assert since == ["lead4", "lead5", "lead6", "lead7"]
+
+    # A sink opened later, or in another process, sees the same archive
+    reopened = LeadSink(str(tmp_path), segment_max_leads=3)
+    assert reopened.get(records[4]["lead_id"]) == records[4]
+    assert reopened.append_sync(_lead("next"))["seq"] == 9
+
+
+def test_stats(tmp_path) -> None:
+    sink = LeadSink(str(tmp_path), segment_max_leads=2)
+    for fit_score, urgency in [(15, "low"), (55, "high"), (58, "high"), (100, "medium"), (42, "unknown")]:
+        sink.append_sync(_lead("x", fit_score, urgency))
+
+    stats = sink.stats()
+    assert stats["leads"] == 5
+    assert stats["fit_score_mean"] == 54.0
+    assert stats["fit_score_median"] == 55.0
+    assert stats["fit_score_buckets"]["50-59"] == 2
+    assert stats["fit_score_buckets"]["100-100"] == 1
+    assert stats["urgency"] == {"unknown": 1, "low": 1, "medium": 1, "high": 2}
+
+
+def test_export_csv(tmp_path) -> None:
+    sink = LeadSink(str(tmp_path), segment_max_leads=2)
+    sink.append_sync({
+        **_lead("Priya", day="2025-04-30"),
+        "pain_points": ["fees", "app speed"],
+        "meeting_booked": {"date": "2025-05-02", "time": "9:00 AM"},
+        "crm_analysis": {"lead_summary": "Priya - investor", "next_steps": "Follow up"},
+    })
+    for i in range(3):
+        sink.append_sync(_lead(f"later{i}", day="2025-05-03"))
+
+    out = io.StringIO()
+    assert export_csv(sink, out) == 4
+    rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert list(rows[0]) == COLUMNS
+    assert rows[0]["name"] == "Priya"
+    assert rows[0]["pain_points"] == "fees; app speed"
+    assert rows[0]["meeting_time"] == "9:00 AM"
+    assert rows[0]["next_steps"] == "Follow up"
+    assert rows[1]["email"] == ""
+
+    out = io.StringIO()
+    assert export_csv(sink, out, since=datetime(2025, 5, 1)) == 3
+
+
+def test_import_legacy_leads_once(tmp_path) -> None:
+    legacy = tmp_path / "leads"
+    legacy.mkdir()
+    # The old agent only put the save time in the file name
+    for i in range(3):
+        lead = {"name": f"old{i}", "fit_score": 50, "urgency_level": "medium", "conversation_notes": []}
+        (legacy / f"zerodha_lead_2025050{i + 1}_093000.json").write_text(json.dumps(lead), encoding="utf-8")
+
+    sink = LeadSink(str(tmp_path / "archive"))
+    assert sink.import_legacy_leads(str(legacy)) == 3
+    assert sink.import_legacy_leads(str(legacy)) == 0
+    leads = list(sink.iter_leads())
+    assert [lead["name"] for lead in leads] == ["old0", "old1", "old2"]
+    assert [lead["lead_id"] for lead in leads] == [
+        "lead_20250501_093000_000001", "lead_20250502_093000_000002", "lead_20250503_093000_000003",
+    ]
+    assert leads[0]["timestamp"] == "2025-05-01T09:30:00"
+    assert [lead["name"] for lead in sink.iter_leads(since=datetime(2025, 5, 2))] == ["old1", "old2"]
+    assert sink.get("lead_20250502_093000_000002")["name"] == "old1"
+
+
+def test_import_keeps_a_legacy_lead_timestamp(tmp_path) -> None:
+    legacy = tmp_path / "leads"
+    legacy.mkdir()
+    (legacy / "zerodha_lead_20250601_120000.json").write_text(
+        json.dumps(_lead("stamped", day="2025-06-01")), encoding="utf-8"
+    )
+    sink = LeadSink(str(tmp_path / "archive"))
+    assert sink.import_legacy_leads(str(legacy)) == 1
+    (lead,) = sink.iter_leads(since=datetime(2025, 6, 1))
+    assert lead["timestamp"] == "2025-06-01T10:00:00"
+    assert lead["lead_id"] == "lead_20250601_100000_000001"
@@ -0,0 +1,28 @@
+"""Scripted conversation used by the offline benchmarks."""
+
+from fake_plugins import FakeResponse, ToolCall
+
+from agent import FraudAlertAssistant
+
+AGENT_NAME = "fraud_alert"
+
+# The mark_transaction_* tools rewrite fraud_database.json next to the source,
+# so the script stops at the read-only part of the call.
+SCRIPT = [
+    ("Hi, this is John Smith", FakeResponse(
+        text="Thank you. What is your mother's maiden name?",
+        tool_calls=[ToolCall("load_fraud_case", {"customer_name": "John Smith"})],
+    )),
+    ("Johnson", FakeResponse(
+        text="Thank you, you're verified.",
+        tool_calls=[ToolCall("verify_customer", {"answer": "Johnson"})],
+    )),
+    ("What was the transaction?", FakeResponse(
+        text="A charge of $1,247.99 from ABC Industry. Did you make this transaction?",
+        tool_calls=[ToolCall("get_transaction_details", {})],
+    )),
+]
+
+
+def make_agent() -> FraudAlertAssistant:
+    return FraudAlertAssistant()
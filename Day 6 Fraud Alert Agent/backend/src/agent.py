@@ -1,5 +1,4 @@
 import logging
-import json
 import os
 from datetime import datetime
 
@@ -10,6 +9,7 @@ from livekit.agents import (
     JobContext,
     JobProcess,
     MetricsCollectedEvent,
+    FunctionToolsExecutedEvent,
     RoomInputOptions,
     WorkerOptions,
     cli,
@@ -18,22 +18,37 @@ from livekit.agents import (
     function_tool,
     RunContext
 )
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+from livekit.plugins import murf, google, deepgram
+from latency_metrics import LatencyRecorder
+from loop_monitor import start_blocking_detector
+from model_cache import get_models, prewarm_models
+from persistence import load_json, read_json, update_json
+from phrase_cache import get_phrase_cache, prewarm_phrases
 
 logger = logging.getLogger("agent")
 load_dotenv(".env.local")
 
+DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "fraud_database.json")
+
+# Fixed lines spoken from pre-rendered audio instead of through the TTS
+GREETING = "Hello, this is NovaTrust Bank Fraud Department. We detected suspicious activity on your account. May I have your name to look up your case?"
+VERIFICATION_PROMPT = "Thank you. For security verification, {question}"
+
+
+def make_tts(http_session=None):
+    return murf.TTS(voice="en-US-matthew", style="Conversation", http_session=http_session)
+
+
 class FraudAlertAssistant(Agent):
     def __init__(self) -> None:
         super().__init__(
             instructions="""You are a fraud detection representative for NovaTrust Bank. 
 
-Start every conversation by saying: "Hello, this is NovaTrust Bank Fraud Department. We detected suspicious activity on your account. May I have your name to look up your case?"
+Every conversation opens with this greeting, which is played automatically when the call starts: "Hello, this is NovaTrust Bank Fraud Department. We detected suspicious activity on your account. May I have your name to look up your case?" Don't repeat it.
 
 Follow this process:
 1. Get customer name and use load_fraud_case function
-2. Ask the security question from their case  
+2. When a case is found, its security question is asked for you; wait for the answer  
 3. Use verify_customer function with their answer
 4. If verified, use get_transaction_details function and read the details
 5. Ask "Did you make this transaction? Please answer yes or no"
@@ -45,18 +60,22 @@ Always use the function tools. Keep responses brief and professional.""",
         self.current_case = None
         self.verification_passed = False
 
+    async def on_enter(self):
+        get_phrase_cache().say(self.session, GREETING)
+
     @function_tool
     async def load_fraud_case(self, context: RunContext, customer_name: str):
         """Load fraud case for customer"""
         try:
-            db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "fraud_database.json")
-            with open(db_path, 'r') as f:
-                cases = json.load(f)
+            cases = await load_json(DB_PATH, default=[])
             
             for case in cases:
                 if case['userName'].lower() == customer_name.lower():
                     self.current_case = case
-                    return f"Found case for {customer_name}. {case['securityQuestion']}"
+                    # Spoken straight from cached audio, no reply needed
+                    prompt = VERIFICATION_PROMPT.format(question=case['securityQuestion'])
+                    get_phrase_cache().say(context.session, prompt)
+                    return None
             
             return f"No case found for {customer_name}"
         except Exception as e:
@@ -92,7 +111,7 @@ Always use the function tools. Keep responses brief and professional.""",
         
         self.current_case['case'] = 'confirmed_safe'
         self.current_case['outcome'] = f"Customer confirmed on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-        self._update_database()
+        await self._update_database()
         return "Transaction marked as safe. No action needed."
     
     @function_tool
@@ -103,50 +122,68 @@ Always use the function tools. Keep responses brief and professional.""",
         
         self.current_case['case'] = 'confirmed_fraud'
         self.current_case['outcome'] = f"Customer denied on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-        self._update_database()
+        await self._update_database()
         return f"Card ending {self.current_case['cardEnding']} blocked. Dispute initiated."
     
-    def _update_database(self):
+    async def _update_database(self):
         try:
-            db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "fraud_database.json")
-            with open(db_path, 'r') as f:
-                cases = json.load(f)
+            updated_case = dict(self.current_case)
             
-            for i, case in enumerate(cases):
-                if case['securityIdentifier'] == self.current_case['securityIdentifier']:
-                    cases[i] = self.current_case
-                    break
+            def replace_case(cases):
+                for i, case in enumerate(cases):
+                    if case['securityIdentifier'] == updated_case['securityIdentifier']:
+                        cases[i] = updated_case
+                        break
+                return cases
             
-            with open(db_path, 'w') as f:
-                json.dump(cases, f, indent=2)
+            # Read-modify-write under a per-file lock on the persistence pool
+            await update_json(DB_PATH, replace_case, default=[], indent=2)
         except Exception as e:
             logger.error(f"Update error: {e}")
 
+def verification_prompts() -> list[str]:
+    cases = read_json(DB_PATH, default=[])
+    return sorted({VERIFICATION_PROMPT.format(question=case['securityQuestion']) for case in cases})
+
+
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    prewarm_models(proc)
+    prewarm_phrases([(make_tts, [GREETING, *verification_prompts()])])
 
 async def entrypoint(ctx: JobContext):
     ctx.log_context_fields = {"room": ctx.room.name}
 
+    models = get_models(ctx.proc)
+    blocking_detector = start_blocking_detector()
+
     session = AgentSession(
         stt=deepgram.STT(model="nova-2"),
         llm=google.LLM(),
-        tts=murf.TTS(voice="en-US-matthew", style="Conversation"),
-        turn_detection=MultilingualModel(),
-        vad=ctx.proc.userdata["vad"],
+        tts=make_tts(),  # same voice the cached phrases were rendered with
+        turn_detection=models.turn_detection,
+        vad=models.vad,
         preemptive_generation=True,
     )
 
     usage_collector = metrics.UsageCollector()
+    latency_recorder = LatencyRecorder(ctx.room.name)
 
     @session.on("metrics_collected")
     def _on_metrics_collected(ev: MetricsCollectedEvent):
         metrics.log_metrics(ev.metrics)
         usage_collector.collect(ev.metrics)
+        latency_recorder.record(ev.metrics)
+
+    @session.on("function_tools_executed")
+    def _on_function_tools_executed(ev: FunctionToolsExecutedEvent):
+        latency_recorder.record_tools(ev)
 
     async def log_usage():
         summary = usage_collector.get_summary()
         logger.info(f"Usage: {summary}")
+        latency_recorder.export()
+        if blocking_detector:
+            blocking_detector.stop()
 
     ctx.add_shutdown_callback(log_usage)
 
@@ -154,7 +191,7 @@ async def entrypoint(ctx: JobContext):
         agent=FraudAlertAssistant(),
         room=ctx.room,
         room_input_options=RoomInputOptions(
-            noise_cancellation=noise_cancellation.BVC(),
+            noise_cancellation=models.noise_cancellation,
         ),
     )
 
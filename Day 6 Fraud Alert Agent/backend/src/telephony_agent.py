@@ -1,5 +1,4 @@
 import logging
-import json
 import os
 from datetime import datetime
 
@@ -10,6 +9,7 @@ from livekit.agents import (
     JobContext,
     JobProcess,
     MetricsCollectedEvent,
+    FunctionToolsExecutedEvent,
     RoomInputOptions,
     WorkerOptions,
     cli,
@@ -18,12 +18,33 @@ from livekit.agents import (
     function_tool,
     RunContext
 )
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+from livekit.plugins import murf, google, deepgram
+from latency_metrics import LatencyRecorder
+from loop_monitor import start_blocking_detector
+from model_cache import get_models, prewarm_models
+from persistence import load_json, read_json, update_json
+from phrase_cache import get_phrase_cache, prewarm_phrases
 
 logger = logging.getLogger("telephony_agent")
 load_dotenv(".env.local")
 
+DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "fraud_database.json")
+
+# Fixed lines spoken from pre-rendered audio instead of through the TTS
+GREETING = "Hello, this is NovaTrust Bank Fraud Department calling about suspicious activity on your account. May I have your name please?"
+VERIFICATION_PROMPT = "Thank you. For security verification, {question}"
+
+
+def make_tts(http_session=None):
+    return murf.TTS(
+        voice="en-US-matthew",
+        style="Conversation",
+        # Optimized for phone calls
+        tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=1),
+        http_session=http_session,
+    )
+
+
 class TelephonyFraudAgent(Agent):
     def __init__(self) -> None:
         super().__init__(
@@ -31,9 +52,9 @@ class TelephonyFraudAgent(Agent):
 
 TELEPHONY PROTOCOL:
 - This is a PHONE CALL, speak naturally and clearly
-- Start: "Hello, this is NovaTrust Bank Fraud Department calling about suspicious activity on your account. May I have your name please?"
+- The opening line is played automatically when the call connects: "Hello, this is NovaTrust Bank Fraud Department calling about suspicious activity on your account. May I have your name please?" Don't repeat it.
 - Wait for customer name, then use load_fraud_case function
-- Ask security question from their case
+- When a case is found, its security question is asked for you; wait for the answer
 - Use verify_customer function with their answer
 - If verified, use get_transaction_details and read details clearly
 - Ask "Did you make this transaction? Please say yes or no"
@@ -46,6 +67,9 @@ Keep responses conversational for phone calls. Log all actions.""",
         self.verification_passed = False
         self.call_log = []
 
+    async def on_enter(self):
+        get_phrase_cache().say(self.session, GREETING)
+
     def _log_action(self, action: str, details: str = ""):
         """Log telephony actions"""
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -57,15 +81,16 @@ Keep responses conversational for phone calls. Log all actions.""",
     async def load_fraud_case(self, context: RunContext, customer_name: str):
         """Load fraud case for telephony customer"""
         try:
-            db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "fraud_database.json")
-            with open(db_path, 'r', encoding='utf-8') as f:
-                cases = json.load(f)
+            cases = await load_json(DB_PATH, default=[])
             
             for case in cases:
                 if case['userName'].lower() == customer_name.lower():
                     self.current_case = case
                     self._log_action("CASE_LOADED", f"Customer: {customer_name}, ID: {case['securityIdentifier']}")
-                    return f"Thank you {customer_name}. For security verification, {case['securityQuestion']}"
+                    # Spoken straight from cached audio, no reply needed
+                    prompt = VERIFICATION_PROMPT.format(question=case['securityQuestion'])
+                    get_phrase_cache().say(context.session, prompt)
+                    return None
             
             self._log_action("CASE_NOT_FOUND", f"Customer: {customer_name}")
             return f"I'm sorry, I don't have a case for {customer_name}. Please verify your name."
@@ -109,7 +134,7 @@ Keep responses conversational for phone calls. Log all actions.""",
         
         self.current_case['case'] = 'confirmed_safe'
         self.current_case['outcome'] = f"Customer confirmed via phone on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-        self._update_database()
+        await self._update_database()
         
         self._log_action("MARKED_SAFE", f"Case: {self.current_case['securityIdentifier']}")
         return "Thank you for confirming. The transaction has been marked as legitimate. No further action is needed. Have a great day!"
@@ -122,25 +147,25 @@ Keep responses conversational for phone calls. Log all actions.""",
         
         self.current_case['case'] = 'confirmed_fraud'
         self.current_case['outcome'] = f"Customer denied via phone on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-        self._update_database()
+        await self._update_database()
         
         self._log_action("MARKED_FRAUD", f"Case: {self.current_case['securityIdentifier']}, Card: {self.current_case['cardEnding']}")
         return f"I understand. I have immediately blocked your card ending in {self.current_case['cardEnding']} and initiated a dispute for the {self.current_case['transactionAmount']} charge. You will receive a new card within 3 to 5 business days. Is there anything else I can help you with today?"
     
-    def _update_database(self):
+    async def _update_database(self):
         """Update database with telephony call results"""
         try:
-            db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "fraud_database.json")
-            with open(db_path, 'r', encoding='utf-8') as f:
-                cases = json.load(f)
+            updated_case = dict(self.current_case)
             
-            for i, case in enumerate(cases):
-                if case['securityIdentifier'] == self.current_case['securityIdentifier']:
-                    cases[i] = self.current_case
-                    break
+            def replace_case(cases):
+                for i, case in enumerate(cases):
+                    if case['securityIdentifier'] == updated_case['securityIdentifier']:
+                        cases[i] = updated_case
+                        break
+                return cases
             
-            with open(db_path, 'w', encoding='utf-8') as f:
-                json.dump(cases, f, indent=2, ensure_ascii=False)
+            # Read-modify-write under a per-file lock on the persistence pool
+            await update_json(DB_PATH, replace_case, default=[], indent=2, ensure_ascii=False)
             
             self._log_action("DATABASE_UPDATED", f"Case: {self.current_case['securityIdentifier']}")
             
@@ -148,8 +173,14 @@ Keep responses conversational for phone calls. Log all actions.""",
             self._log_action("DATABASE_UPDATE_ERROR", str(e))
             logger.error(f"Telephony database update error: {e}")
 
+def verification_prompts() -> list[str]:
+    cases = read_json(DB_PATH, default=[])
+    return sorted({VERIFICATION_PROMPT.format(question=case['securityQuestion']) for case in cases})
+
+
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    prewarm_models(proc)
+    prewarm_phrases(make_tts, [GREETING, *verification_prompts()])
 
 async def entrypoint(ctx: JobContext):
     # Enhanced logging for telephony
@@ -158,6 +189,9 @@ async def entrypoint(ctx: JobContext):
         "telephony": True,
         "fraud_agent": "NovaTrust"
     }
+
+    models = get_models(ctx.proc)
+    blocking_detector = start_blocking_detector()
     
     logger.info(f"TELEPHONY - Starting fraud agent for room: {ctx.room.name}")
 
@@ -165,27 +199,31 @@ async def entrypoint(ctx: JobContext):
     session = AgentSession(
         stt=deepgram.STT(model="nova-2"),
         llm=google.LLM(),
-        tts=murf.TTS(
-            voice="en-US-matthew", 
-            style="Conversation",
-            # Optimized for phone calls
-            tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=1)
-        ),
-        turn_detection=MultilingualModel(),
-        vad=ctx.proc.userdata["vad"],
+        tts=make_tts(),  # same voice the cached phrases were rendered with
+        turn_detection=models.turn_detection,
+        vad=models.vad,
         preemptive_generation=True,
     )
 
     usage_collector = metrics.UsageCollector()
+    latency_recorder = LatencyRecorder(ctx.room.name)
 
     @session.on("metrics_collected")
     def _on_metrics_collected(ev: MetricsCollectedEvent):
         metrics.log_metrics(ev.metrics)
         usage_collector.collect(ev.metrics)
+        latency_recorder.record(ev.metrics)
+
+    @session.on("function_tools_executed")
+    def _on_function_tools_executed(ev: FunctionToolsExecutedEvent):
+        latency_recorder.record_tools(ev)
 
     async def log_usage():
         summary = usage_collector.get_summary()
         logger.info(f"TELEPHONY - Usage summary: {summary}")
+        latency_recorder.export()
+        if blocking_detector:
+            blocking_detector.stop()
 
     ctx.add_shutdown_callback(log_usage)
 
@@ -194,7 +232,7 @@ async def entrypoint(ctx: JobContext):
         agent=TelephonyFraudAgent(),
         room=ctx.room,
         room_input_options=RoomInputOptions(
-            noise_cancellation=noise_cancellation.BVCTelephony(),
+            noise_cancellation=models.noise_cancellation_telephony,
         ),
     )
 
@@ -0,0 +1,147 @@
+"""Deterministic stand-ins for the STT, LLM and TTS plugins.
+
+They let the benchmarks drive an `AgentSession` without network access or API
+keys. `FakeLLM` replies from a script keyed by the user's message: it first
+emits the scripted tool calls, then the scripted text once the tool outputs
+are in the chat context.
+"""
+
+import asyncio
+import json
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from livekit.agents import (
+    DEFAULT_API_CONNECT_OPTIONS,
+    NOT_GIVEN,
+    APIConnectOptions,
+    NotGivenOr,
+    llm,
+    stt,
+    tts,
+    utils,
+)
+
+
+@dataclass
+class ToolCall:
+    name: str
+    arguments: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class FakeResponse:
+    text: str = "Okay."
+    tool_calls: list[ToolCall] = field(default_factory=list)
+
+
+class FakeLLM(llm.LLM):
+    def __init__(
+        self,
+        responses: dict[str, FakeResponse],
+        *,
+        ttft: float = 0.0,
+        default: Optional[FakeResponse] = None,
+    ) -> None:
+        super().__init__()
+        self._responses = responses
+        self._ttft = ttft
+        self._default = default or FakeResponse()
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: Optional[list[Any]] = None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        parallel_tool_calls: NotGivenOr[bool] = NOT_GIVEN,
+        tool_choice: NotGivenOr[Any] = NOT_GIVEN,
+        extra_kwargs: NotGivenOr[dict[str, Any]] = NOT_GIVEN,
+    ) -> "FakeLLMStream":
+        return FakeLLMStream(self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options)
+
+    def response_for(self, chat_ctx: llm.ChatContext) -> tuple[FakeResponse, bool]:
+        """Return the scripted response and whether tool outputs are already in."""
+        items = chat_ctx.items
+        user_text = ""
+        for item in reversed(items):
+            if item.type == "message" and item.role == "user":
+                user_text = item.text_content or ""
+                break
+        after_tools = bool(items) and items[-1].type == "function_call_output"
+        return self._responses.get(user_text, self._default), after_tools
+
+
+class FakeLLMStream(llm.LLMStream):
+    async def _run(self) -> None:
+        fake: FakeLLM = self._llm
+        if fake._ttft:
+            await asyncio.sleep(fake._ttft)
+
+        response, after_tools = fake.response_for(self._chat_ctx)
+        if response.tool_calls and not after_tools:
+            delta = llm.ChoiceDelta(
+                role="assistant",
+                tool_calls=[
+                    llm.FunctionToolCall(
+                        name=call.name,
+                        arguments=json.dumps(call.arguments),
+                        call_id=f"call_{utils.shortuuid()}",
+                    )
+                    for call in response.tool_calls
+                ],
+            )
+        else:
+            delta = llm.ChoiceDelta(role="assistant", content=response.text)
+        self._event_ch.send_nowait(llm.ChatChunk(id=utils.shortuuid(), delta=delta))
+
+
+class FakeSTT(stt.STT):
+    def __init__(self, transcript: str = "") -> None:
+        super().__init__(
+            capabilities=stt.STTCapabilities(streaming=False, interim_results=False)
+        )
+        self._transcript = transcript
+
+    async def _recognize_impl(
+        self,
+        buffer: Any,
+        *,
+        language: NotGivenOr[str] = NOT_GIVEN,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+    ) -> stt.SpeechEvent:
+        return stt.SpeechEvent(
+            type=stt.SpeechEventType.FINAL_TRANSCRIPT,
+            alternatives=[stt.SpeechData(language="en", text=self._transcript)],
+        )
+
+
+class FakeTTS(tts.TTS):
+    """Synthesizes silence whose length follows the text, like a ~15 chars/s voice."""
+
+    def __init__(self, *, sample_rate: int = 24000, chars_per_second: float = 15.0) -> None:
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=sample_rate,
+            num_channels=1,
+        )
+        self._chars_per_second = chars_per_second
+
+    def synthesize(
+        self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS
+    ) -> "FakeChunkedStream":
+        return FakeChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+
+class FakeChunkedStream(tts.ChunkedStream):
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        fake: FakeTTS = self._tts
+        samples = int(len(self._input_text) / fake._chars_per_second * fake.sample_rate)
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=fake.sample_rate,
+            num_channels=1,
+            mime_type="audio/pcm",
+        )
+        output_emitter.push(b"\x00\x00" * samples)
+        output_emitter.flush()
@@ -0,0 +1,54 @@
+"""Scripted conversation used by the offline benchmarks."""
+
+import os
+
+from fake_plugins import FakeResponse, ToolCall
+
+from agent import QuickBasketAssistant
+
+AGENT_NAME = "quick_basket"
+
+_orders_file = None
+
+# (user message, scripted LLM response)
+SCRIPT = [
+    ("Hi, I need some rice", FakeResponse(
+        text="We have Basmati Rice from India Gate.",
+        tool_calls=[ToolCall("search_catalog", {"query": "rice"})],
+    )),
+    ("Add two bags of basmati rice", FakeResponse(
+        text="Added to your cart.",
+        tool_calls=[ToolCall("add_to_cart", {"item_name": "Basmati Rice", "quantity": 2})],
+    )),
+    ("And the ingredients for dal rice", FakeResponse(
+        text="I've added the dal rice ingredients.",
+        tool_calls=[ToolCall("add_recipe_ingredients", {"dish_name": "dal rice"})],
+    )),
+    ("What's in my cart?", FakeResponse(
+        text="Here's your cart.",
+        tool_calls=[ToolCall("view_cart", {})],
+    )),
+    ("Place the order for Sam", FakeResponse(
+        text="Your order is placed!",
+        tool_calls=[ToolCall("place_order", {"customer_name": "Sam"})],
+    )),
+    ("Where is my order?", FakeResponse(
+        text="It's being reviewed.",
+        tool_calls=[ToolCall("track_order", {})],
+    )),
+]
+
+
+def prepare_workdir(path: str) -> None:
+    global _orders_file
+    _orders_file = os.path.join(path, "orders", "order_history.json")
+
+
+def make_agent() -> QuickBasketAssistant:
+    agent = QuickBasketAssistant()
+    if _orders_file:
+        # Keep benchmark orders out of src/orders; history still accumulates
+        # across sessions like it does for a real store.
+        agent.order_manager.orders_file = _orders_file
+        agent.order_manager.orders = agent.order_manager._load_orders()
+    return agent
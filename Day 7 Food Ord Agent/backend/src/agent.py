@@ -2,7 +2,7 @@ import logging
 import json
 import os
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
 from dotenv import load_dotenv
 from order_manager import OrderManager
@@ -12,6 +12,7 @@ from livekit.agents import (
     JobContext,
     JobProcess,
     MetricsCollectedEvent,
+    FunctionToolsExecutedEvent,
     RoomInputOptions,
     WorkerOptions,
     cli,
@@ -20,20 +21,44 @@ from livekit.agents import (
     function_tool,
     RunContext
 )
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+from livekit.plugins import murf, google, deepgram
+from latency_metrics import LatencyRecorder
+from loop_monitor import start_blocking_detector
+from model_cache import get_models, prewarm_models
+from phrase_cache import get_phrase_cache, prewarm_phrases
 
 logger = logging.getLogger("agent")
 
 load_dotenv(".env.local")
 
+# Fixed lines spoken from pre-rendered audio instead of through the TTS
+GREETING = "Hi! I'm QuickBasket. I can help you order groceries and simple meal ingredients, track your orders, help you reorder from your history, and work within your budget or dietary constraints. What would you like to do today?"
+NO_ORDERS_MESSAGE = "No orders found. Place an order first!"
+ORDER_STATUS_MESSAGES = {
+    "received": "Your order has been received and is being reviewed.",
+    "confirmed": "Your order has been confirmed and is being prepared.",
+    "being_prepared": "Your order is currently being prepared.",
+    "out_for_delivery": "Your order is out for delivery!",
+    "delivered": "Your order has been delivered. Enjoy!"
+}
+
+
+def make_tts(http_session=None):
+    return murf.TTS(
+        voice="en-US-matthew",
+        style="Conversation",
+        tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=2),
+        text_pacing=True,
+        http_session=http_session,
+    )
+
 
 class QuickBasketAssistant(Agent):
     def __init__(self) -> None:
         super().__init__(
             instructions="""You are QuickBasket, a friendly food and grocery ordering assistant for our store. 
             
-            ALWAYS start conversations by greeting users and saying: "Hi! I'm QuickBasket. I can help you order groceries and simple meal ingredients, track your orders, help you reorder from your history, and work within your budget or dietary constraints. What would you like to do today?"
+            Every conversation opens with this greeting, which is played automatically when the session starts: "Hi! I'm QuickBasket. I can help you order groceries and simple meal ingredients, track your orders, help you reorder from your history, and work within your budget or dietary constraints. What would you like to do today?" Don't repeat it.
             
             Key behaviors:
             - Ask for clarifications on size, brand, quantity when items have multiple options
@@ -50,6 +75,9 @@ class QuickBasketAssistant(Agent):
         self.cart = {}
         self.order_manager = OrderManager()
         self.constraints = {"budget": None, "dietary": []}
+
+    async def on_enter(self):
+        get_phrase_cache().say(self.session, GREETING)
         
     def _load_catalog(self) -> Dict[str, Any]:
         try:
@@ -145,7 +173,7 @@ class QuickBasketAssistant(Agent):
         return f"Sorry, I couldn't find the ingredients for {dish_name}."
     
     @function_tool
-    async def track_order(self, context: RunContext, order_id: str = None) -> str:
+    async def track_order(self, context: RunContext, order_id: str = None) -> Optional[str]:
         """Track the status of an order.
         
         Args:
@@ -156,18 +184,17 @@ class QuickBasketAssistant(Agent):
         
         order = self.order_manager.get_order_status(order_id)
         if not order:
-            return "No orders found. Place an order first!"
-        
-        status_messages = {
-            "received": "Your order has been received and is being reviewed.",
-            "confirmed": "Your order has been confirmed and is being prepared.",
-            "being_prepared": "Your order is currently being prepared.",
-            "out_for_delivery": "Your order is out for delivery!",
-            "delivered": "Your order has been delivered. Enjoy!"
-        }
-        
-        status_msg = status_messages.get(order["status"], f"Status: {order['status']}")
-        return f"Order {order['order_id']}: {status_msg}"
+            get_phrase_cache().say(context.session, NO_ORDERS_MESSAGE)
+            return None
+        
+        status_msg = ORDER_STATUS_MESSAGES.get(order["status"])
+        if status_msg is None:
+            return f"Order {order['order_id']}: Status: {order['status']}"
+
+        # Known statuses are spoken straight from cached audio, no reply needed
+        logger.info(f"Order {order['order_id']}: {order['status']}")
+        get_phrase_cache().say(context.session, status_msg)
+        return None
     
     @function_tool
     async def order_history(self, context: RunContext, limit: int = 3) -> str:
@@ -479,7 +506,8 @@ class QuickBasketAssistant(Agent):
 
 
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    prewarm_models(proc)
+    prewarm_phrases([(make_tts, [GREETING, NO_ORDERS_MESSAGE, *ORDER_STATUS_MESSAGES.values()])])
 
 
 async def entrypoint(ctx: JobContext):
@@ -489,6 +517,9 @@ async def entrypoint(ctx: JobContext):
         "room": ctx.room.name,
     }
 
+    models = get_models(ctx.proc)
+    blocking_detector = start_blocking_detector()
+
     # Set up a voice AI pipeline using OpenAI, Cartesia, AssemblyAI, and the LiveKit turn detector
     session = AgentSession(
         # Speech-to-text (STT) is your agent's ears, turning the user's speech into text that the LLM can understand
@@ -501,16 +532,12 @@ async def entrypoint(ctx: JobContext):
             ),
         # Text-to-speech (TTS) is your agent's voice, turning the LLM's text into speech that the user can hear
         # See all available models as well as voice selections at https://docs.livekit.io/agents/models/tts/
-        tts=murf.TTS(
-                voice="en-US-matthew", 
-                style="Conversation",
-                tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=2),
-                text_pacing=True
-            ),
+        # Same voice the cached phrases were rendered with (see make_tts)
+        tts=make_tts(),
         # VAD and turn detection are used to determine when the user is speaking and when the agent should respond
         # See more at https://docs.livekit.io/agents/build/turns
-        turn_detection=MultilingualModel(),
-        vad=ctx.proc.userdata["vad"],
+        turn_detection=models.turn_detection,
+        vad=models.vad,
         # allow the LLM to generate a response while waiting for the end of turn
         # See more at https://docs.livekit.io/agents/build/audio/#preemptive-generation
         preemptive_generation=True,
@@ -529,15 +556,24 @@ async def entrypoint(ctx: JobContext):
     # Metrics collection, to measure pipeline performance
     # For more information, see https://docs.livekit.io/agents/build/metrics/
     usage_collector = metrics.UsageCollector()
+    latency_recorder = LatencyRecorder(ctx.room.name)
 
     @session.on("metrics_collected")
     def _on_metrics_collected(ev: MetricsCollectedEvent):
         metrics.log_metrics(ev.metrics)
         usage_collector.collect(ev.metrics)
+        latency_recorder.record(ev.metrics)
+
+    @session.on("function_tools_executed")
+    def _on_function_tools_executed(ev: FunctionToolsExecutedEvent):
+        latency_recorder.record_tools(ev)
 
     async def log_usage():
         summary = usage_collector.get_summary()
         logger.info(f"Usage: {summary}")
+        latency_recorder.export()
+        if blocking_detector:
+            blocking_detector.stop()
 
     ctx.add_shutdown_callback(log_usage)
 
@@ -555,7 +591,7 @@ async def entrypoint(ctx: JobContext):
         room=ctx.room,
         room_input_options=RoomInputOptions(
             # For telephony applications, use `BVCTelephony` for best results
-            noise_cancellation=noise_cancellation.BVC(),
+            noise_cancellation=models.noise_cancellation,
         ),
     )
 
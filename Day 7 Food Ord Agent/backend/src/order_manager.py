@@ -3,6 +3,8 @@ import os
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 
+from persistence import save_json_soon
+
 class OrderManager:
     def __init__(self):
         self.orders_file = os.path.join(os.path.dirname(__file__), 'orders', 'order_history.json')
@@ -18,9 +20,8 @@ class OrderManager:
         return []
     
     def _save_orders(self):
-        os.makedirs(os.path.dirname(self.orders_file), exist_ok=True)
-        with open(self.orders_file, 'w') as f:
-            json.dump(self.orders, f, indent=2)
+        # Snapshot now, write on the persistence pool when called from the agent's event loop
+        save_json_soon(self.orders_file, self.orders, indent=2)
     
     def create_order(self, cart_items: Dict, customer_name: str = "Customer", order_type: str = "grocery") -> str:
         order_id = f"QB{datetime.now().strftime('%Y%m%d%H%M%S')}"
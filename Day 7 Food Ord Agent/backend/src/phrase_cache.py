@@ -0,0 +1,229 @@
+"""Pre-rendered audio for fixed phrases.
+
+Some lines are spoken word for word in almost every session: greetings,
+mode-switch confirmations, verification prompts, order status updates.
+`PhraseCache` synthesizes each (voice, text) pair once, stores the PCM as a
+WAV file named by a SHA-256 of the voice and text, and plays it back with
+`session.say(text, audio=...)`, skipping the TTS round-trip entirely.
+
+Phrases are rendered at prewarm time when the TTS can be reached then (or
+found on disk from an earlier run). Prewarm renders a few phrases at once and
+stops at `PREWARM_TIMEOUT`, well inside the worker's process initialization
+timeout. A phrase spoken before it is cached goes through the TTS as usual
+and is rendered in the background for next time.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import wave
+from collections.abc import AsyncIterator, Iterable, Sequence
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import aiohttp
+from livekit import rtc
+from livekit.agents import AgentSession, tts
+
+logger = logging.getLogger("phrase_cache")
+
+PHRASE_CACHE_DIR = os.getenv("PHRASE_CACHE_DIR", "phrase_cache")
+FRAME_MS = 20
+# Seconds prewarm may spend rendering; the worker kills a process whose
+# prewarm takes longer than its initialize_process_timeout (10 s by default)
+PREWARM_TIMEOUT = float(os.getenv("PHRASE_PREWARM_TIMEOUT", "5"))
+# Phrases rendered at the same time during prewarm
+PREWARM_CONCURRENCY = int(os.getenv("PHRASE_PREWARM_CONCURRENCY", "4"))
+
+
+@dataclass
+class CachedPhrase:
+    pcm: bytes  # 16-bit signed little-endian samples
+    sample_rate: int
+    num_channels: int
+
+    async def frames(self) -> AsyncIterator[rtc.AudioFrame]:
+        samples = self.sample_rate * FRAME_MS // 1000
+        step = samples * self.num_channels * 2
+        for start in range(0, len(self.pcm), step):
+            chunk = self.pcm[start:start + step]
+            yield rtc.AudioFrame(
+                data=chunk,
+                sample_rate=self.sample_rate,
+                num_channels=self.num_channels,
+                samples_per_channel=len(chunk) // (2 * self.num_channels),
+            )
+
+
+def voice_id(engine: tts.TTS) -> str:
+    """Everything that changes how a TTS sounds, as part of the cache key."""
+    opts = getattr(engine, "_opts", None)
+    parts = [getattr(engine, "provider", type(engine).__name__)]
+    for attr in ("model", "voice", "style", "speed", "pitch"):
+        value = getattr(opts, attr, None)
+        if value is not None:
+            parts.append(f"{attr}={value}")
+    parts.append(f"rate={engine.sample_rate}")
+    return ";".join(parts)
+
+
+class PhraseCache:
+    def __init__(self, cache_dir: str = PHRASE_CACHE_DIR) -> None:
+        self.cache_dir = os.path.abspath(cache_dir)
+        self._memory: dict[str, CachedPhrase] = {}
+        self._pending: dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.rendered = 0
+
+    @staticmethod
+    def key(voice: str, text: str) -> str:
+        return hashlib.sha256(f"{voice}\n{text}".encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    def load(self, voice: str, text: str) -> Optional[CachedPhrase]:
+        """The cached audio, reading it from disk on first use."""
+        key = self.key(voice, text)
+        phrase = self._memory.get(key)
+        if phrase is None and os.path.exists(self._path(key)):
+            with wave.open(self._path(key), "rb") as f:
+                phrase = CachedPhrase(f.readframes(f.getnframes()), f.getframerate(), f.getnchannels())
+            self._memory[key] = phrase
+        return phrase
+
+    def _store(self, key: str, phrase: CachedPhrase) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp_", suffix=".wav")
+        try:
+            with os.fdopen(fd, "wb") as raw, wave.open(raw, "wb") as f:
+                f.setnchannels(phrase.num_channels)
+                f.setsampwidth(2)
+                f.setframerate(phrase.sample_rate)
+                f.writeframes(phrase.pcm)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._memory[key] = phrase
+
+    async def render(self, engine: tts.TTS, text: str) -> CachedPhrase:
+        """Synthesize `text` with `engine` and cache the result."""
+        chunks: list[bytes] = []
+        sample_rate, num_channels = engine.sample_rate, engine.num_channels
+        async with engine.synthesize(text) as stream:
+            async for audio in stream:
+                sample_rate, num_channels = audio.frame.sample_rate, audio.frame.num_channels
+                chunks.append(audio.frame.data.tobytes())
+        phrase = CachedPhrase(b"".join(chunks), sample_rate, num_channels)
+        await asyncio.to_thread(self._store, self.key(voice_id(engine), text), phrase)
+        self.rendered += 1
+        return phrase
+
+    async def prerender(
+        self, engine: tts.TTS, texts: Iterable[str], limit: Optional[asyncio.Semaphore] = None
+    ) -> int:
+        """Make sure every text is cached for this voice; returns how many were rendered.
+
+        Missing texts are rendered concurrently, at most `limit` at a time.
+        """
+        voice = voice_id(engine)
+        missing = [text for text in dict.fromkeys(texts) if self.load(voice, text) is None]
+        limit = limit or asyncio.Semaphore(PREWARM_CONCURRENCY)
+
+        async def render_one(text: str) -> bool:
+            async with limit:
+                try:
+                    await self.render(engine, text)
+                    return True
+                except Exception as e:
+                    logger.warning(f"Could not pre-render {text!r}: {e}")
+                    return False
+
+        return sum(await asyncio.gather(*(render_one(text) for text in missing)))
+
+    def _fill_later(self, engine: tts.TTS, text: str) -> None:
+        key = self.key(voice_id(engine), text)
+        if key in self._pending:
+            return
+
+        async def fill() -> None:
+            try:
+                voice = voice_id(engine)
+                if await asyncio.to_thread(self.load, voice, text) is None:
+                    await self.render(engine, text)
+            except Exception as e:
+                logger.warning(f"Could not cache {text!r}: {e}")
+            finally:
+                self._pending.pop(key, None)
+
+        self._pending[key] = asyncio.get_running_loop().create_task(fill())
+
+    def say(self, session: AgentSession, text: str, engine: Optional[tts.TTS] = None, **kwargs):
+        """Speak `text` from cached audio when there is some, through the TTS otherwise."""
+        engine = engine or session.tts
+        if engine is None:
+            return session.say(text, **kwargs)
+        phrase = self._memory.get(self.key(voice_id(engine), text))
+        if phrase is not None:
+            self.hits += 1
+            return session.say(text, audio=phrase.frames(), **kwargs)
+        self.misses += 1
+        self._fill_later(engine, text)
+        return session.say(text, **kwargs)
+
+
+_cache: Optional[PhraseCache] = None
+
+
+def get_phrase_cache() -> PhraseCache:
+    """The process-wide phrase cache."""
+    global _cache
+    if _cache is None:
+        _cache = PhraseCache()
+    return _cache
+
+
+def prewarm_phrases(
+    voices: Sequence[tuple[Callable[[aiohttp.ClientSession], tts.TTS], Iterable[str]]],
+    timeout: float = PREWARM_TIMEOUT,
+) -> None:
+    """Load or render the texts for each (make_tts, texts) voice from a
+    worker's prewarm_fnc, spending at most `timeout` seconds.
+
+    Prewarm runs outside of any job, so the TTS gets its own HTTP session
+    here. Phrases still missing at the deadline, or that fail (no API key,
+    no network), are rendered on first use instead.
+    """
+    cache = get_phrase_cache()
+    voices = [(make_tts, list(texts)) for make_tts, texts in voices]
+    total = sum(len(texts) for _, texts in voices)
+    before = cache.rendered
+
+    async def run() -> None:
+        limit = asyncio.Semaphore(PREWARM_CONCURRENCY)
+        async with aiohttp.ClientSession() as http:
+            engines = [(make_tts(http), texts) for make_tts, texts in voices]
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(*(cache.prerender(engine, texts, limit) for engine, texts in engines)),
+                    timeout,
+                )
+            finally:
+                for engine, _ in engines:
+                    await engine.aclose()
+
+    try:
+        asyncio.run(run())
+        logger.info(f"Phrase cache ready: {total} phrases, {cache.rendered - before} newly rendered")
+    except asyncio.TimeoutError:
+        logger.warning(
+            f"Phrase cache prewarm stopped after {timeout}s with {cache.rendered - before} newly rendered; "
+            "the rest are rendered on first use"
+        )
+    except Exception as e:
+        logger.warning(f"Phrases will be rendered on first use: {e}")
@@ -0,0 +1,41 @@
+"""Scripted conversation used by the offline benchmarks."""
+
+import json
+
+from fake_plugins import FakeResponse, ToolCall
+
+from agent import GameMaster
+
+AGENT_NAME = "game_master"
+
+# (user message, scripted LLM response)
+SCRIPT = [
+    ("Start the adventure", FakeResponse(text="You arrive at the fog-shrouded village. What do you do?")),
+    ("What do I have?", FakeResponse(
+        text="You carry a sword, armor and a potion. What do you do?",
+        tool_calls=[ToolCall("check_inventory", {})],
+    )),
+    ("I try to climb the tower", FakeResponse(
+        text="You scale the wall and reach the top. What do you do?",
+        tool_calls=[ToolCall("roll_dice", {"sides": 20, "modifier": 2})],
+    )),
+    ("I walk into the forest", FakeResponse(
+        text="The trees close in around you. What do you do?",
+        tool_calls=[ToolCall("update_world_state", {"updates": json.dumps({
+            "location": "ancient forest",
+            "event": "Entered the ancient forest",
+        })})],
+    )),
+    ("Switch to cyberpunk", FakeResponse(
+        text="Neon lights flicker around you. What do you do?",
+        tool_calls=[ToolCall("switch_universe", {"universe": "cyberpunk"})],
+    )),
+    ("Save the game", FakeResponse(
+        text="Game saved.",
+        tool_calls=[ToolCall("save_game", {})],
+    )),
+]
+
+
+def make_agent() -> GameMaster:
+    return GameMaster()
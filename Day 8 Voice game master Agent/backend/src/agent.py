@@ -10,6 +10,7 @@ from livekit.agents import (
     JobContext,
     JobProcess,
     MetricsCollectedEvent,
+    FunctionToolsExecutedEvent,
     RoomInputOptions,
     WorkerOptions,
     cli,
@@ -18,8 +19,10 @@ from livekit.agents import (
     function_tool,
     RunContext
 )
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+from livekit.plugins import murf, google, deepgram
+from context_budget import ContextBudget
+from latency_metrics import LatencyRecorder
+from model_cache import get_models, prewarm_models
 
 logger = logging.getLogger("agent")
 
@@ -48,6 +51,25 @@ UNIVERSES = {
     }
 }
 
+GM_INSTRUCTIONS = """{universe_prompt}
+        
+        Your role:
+        - You are the GM. Describe scenes vividly and ask the player what they do.
+        - Use the JSON world state to track player progress, inventory, NPCs, and locations.
+        - Always end responses with "What do you do?" or similar action prompts.
+        - Keep responses concise but atmospheric - 2-3 sentences, then prompt for action.
+        - Use dice rolls for risky actions and describe outcomes based on results.
+        
+        Rules:
+        - No complex formatting, emojis, or asterisks.
+        - Make consequences meaningful but keep the adventure moving.
+        - Update world state after significant events.
+        - Consider player attributes when determining action outcomes."""
+
+# One render per universe, shared by every session in the process
+INSTRUCTIONS_BUDGET = ContextBudget("game master", cache_size=len(UNIVERSES))
+
+
 class GameMaster(Agent):
     def __init__(self) -> None:
         self.world_state = self._init_world_state()
@@ -83,21 +105,11 @@ class GameMaster(Agent):
         }
     
     def _get_instructions(self) -> str:
-        universe = UNIVERSES[self.current_universe]
-        return f"""{universe['prompt']}
-        
-        Your role:
-        - You are the GM. Describe scenes vividly and ask the player what they do.
-        - Use the JSON world state to track player progress, inventory, NPCs, and locations.
-        - Always end responses with "What do you do?" or similar action prompts.
-        - Keep responses concise but atmospheric - 2-3 sentences, then prompt for action.
-        - Use dice rolls for risky actions and describe outcomes based on results.
-        
-        Rules:
-        - No complex formatting, emojis, or asterisks.
-        - Make consequences meaningful but keep the adventure moving.
-        - Update world state after significant events.
-        - Consider player attributes when determining action outcomes."""
+        return INSTRUCTIONS_BUDGET.render(
+            GM_INSTRUCTIONS,
+            version=self.current_universe,
+            universe_prompt=UNIVERSES[self.current_universe]["prompt"],
+        )
     
     @function_tool
     async def roll_dice(self, context: RunContext, sides: int = 20, modifier: int = 0) -> str:
@@ -178,6 +190,8 @@ class GameMaster(Agent):
             self.world_state["current_location"] = universe_data["starting_location"]
             
             logger.info(f"Switched to {universe} universe")
+            # The instructions only change with the universe's prompt
+            await self.update_instructions(self._get_instructions())
             return f"Switched to {UNIVERSES[universe]['name']}! {universe_data['starting_scenario']} What do you do?"
         else:
             return f"Unknown universe. Available: {', '.join(UNIVERSES.keys())}"
@@ -202,7 +216,7 @@ class GameMaster(Agent):
 
 
 def prewarm(proc: JobProcess):
-    proc.userdata["vad"] = silero.VAD.load()
+    prewarm_models(proc)
 
 
 async def entrypoint(ctx: JobContext):
@@ -212,6 +226,8 @@ async def entrypoint(ctx: JobContext):
         "room": ctx.room.name,
     }
 
+    models = get_models(ctx.proc)
+
     # Set up a voice AI pipeline using OpenAI, Cartesia, AssemblyAI, and the LiveKit turn detector
     session = AgentSession(
         # Speech-to-text (STT) is your agent's ears, turning the user's speech into text that the LLM can understand
@@ -232,8 +248,8 @@ async def entrypoint(ctx: JobContext):
             ),
         # VAD and turn detection are used to determine when the user is speaking and when the agent should respond
         # See more at https://docs.livekit.io/agents/build/turns
-        turn_detection=MultilingualModel(),
-        vad=ctx.proc.userdata["vad"],
+        turn_detection=models.turn_detection,
+        vad=models.vad,
         # allow the LLM to generate a response while waiting for the end of turn
         # See more at https://docs.livekit.io/agents/build/audio/#preemptive-generation
         preemptive_generation=True,
@@ -252,15 +268,22 @@ async def entrypoint(ctx: JobContext):
     # Metrics collection, to measure pipeline performance
     # For more information, see https://docs.livekit.io/agents/build/metrics/
     usage_collector = metrics.UsageCollector()
+    latency_recorder = LatencyRecorder(ctx.room.name)
 
     @session.on("metrics_collected")
     def _on_metrics_collected(ev: MetricsCollectedEvent):
         metrics.log_metrics(ev.metrics)
         usage_collector.collect(ev.metrics)
+        latency_recorder.record(ev.metrics)
+
+    @session.on("function_tools_executed")
+    def _on_function_tools_executed(ev: FunctionToolsExecutedEvent):
+        latency_recorder.record_tools(ev)
 
     async def log_usage():
         summary = usage_collector.get_summary()
         logger.info(f"Usage: {summary}")
+        latency_recorder.export()
 
     ctx.add_shutdown_callback(log_usage)
 
@@ -278,7 +301,7 @@ async def entrypoint(ctx: JobContext):
         room=ctx.room,
         room_input_options=RoomInputOptions(
             # For telephony applications, use `BVCTelephony` for best results
-            noise_cancellation=noise_cancellation.BVC(),
+            noise_cancellation=models.noise_cancellation,
         ),
     )
 